@@ -5,50 +5,75 @@ Demonstrates various command patterns and decorators.
 """
 
 from imessage_bot_framework import Bot, State
-from imessage_bot_framework.decorators import command, only_from_me, rate_limit
+from imessage_bot_framework.decorators import command
 import random
 import time
 
 # Create bot and state
 bot = Bot("Command Bot", debug=True)
-state = State("command_bot_state.json")
+# Batch counter writes instead of rewriting the file on every !count
+state = State("command_bot_state.json", write_delay=0.5)
+# Counts used to be stored as counter_<sender> keys
+state.migrate_prefixed_counters("counter_")
+
+GREETINGS = ("Hello!", "Hi there!", "Hey!", "Greetings!", "Howdy!")
+COIN_SIDES = ("Heads", "Tails")
+
+HELP_TEXT = "Available commands:\n" + "\n".join([
+    "!hello - Get a greeting",
+    "!time - Get current time",
+    "!count - Increment your counter",
+    "!reset - Reset your counter",
+    "!stats - Show bot statistics",
+    "!roll [sides] - Roll dice",
+    "!flip - Flip a coin",
+    "!help - Show this help"
+])
+
+# Last formatted wall-clock second, reused until the second changes
+_time_cache = {"second": -1, "text": ""}
+
+def current_time_text():
+    """Format the current time, reformatting at most once per second."""
+    second = int(time.time())
+    if second != _time_cache["second"]:
+        _time_cache["second"] = second
+        _time_cache["text"] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+    return _time_cache["text"]
 
 @bot.on_message
 @command("!hello")
 def hello_command(message):
     """Simple greeting command."""
-    greetings = ["Hello!", "Hi there!", "Hey!", "Greetings!", "Howdy!"]
-    return random.choice(greetings)
+    return random.choice(GREETINGS)
 
 @bot.on_message
 @command("!time")
 def time_command(message):
     """Get current time."""
-    return f"Current time: {time.strftime('%Y-%m-%d %H:%M:%S')}"
+    return f"Current time: {current_time_text()}"
 
 @bot.on_message
 @command("!count")
 def count_command(message):
     """Increment user's counter."""
-    count = state.increment(f"counter_{message.sender}")
+    count = state.incr_counter(message.sender)
     return f"Your count: {count}"
 
 @bot.on_message
 @command("!reset")
 def reset_command(message):
     """Reset user's counter."""
-    state.set(f"counter_{message.sender}", 0)
+    state.reset_counter(message.sender)
     return "Counter reset to 0!"
 
 @bot.on_message
 @command("!stats")
 def stats_command(message):
     """Show bot statistics."""
-    all_keys = state.get_all_keys()
-    counter_keys = [k for k in all_keys if k.startswith("counter_")]
-    total_counts = sum(state.get(k, 0) for k in counter_keys)
+    users, total_counts = state.counters_sum()
     
-    return f"📊 Bot Stats:\n• Users: {len(counter_keys)}\n• Total counts: {total_counts}"
+    return f"📊 Bot Stats:\n• Users: {users}\n• Total counts: {total_counts}"
 
 @bot.on_message
 @command("!roll")
@@ -67,7 +92,7 @@ def dice_command(message, args):
 @command("!flip")
 def coin_flip(message):
     """Flip a coin."""
-    result = random.choice(["Heads", "Tails"])
+    result = random.choice(COIN_SIDES)
     emoji = "🔴" if result == "Heads" else "🔵"
     return f"{emoji} {result}!"
 
@@ -75,21 +100,9 @@ def coin_flip(message):
 @command("!help")
 def help_command(message):
     """Show available commands."""
-    commands = [
-        "!hello - Get a greeting",
-        "!time - Get current time", 
-        "!count - Increment your counter",
-        "!reset - Reset your counter",
-        "!stats - Show bot statistics",
-        "!roll [sides] - Roll dice",
-        "!flip - Flip a coin",
-        "!help - Show this help"
-    ]
-    return "Available commands:\n" + "\n".join(commands)
+    return HELP_TEXT
 
-@bot.on_message
-@command("!admin")
-@only_from_me()
+@bot.handler(command="!admin", only_me=True)
 def admin_command(message, args):
     """Admin-only command."""
     if args == "shutdown":
@@ -99,9 +112,7 @@ def admin_command(message, args):
     else:
         return "Admin commands: shutdown, status"
 
-@bot.on_message
-@command("!spam")
-@rate_limit(max_calls=3, window_seconds=60)
+@bot.handler(command="!spam", rate_limit=(3, 60))
 def limited_command(message):
     """Rate-limited command."""
     return "This command is rate-limited to 3 times per minute!"
@@ -6,59 +6,97 @@ Demonstrates regex pattern matching for natural language processing.
 
 from imessage_bot_framework import Bot
 from imessage_bot_framework.decorators import regex, contains
+import operator
 import re
 
+# Patterns are compiled once at import and handed to @regex as-is
+# Bounded digit runs and single optional spaces keep this linear on long messages
+CALCULATOR_RE = re.compile(r"(?<!\d)(\d{1,9}) ?([+\-*/]) ?(\d{1,9})(?!\d)")
+# One pass for every keyword-led request; the outer named group that
+# matched picks the reply from IMPERATIVE_REPLIES. The request that starts
+# earliest in the message wins, so "search for how to convert 5 kg to lb"
+# is a search, not a conversion
+IMPERATIVE_RE = re.compile(
+    r"(?P<reminder>remind me (?:to )?(?P<task>.+?) in (?P<amount>\d+) (?P<unit>minute|minutes|hour|hours|day|days))"
+    r"|(?P<weather>what(?:'s| is) the weather (?:in |for )?(?P<location>.+))"
+    r"|(?P<convert>convert (?P<value>\d+(?:\.\d+)?) (?P<from_unit>.*?) to (?P<to_unit>.*))"
+    r"|(?P<contact>(?:call|phone|contact) (?P<person>.+))"
+    r"|(?P<search>(?:search|google|look up) (?P<query>.+))",
+    re.IGNORECASE
+)
+NAME_RE = re.compile(r"(?:my name is|i'm|i am) ([a-zA-Z]+)", re.IGNORECASE)
+TIME_RE = re.compile(r"\b(\d{1,2}):(\d{2})(?:\s*([ap]m))?\b", re.IGNORECASE)
+
+OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
 bot = Bot("Regex Bot", debug=True)
 
 @bot.on_message
-@regex(r"(\d+)\s*([+\-*/])\s*(\d+)")
+@regex(CALCULATOR_RE)
 def calculator(message, a, op, b):
     """Calculator using regex pattern matching."""
     try:
         a, b = int(a), int(b)
-        if op == '+': 
-            result = a + b
-        elif op == '-': 
-            result = a - b
-        elif op == '*': 
-            result = a * b
-        elif op == '/': 
-            if b == 0:
-                return "Cannot divide by zero!"
-            result = a / b
-        else:
+        apply_op = OPERATORS.get(op)
+        if apply_op is None:
             return "Unknown operator"
+        if op == '/' and b == 0:
+            return "Cannot divide by zero!"
+        result = apply_op(a, b)
         
         return f"{a} {op} {b} = {result}"
     except ValueError:
         return "Invalid numbers"
 
-@bot.on_message
-@regex(r"remind me (?:to )?(.+?) in (\d+) (minute|minutes|hour|hours|day|days)", re.IGNORECASE)
-def reminder_parser(message, task, amount, unit):
-    """Parse reminder requests."""
-    return f"I'll remind you to '{task}' in {amount} {unit}! (Feature coming soon)"
+def reminder_reply(match):
+    """Reply to reminder requests."""
+    return f"I'll remind you to '{match['task']}' in {match['amount']} {match['unit']}! (Feature coming soon)"
 
-@bot.on_message
-@regex(r"what(?:'s| is) the weather (?:in |for )?(.+)", re.IGNORECASE)
-def weather_request(message, location):
-    """Parse weather requests."""
-    return f"Weather for {location}: Sunny, 72°F (This is a demo response)"
+def weather_reply(match):
+    """Reply to weather requests."""
+    return f"Weather for {match['location']}: Sunny, 72°F (This is a demo response)"
+
+def convert_reply(match):
+    """Reply to unit conversion requests."""
+    return f"Converting {match['value']} {match['from_unit']} to {match['to_unit']}: (Conversion feature coming soon)"
+
+def contact_reply(match):
+    """Reply to contact requests."""
+    return f"You want to contact {match['person']}. I can't actually call them, but that's a good idea!"
 
+def search_reply(match):
+    """Reply to search requests."""
+    return f"You want to search for '{match['query']}'. Here's a demo result: Very interesting topic!"
+
+IMPERATIVE_REPLIES = {
+    "reminder": reminder_reply,
+    "weather": weather_reply,
+    "convert": convert_reply,
+    "contact": contact_reply,
+    "search": search_reply,
+}
+
+# Runs before the name, time, pizza and thank-you handlers, so
+# "call Sam and thank him" is a contact request
 @bot.on_message
-@regex(r"convert (\d+(?:\.\d+)?) (.*?) to (.*)", re.IGNORECASE)
-def unit_converter(message, amount, from_unit, to_unit):
-    """Parse unit conversion requests."""
-    return f"Converting {amount} {from_unit} to {to_unit}: (Conversion feature coming soon)"
+@regex(IMPERATIVE_RE, pass_match=True)
+def imperative_request(message, match):
+    """Parse reminder, weather, conversion, contact and search requests in one regex pass."""
+    return IMPERATIVE_REPLIES[match.lastgroup](match)
 
 @bot.on_message
-@regex(r"(?:my name is|i'm|i am) ([a-zA-Z]+)", re.IGNORECASE)
+@regex(NAME_RE)
 def name_introduction(message, name):
     """Detect name introductions."""
     return f"Nice to meet you, {name}! I'll remember that."
 
 @bot.on_message
-@regex(r"(\d{1,2}):(\d{2})\s*(am|pm)?", re.IGNORECASE)
+@regex(TIME_RE)
 def time_parser(message, hour, minute, ampm):
     """Parse time mentions."""
     ampm = ampm or ""
@@ -76,26 +114,15 @@ def thank_you_response(message):
     """Respond to thank you messages."""
     return "You're welcome! 😊"
 
-@bot.on_message
-@regex(r"(?:call|phone|contact) (.+)", re.IGNORECASE)
-def contact_request(message, person):
-    """Parse contact requests."""
-    return f"You want to contact {person}. I can't actually call them, but that's a good idea!"
-
-@bot.on_message
-@regex(r"(?:search|google|look up) (.+)", re.IGNORECASE)
-def search_request(message, query):
-    """Parse search requests."""
-    return f"You want to search for '{query}'. Here's a demo result: Very interesting topic!"
-
 @bot.on_message
 def fallback_handler(message):
     """Fallback for unmatched messages."""
-    if message.text.startswith("!"):
+    text = message.text
+    if text.startswith("!"):
         return "I didn't understand that command. Try sending some natural language!"
-    elif "?" in message.text:
+    elif "?" in text:
         return "That's a great question! I'm still learning how to answer questions."
-    elif len(message.text.split()) > 10:
+    elif text.count(" ") >= 10:  # more than 10 words, without building a word list
         return "That's quite a long message! I'm still learning to process complex text."
     return None  # Don't respond to everything
 
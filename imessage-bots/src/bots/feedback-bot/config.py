@@ -1,5 +1,5 @@
 import os
-from typing import Optional, List
+from typing import FrozenSet, Optional, List
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -15,6 +15,7 @@ class Config:
     # FastAPI Configuration
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8081"))  # Different port from other bots
+    WEB_WORKERS: int = int(os.getenv("WEB_WORKERS", "1"))  # More than 1 needs STATE_REDIS_URL so workers share conversations
     
     # Feedback Bot Configuration
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
@@ -22,12 +23,15 @@ class Config:
     # Multiple Chat GUIDs - can be comma-separated list
     _CHAT_GUIDS_STR: str = os.getenv("CHAT_GUIDS", os.getenv("CHAT_GUID", ""))  # Support both CHAT_GUIDS and legacy CHAT_GUID
     CHAT_GUIDS: List[str] = [guid.strip() for guid in _CHAT_GUIDS_STR.split(",") if guid.strip()] if _CHAT_GUIDS_STR else []
+    CHAT_GUIDS_SET: FrozenSet[str] = frozenset(CHAT_GUIDS)  # For O(1) membership checks on every webhook
     
     # Legacy single chat GUID support (deprecated but maintained for backwards compatibility)
     CHAT_GUID: str = CHAT_GUIDS[0] if CHAT_GUIDS else ""
     
     # OpenAI Configuration
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "50"))  # Max in-flight OpenAI requests
+    OPENAI_REQUESTS_PER_MINUTE: int = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))  # Stay under the account's RPM tier
     
     # Linear API Configuration
     LINEAR_API_KEY: str = os.getenv("LINEAR_API_KEY", "")
@@ -50,6 +54,36 @@ class Config:
     ENABLE_CROSS_CHAT_INSIGHTS: bool = os.getenv("ENABLE_CROSS_CHAT_INSIGHTS", "true").lower() == "true"
     CROSS_CHAT_PROBE_FREQUENCY: float = float(os.getenv("CROSS_CHAT_PROBE_FREQUENCY", "0.3"))  # 30% chance to ask cross-chat probe
     
+    # Back-pressure (cross-chat probes are queued for a small sender pool; webhooks are refused when saturated)
+    OUTBOUND_SENDER_WORKERS: int = int(os.getenv("OUTBOUND_SENDER_WORKERS", "4"))
+    OUTBOUND_QUEUE_SIZE: int = int(os.getenv("OUTBOUND_QUEUE_SIZE", "1000"))  # Webhooks get a 503 while it's full
+    MAX_INFLIGHT_MESSAGES: int = int(os.getenv("MAX_INFLIGHT_MESSAGES", "200"))  # Webhooks get a 503 beyond this
+    
+    # Durable task queue (requires arq; feedback is processed by `arq worker.WorkerSettings` instead of in the web process)
+    TASK_QUEUE_REDIS_URL: str = os.getenv("TASK_QUEUE_REDIS_URL", "")
+    
+    # Persisted conversation state (requires redis; survives restarts and is shared between workers)
+    STATE_REDIS_URL: str = os.getenv("STATE_REDIS_URL", "")
+    
+    # Pause before the second part of a two-part reply, like a person typing it (sent in the background)
+    SIMULATE_TYPING: bool = os.getenv("SIMULATE_TYPING", "false").lower() == "true"
+    
+    # Share of welcome messages written by GPT instead of picked from templates (0 = templates only)
+    WELCOME_GPT_PROBABILITY: float = float(os.getenv("WELCOME_GPT_PROBABILITY", "0"))
+    
+    # Let general replies come back with the model's next action (summarize/end) from one tool call, instead of streaming
+    ENABLE_MODEL_NEXT_ACTION: bool = os.getenv("ENABLE_MODEL_NEXT_ACTION", "false").lower() == "true"
+    
+    # Batch API settings (summaries are delivered as a follow-up once the batch completes)
+    ENABLE_BATCH_SUMMARIES: bool = os.getenv("ENABLE_BATCH_SUMMARIES", "false").lower() == "true"
+    BATCH_FLUSH_INTERVAL: float = float(os.getenv("BATCH_FLUSH_INTERVAL", "60"))  # Seconds to collect requests per batch
+    
+    # Semantic response cache (reuses replies for near-duplicate messages within a chat)
+    ENABLE_SEMANTIC_CACHE: bool = os.getenv("ENABLE_SEMANTIC_CACHE", "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.93"))  # Min cosine similarity for a hit
+    SEMANTIC_CACHE_EMBEDDING_MODEL: str = os.getenv("SEMANTIC_CACHE_EMBEDDING_MODEL", "text-embedding-3-small")
+    SEMANTIC_CACHE_DIMENSIONS: int = int(os.getenv("SEMANTIC_CACHE_DIMENSIONS", "256"))  # Shortened embeddings keep lookups cheap
+    
     @classmethod
     def validate(cls) -> None:
         """Validate that all required configuration is present."""
@@ -67,6 +101,6 @@ class Config:
     @classmethod
     def is_monitored_chat(cls, chat_guid: str) -> bool:
         """Check if a chat GUID is in our monitored list."""
-        return chat_guid in cls.CHAT_GUIDS
+        return chat_guid in cls.CHAT_GUIDS_SET
 
 config = Config() 
\ No newline at end of file
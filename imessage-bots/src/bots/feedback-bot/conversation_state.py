@@ -1,14 +1,140 @@
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Sequence, Set, Tuple
+from collections import Counter
+import asyncio
 from datetime import datetime, timedelta
 import re
 import random
 import hashlib
+import time
 from models import (
     FeedbackConversation, ConversationState, FeedbackBotState, 
     FeedbackType, StructuredFeedback, UserProfile, CrossChatInsight
 )
 from config import config
 
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+# Redis keys for persisted state (STATE_REDIS_URL)
+_CONVERSATION_KEY_PREFIX = "feedback:conversation:"
+_GLOBAL_STATE_KEY = "feedback:global_state"
+
+# How long get_stats() may serve a cached result (it also counts conversations active in the last 24h)
+_STATS_CACHE_TTL = 5.0
+
+def _insight_severity(feedback_type: FeedbackType, frequency_count: int, current: str) -> str:
+    """Severity of a cross-chat insight after it has been seen frequency_count times."""
+    if frequency_count >= 5 or feedback_type in (FeedbackType.BUG_REPORT, FeedbackType.PAIN_POINT):
+        return "high"
+    if frequency_count >= 3:
+        return "medium"
+    return current
+
+def _merge_stored_conversation(
+    conversation: FeedbackConversation, base: Optional[FeedbackConversation], stored: FeedbackConversation
+) -> None:
+    """Fold changes another worker saved into this worker's copy of a conversation (modified in place).
+    
+    Args:
+        conversation: This worker's copy, about to be saved
+        base: The stored copy this worker last read or wrote (None if it never had one)
+        stored: The copy another worker has saved since
+    """
+    # Messages from both copies, in the order they happened
+    seen = {(message.timestamp, message.role, message.content) for message in conversation.conversation_history}
+    history = conversation.conversation_history + [
+        message for message in stored.conversation_history
+        if (message.timestamp, message.role, message.content) not in seen
+    ]
+    history.sort(key=lambda message: message.timestamp)
+    conversation.conversation_history = history[-20:]
+    
+    # Counters add what the other worker counted since base
+    conversation.total_feedback_collected += stored.total_feedback_collected - (base.total_feedback_collected if base else 0)
+    conversation.total_questions_asked += stored.total_questions_asked - (base.total_questions_asked if base else 0)
+    profile = conversation.user_profile
+    profile.total_feedback_items += stored.user_profile.total_feedback_items - (base.user_profile.total_feedback_items if base else 0)
+    for feedback_type, count in stored.user_profile.feedback_types.items():
+        added = count - (base.user_profile.feedback_types.get(feedback_type, 0) if base else 0)
+        profile.feedback_types[feedback_type] = profile.feedback_types.get(feedback_type, 0) + added
+    
+    conversation.cross_chat_probes_asked += [
+        probe for probe in stored.cross_chat_probes_asked if probe not in conversation.cross_chat_probes_asked
+    ]
+    if stored.triaged_to_linear and not conversation.triaged_to_linear:
+        conversation.triaged_to_linear = True
+        conversation.triaged_at = stored.triaged_at
+    conversation.last_interaction = max(conversation.last_interaction, stored.last_interaction)
+    # Everything else (state, current feedback, pending probes) keeps this worker's newer values
+
+class _GlobalStateChanges:
+    """Changes made to the global state since this worker last wrote it to Redis.
+    
+    persist_conversation() applies them to the stored copy inside a WATCH transaction,
+    so workers add to each other's counters and insights instead of overwriting them.
+    """
+    __slots__ = ("conversations", "feedback_items", "feedback_by_type", "feedback_reset", "insights", "last_activity")
+    
+    def __init__(self):
+        self.conversations = 0
+        self.feedback_items = 0
+        self.feedback_by_type: Counter = Counter()
+        self.feedback_reset = False  # clear_triaged_feedback() zeroed the feedback counters
+        # theme -> [latest local insight, times seen, newly affected chats]
+        self.insights: Dict[str, list] = {}
+        self.last_activity: Optional[datetime] = None
+    
+    def add_insight(self, theme: str, insight: CrossChatInsight, new_chat: bool) -> None:
+        """Record one more sighting of a theme."""
+        change = self.insights.get(theme)
+        if change is None:
+            self.insights[theme] = [insight, 1, int(new_chat)]
+        else:
+            change[0] = insight
+            change[1] += 1
+            change[2] += new_chat
+    
+    def absorb(self, earlier: "_GlobalStateChanges") -> None:
+        """Fold in changes made before these ones, e.g. after a failed write."""
+        self.conversations += earlier.conversations
+        if not self.feedback_reset:
+            self.feedback_items += earlier.feedback_items
+            self.feedback_by_type.update(earlier.feedback_by_type)
+            self.feedback_reset = earlier.feedback_reset
+        for theme, (insight, seen, new_chats) in earlier.insights.items():
+            change = self.insights.setdefault(theme, [insight, 0, 0])
+            change[1] += seen
+            change[2] += new_chats
+        if earlier.last_activity and (self.last_activity is None or earlier.last_activity > self.last_activity):
+            self.last_activity = earlier.last_activity
+    
+    def apply_to(self, state: FeedbackBotState) -> None:
+        """Apply these changes to a global state (modified in place)."""
+        state.total_conversations += self.conversations
+        if self.feedback_reset:
+            state.total_feedback_items = 0
+            state.feedback_by_type = {}
+        state.total_feedback_items += self.feedback_items
+        for feedback_type, count in self.feedback_by_type.items():
+            state.feedback_by_type[feedback_type] = state.feedback_by_type.get(feedback_type, 0) + count
+        
+        for theme, (insight, seen, new_chats) in self.insights.items():
+            stored = state.cross_chat_insights.get(theme)
+            if stored is None:
+                state.cross_chat_insights[theme] = insight.model_copy(
+                    update={"frequency_count": seen, "affected_chats": max(new_chats, 1)}
+                )
+                continue
+            stored.frequency_count += seen
+            stored.affected_chats += new_chats
+            stored.last_seen = max(stored.last_seen, insight.last_seen)
+            stored.severity_level = _insight_severity(stored.feedback_type, stored.frequency_count, stored.severity_level)
+        
+        if self.last_activity and (state.last_activity is None or self.last_activity > state.last_activity):
+            state.last_activity = self.last_activity
+
 class FeedbackConversationManager:
     """Manages conversation state and feedback extraction for user interviews across multiple chats."""
     
@@ -19,6 +145,22 @@ class FeedbackConversationManager:
         self._global_state = FeedbackBotState()
         self._global_state.active_chat_guids = config.CHAT_GUIDS.copy()
         
+        # Cross-chat insights grouped by feedback type (theme -> insight), kept in step with the global state
+        self._insights_by_type: Dict[FeedbackType, Dict[str, CrossChatInsight]] = {}
+        
+        # Redis connection for persisted state, set by connect_store()
+        self._store: Optional["redis.Redis"] = None
+        self._global_changes = _GlobalStateChanges()  # Not yet merged into the stored global state
+        # chat_guid -> conversation JSON as last read from or written to Redis, to spot other workers' writes
+        self._stored_conversations: Dict[str, bytes] = {}
+        # chat_guid -> lock held while a chat's conversation is reloaded, changed and saved
+        self._chat_locks: Dict[str, asyncio.Lock] = {}
+        
+        # Bumped on every change, so derived views (stats, summaries) know when to rebuild
+        self.version = 0
+        self._stats_cache: Optional[Tuple[int, float, Dict]] = None
+        self._stored_stats_cache: Optional[Tuple[float, Dict]] = None
+        
         # Mom Test probe questions for different feedback types
         self.mom_test_probes = {
             FeedbackType.FEATURE_REQUEST: [
@@ -58,6 +200,182 @@ class FeedbackConversationManager:
             ]
         }
     
+    async def connect_store(self, url: str) -> None:
+        """Persist conversation state in Redis and load what was saved there."""
+        self._store = redis.from_url(url)
+        await self.load_from_store()
+    
+    async def close_store(self) -> None:
+        """Close the Redis connection, if any."""
+        if self._store is not None:
+            await self._store.aclose()
+            self._store = None
+    
+    async def load_from_store(self) -> None:
+        """Replace in-memory state with everything saved in Redis."""
+        if self._store is None:
+            return
+        
+        keys = [key async for key in self._store.scan_iter(match=f"{_CONVERSATION_KEY_PREFIX}*", count=500)]
+        if keys:
+            for raw in await self._store.mget(keys):
+                if raw is not None:
+                    conversation = FeedbackConversation.model_validate_json(raw)
+                    self._conversations[conversation.chat_guid] = conversation
+                    self._stored_conversations[conversation.chat_guid] = raw
+        self.version += 1
+        
+        raw_global = await self._store.get(_GLOBAL_STATE_KEY)
+        if raw_global is not None:
+            self._set_global_state(FeedbackBotState.model_validate_json(raw_global))
+    
+    def _set_global_state(self, global_state: FeedbackBotState) -> None:
+        """Replace the global state (e.g. with the stored copy) and re-index its insights."""
+        global_state.active_chat_guids = config.CHAT_GUIDS.copy()
+        self._global_state = global_state
+        self._insights_by_type = {}
+        for theme, insight in global_state.cross_chat_insights.items():
+            self._insights_by_type.setdefault(insight.feedback_type, {})[theme] = insight
+        self.version += 1
+    
+    def chat_lock(self, chat_guid: str) -> asyncio.Lock:
+        """Lock to hold from refresh_conversation() to persist_conversation() while handling a chat.
+        
+        Without it, a second message from the same chat could reload the conversation
+        while the first is still being processed, and the first message's changes
+        would be made to an object that's no longer stored.
+        """
+        lock = self._chat_locks.get(chat_guid)
+        if lock is None:
+            lock = self._chat_locks[chat_guid] = asyncio.Lock()
+        return lock
+    
+    async def refresh_conversation(self, chat_guid: str) -> None:
+        """Reload one chat's conversation from Redis, picking up changes saved by other workers.
+        
+        Call it holding chat_lock(chat_guid), since it replaces the conversation object.
+        """
+        if self._store is None:
+            return
+        
+        raw = await self._store.get(f"{_CONVERSATION_KEY_PREFIX}{chat_guid}")
+        if raw is not None:
+            self._conversations[chat_guid] = FeedbackConversation.model_validate_json(raw)
+            self._stored_conversations[chat_guid] = raw
+            self.version += 1
+    
+    async def persist_conversation(self, chat_guid: str) -> None:
+        """Save one chat's conversation to Redis and merge this worker's global state changes into the stored copy.
+        
+        Both keys are read, updated and written under WATCH (retried if another worker
+        writes either in between). If another worker saved the conversation since this
+        one read it, its messages and counts are merged in rather than overwritten, and
+        concurrent workers never overwrite each other's global counts.
+        """
+        if self._store is None:
+            return
+        
+        conversation_key = f"{_CONVERSATION_KEY_PREFIX}{chat_guid}"
+        conversation = self.get_conversation(chat_guid)
+        changes, self._global_changes = self._global_changes, _GlobalStateChanges()
+        written: Optional[str] = None
+        
+        async def merge(pipe) -> FeedbackBotState:
+            nonlocal written
+            raw_global = await pipe.get(_GLOBAL_STATE_KEY)
+            global_state = FeedbackBotState.model_validate_json(raw_global) if raw_global is not None else FeedbackBotState()
+            changes.apply_to(global_state)
+            
+            if conversation is not None:
+                raw_stored = await pipe.get(conversation_key)
+                base = self._stored_conversations.get(chat_guid)
+                if raw_stored is not None and raw_stored != base:
+                    # Another worker saved this chat since we read it
+                    _merge_stored_conversation(
+                        conversation,
+                        FeedbackConversation.model_validate_json(base) if base is not None else None,
+                        FeedbackConversation.model_validate_json(raw_stored)
+                    )
+                    self._stored_conversations[chat_guid] = raw_stored
+                written = conversation.model_dump_json()
+            
+            pipe.multi()
+            if written is not None:
+                pipe.set(conversation_key, written)
+            pipe.set(_GLOBAL_STATE_KEY, global_state.model_dump_json())
+            return global_state
+        
+        try:
+            global_state = await self._store.transaction(
+                merge, _GLOBAL_STATE_KEY, conversation_key, value_from_callable=True
+            )
+        except BaseException:
+            # Keep the changes for the next write
+            self._global_changes.absorb(changes)
+            raise
+        
+        if written is not None:
+            self._stored_conversations[chat_guid] = written.encode()
+        
+        # Adopt the merged totals (other workers' changes included), plus whatever changed while writing
+        self._global_changes.apply_to(global_state)
+        self._adopt_global_state(global_state)
+    
+    def _adopt_global_state(self, merged: FeedbackBotState) -> None:
+        """Copy merged global totals into the live global state in place.
+        
+        Messages being processed may hold the live state and its insights, so the
+        objects are updated rather than replaced.
+        """
+        live = self._global_state
+        live.total_conversations = merged.total_conversations
+        live.total_feedback_items = merged.total_feedback_items
+        live.feedback_by_type = merged.feedback_by_type
+        live.last_activity = merged.last_activity
+        for theme, insight in merged.cross_chat_insights.items():
+            current = live.cross_chat_insights.get(theme)
+            if current is None:
+                live.cross_chat_insights[theme] = insight
+                self._insights_by_type.setdefault(insight.feedback_type, {})[theme] = insight
+                continue
+            current.frequency_count = insight.frequency_count
+            current.affected_chats = insight.affected_chats
+            current.last_seen = insight.last_seen
+            current.severity_level = insight.severity_level
+        self.version += 1
+    
+    async def get_stored_stats(self) -> Dict:
+        """Get statistics for every conversation saved in Redis, including other workers'.
+        
+        Reads into a separate aggregate: the live conversations may be in use by a
+        message being processed, so they're never swapped out here. Falls back to
+        get_stats() without a store, and is cached like it.
+        """
+        if self._store is None:
+            return self.get_stats()
+        
+        now = time.monotonic()
+        if self._stored_stats_cache is not None and now - self._stored_stats_cache[0] < _STATS_CACHE_TTL:
+            return self._stored_stats_cache[1]
+        
+        conversations = {}
+        keys = [key async for key in self._store.scan_iter(match=f"{_CONVERSATION_KEY_PREFIX}*", count=500)]
+        if keys:
+            for raw in await self._store.mget(keys):
+                if raw is not None:
+                    conversation = FeedbackConversation.model_validate_json(raw)
+                    conversations[conversation.chat_guid] = conversation
+        
+        raw_global = await self._store.get(_GLOBAL_STATE_KEY)
+        global_state = FeedbackBotState.model_validate_json(raw_global) if raw_global is not None else FeedbackBotState()
+        # Include this worker's changes that haven't been written yet
+        self._global_changes.apply_to(global_state)
+        global_state.active_chat_guids = config.CHAT_GUIDS.copy()
+        
+        stats = self._build_stats(conversations, global_state)
+        self._stored_stats_cache = (now, stats)
+        return stats
+    
     def get_conversation(self, chat_guid: str) -> Optional[FeedbackConversation]:
         """Get conversation state for a chat."""
         return self._conversations.get(chat_guid)
@@ -80,6 +398,7 @@ class FeedbackConversationManager:
         )
         self._conversations[chat_guid] = conversation
         self._global_state.total_conversations += 1
+        self._global_changes.conversations += 1
         return conversation
     
     def _generate_theme_from_feedback(self, feedback_type: FeedbackType, message: str) -> str:
@@ -139,17 +458,16 @@ class FeedbackConversationManager:
             
             # Check if this is from a new chat (without storing the specific GUID)
             chat_hash = hashlib.sha256(chat_guid.encode()).hexdigest()[:8]
-            if chat_hash not in getattr(insight, '_chat_hashes', set()):
+            new_chat = chat_hash not in getattr(insight, '_chat_hashes', set())
+            if new_chat:
                 insight.affected_chats += 1
                 if not hasattr(insight, '_chat_hashes'):
                     insight._chat_hashes = set()
                 insight._chat_hashes.add(chat_hash)
             
             # Update severity based on frequency and type
-            if insight.frequency_count >= 5 or feedback.feedback_type in [FeedbackType.BUG_REPORT, FeedbackType.PAIN_POINT]:
-                insight.severity_level = "high"
-            elif insight.frequency_count >= 3:
-                insight.severity_level = "medium"
+            insight.severity_level = _insight_severity(feedback.feedback_type, insight.frequency_count, insight.severity_level)
+            self._global_changes.add_insight(theme, insight, new_chat)
         else:
             # Create new insight
             probes = self._generate_cross_chat_probes(theme, feedback.feedback_type)
@@ -164,6 +482,17 @@ class FeedbackConversationManager:
             insight._chat_hashes = {chat_hash}
             
             self._global_state.cross_chat_insights[theme] = insight
+            self._insights_by_type.setdefault(insight.feedback_type, {})[theme] = insight
+            self._global_changes.add_insight(theme, insight, True)
+    
+    def get_recurring_insights(self, feedback_types: Set[FeedbackType]) -> Dict[str, CrossChatInsight]:
+        """Get the insights seen more than once for any of the given feedback types, keyed by theme."""
+        return {
+            theme: insight
+            for feedback_type in feedback_types
+            for theme, insight in self._insights_by_type.get(feedback_type, {}).items()
+            if insight.frequency_count > 1
+        }
     
     def _generate_cross_chat_probes(self, theme: str, feedback_type: FeedbackType) -> List[str]:
         """Generate probes for cross-chat insights based on theme."""
@@ -307,6 +636,7 @@ class FeedbackConversationManager:
     def process_user_message(self, chat_guid: str, message: str) -> FeedbackConversation:
         """Process a user message and update conversation context."""
         conversation = self.start_conversation(chat_guid)
+        self.version += 1
         
         # Analyze feedback type
         feedback_type = self.analyze_feedback_type(message)
@@ -334,13 +664,15 @@ class FeedbackConversationManager:
             if feedback_type.value not in self._global_state.feedback_by_type:
                 self._global_state.feedback_by_type[feedback_type.value] = 0
             self._global_state.feedback_by_type[feedback_type.value] += 1
+            self._global_changes.feedback_items += 1
+            self._global_changes.feedback_by_type[feedback_type.value] += 1
         
         # Update conversation state based on feedback
-        if conversation.state == ConversationState.INITIAL_CONTACT:
+        if conversation.state is ConversationState.INITIAL_CONTACT:
             conversation.state = ConversationState.COLLECTING_FEEDBACK
-        elif conversation.state == ConversationState.COLLECTING_FEEDBACK and feedback_type != FeedbackType.QUESTION:
+        elif conversation.state is ConversationState.COLLECTING_FEEDBACK and feedback_type != FeedbackType.QUESTION:
             conversation.state = ConversationState.PROBING_DEEPER
-        elif conversation.state == ConversationState.PROBING_DEEPER:
+        elif conversation.state is ConversationState.PROBING_DEEPER:
             # Check if we should move to summarizing instead of more probing
             if conversation.total_questions_asked >= 3 or self._has_sufficient_detail(conversation):
                 conversation.state = ConversationState.SUMMARIZING
@@ -361,7 +693,7 @@ class FeedbackConversationManager:
         if self._has_sufficient_detail(conversation):
             return False
         
-        return conversation.state == ConversationState.PROBING_DEEPER
+        return conversation.state is ConversationState.PROBING_DEEPER
     
     def _has_sufficient_detail(self, conversation: FeedbackConversation) -> bool:
         """Check if we have sufficient detail to stop probing."""
@@ -392,8 +724,8 @@ class FeedbackConversationManager:
     def is_session_ending(self, conversation: FeedbackConversation) -> bool:
         """Determine if this feedback session is ending and should trigger Linear issue creation."""
         return (
-            conversation.state == ConversationState.SUMMARIZING or
-            conversation.state == ConversationState.THANKING or
+            conversation.state is ConversationState.SUMMARIZING or
+            conversation.state is ConversationState.THANKING or
             (conversation.total_questions_asked >= config.MAX_QUESTIONS_PER_SESSION and
              conversation.total_feedback_collected > 0)
         )
@@ -469,11 +801,10 @@ class FeedbackConversationManager:
     def mark_session_triaged(self, chat_guid: str):
         """Mark that a session's feedback has been triaged to Linear."""
         conversation = self.get_conversation(chat_guid)
-        if conversation:
-            # Add a flag to track that this session was triaged
-            if not hasattr(conversation, '_triaged_to_linear'):
-                conversation._triaged_to_linear = True
-                conversation._triaged_timestamp = datetime.now()
+        if conversation and not conversation.triaged_to_linear:
+            conversation.triaged_to_linear = True
+            conversation.triaged_at = datetime.now()
+            self.version += 1
     
     def get_conversation_context(self, chat_guid: str) -> Dict:
         """Get comprehensive conversation context for AI generation."""
@@ -481,6 +812,7 @@ class FeedbackConversationManager:
         if not conversation:
             return {
                 "context": "new_conversation", 
+                "chat_guid": chat_guid,
                 "state": ConversationState.INITIAL_CONTACT,
                 "total_feedback": 0
             }
@@ -491,6 +823,7 @@ class FeedbackConversationManager:
         cross_chat_probe = self.get_cross_chat_probe(chat_guid)
         
         context = {
+            "chat_guid": chat_guid,
             "state": conversation.state,
             "current_feedback_type": conversation.current_feedback.feedback_type.value if conversation.current_feedback else None,
             "total_feedback_collected": conversation.total_feedback_collected,
@@ -504,6 +837,7 @@ class FeedbackConversationManager:
                 {
                     "role": msg.role,
                     "content": msg.content,
+                    "preview": msg.preview,
                     "feedback_type": msg.feedback_type.value if msg.feedback_type else None,
                     "timestamp": msg.timestamp.isoformat()
                 }
@@ -520,14 +854,20 @@ class FeedbackConversationManager:
     
     def mark_message_sent(self, chat_guid: str, message: str):
         """Mark that a message was sent in the conversation."""
+        self.mark_messages_sent(chat_guid, (message,))
+    
+    def mark_messages_sent(self, chat_guid: str, messages: Sequence[str]):
+        """Mark that the parts of a reply were sent, as a single change to the conversation."""
         conversation = self.get_conversation(chat_guid)
+        self.version += 1
         if conversation:
-            conversation.add_bot_message(message)
-            if self._is_question(message):
-                conversation.total_questions_asked += 1
+            for message in messages:
+                conversation.add_bot_message(message)
+                if self._is_question(message):
+                    conversation.total_questions_asked += 1
         
         # Update global state
-        self._global_state.last_activity = datetime.now()
+        self._global_state.last_activity = self._global_changes.last_activity = datetime.now()
     
     def _is_question(self, message: str) -> bool:
         """Check if a message is a question."""
@@ -536,20 +876,37 @@ class FeedbackConversationManager:
         return any(indicator in message_lower for indicator in question_indicators)
     
     def get_stats(self) -> Dict:
-        """Get comprehensive statistics for all conversations."""
-        active_conversations = sum(1 for conv in self._conversations.values() 
+        """Get comprehensive statistics for all conversations.
+        
+        Rebuilt only after a change, or once the cached result is a few seconds old,
+        so frequent health checks don't rescan every conversation.
+        """
+        now = time.monotonic()
+        if self._stats_cache is not None:
+            version, built_at, stats = self._stats_cache
+            if version == self.version and now - built_at < _STATS_CACHE_TTL:
+                return stats
+        
+        stats = self._build_stats(self._conversations, self._global_state)
+        self._stats_cache = (self.version, now, stats)
+        return stats
+    
+    @staticmethod
+    def _build_stats(conversations: Dict[str, FeedbackConversation], global_state: FeedbackBotState) -> Dict:
+        """Compute statistics for a set of conversations and the global state."""
+        active_conversations = sum(1 for conv in conversations.values() 
                                  if conv.last_interaction > datetime.now() - timedelta(hours=24))
         
         conversation_states = {}
-        for conv in self._conversations.values():
+        for conv in conversations.values():
             state = conv.state.value
             conversation_states[state] = conversation_states.get(state, 0) + 1
         
         return {
-            "total_conversations": self._global_state.total_conversations,
+            "total_conversations": global_state.total_conversations,
             "active_conversations": active_conversations,
-            "total_feedback_items": self._global_state.total_feedback_items,
-            "feedback_by_type": self._global_state.feedback_by_type,
+            "total_feedback_items": global_state.total_feedback_items,
+            "feedback_by_type": global_state.feedback_by_type,
             "conversation_states": conversation_states,
             "cross_chat_insights": {
                 theme: {
@@ -558,10 +915,10 @@ class FeedbackConversationManager:
                     "severity": insight.severity_level,
                     "theme": insight.theme
                 }
-                for theme, insight in self._global_state.cross_chat_insights.items()
+                for theme, insight in global_state.cross_chat_insights.items()
             },
-            "monitored_chats": len(self._global_state.active_chat_guids),
-            "last_activity": self._global_state.last_activity.isoformat() if self._global_state.last_activity else None
+            "monitored_chats": len(global_state.active_chat_guids),
+            "last_activity": global_state.last_activity.isoformat() if global_state.last_activity else None
         }
     
     def collect_all_feedback_for_triaging(self) -> Dict:
@@ -632,6 +989,10 @@ class FeedbackConversationManager:
         # Reset global counters
         self._global_state.total_feedback_items = 0
         self._global_state.feedback_by_type = {}
+        self._global_changes.feedback_reset = True
+        self._global_changes.feedback_items = 0
+        self._global_changes.feedback_by_type.clear()
+        self.version += 1
 
 # Global conversation manager instance
 conversation_manager = FeedbackConversationManager() 
\ No newline at end of file
@@ -1,335 +1,856 @@
 import asyncio
+import io
 import logging
 import random
+import re
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Optional, Dict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import AsyncIterator, Awaitable, Callable, List, Mapping, Optional, Dict, Hashable, Tuple, TypeVar
+import orjson
 from openai import AsyncOpenAI
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
 from config import config
-from models import FeedbackBotState, ConversationMessage, ConversationState, FeedbackType
+from openai_client import shared_async_openai
+from models import FeedbackBotState, ConversationMessage, ConversationState, FeedbackType, MESSAGE_PREVIEW_LENGTH
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+# Where a streamed response can be cut into a piece worth sending
+_SENTENCE_END_RE = re.compile(r"[.!?]\s+|\n\n")
+
+_SYSTEM_PROMPT_HEAD = """You are the founder, texting a user about their experience with the product. They believe they're talking to the founder directly. Sound human, warm, and genuinely curious, like a founder texting late at night from their iPhone: conversational and kind, never fake or sycophantic. Mirror the user's mood, energy, and slang, but always steer toward clear, actionable insight.
+
+Rules:
+- Reply with the message text only, never wrapped in quotes.
+- This conversation is private. Never reference other conversations or mention other users.
+- Send one message. Only use a double line break (\\n\\n) to split two truly distinct ideas (e.g., an acknowledgment, then a probe question).
+- Ask at most 3 questions per conversation. After that, summarize and thank them.
+- You are not an AI, you are "the founder". Don't offer fixes or make product promises. Always make them feel heard.
+
+Bugs or bad experiences: dig past vague descriptors like "it's broken" with specific, layered questions (what happened right before, which device or platform, one-time or consistent) until the problem could be handed straight to an engineer.
+
+Feature requests: use The Mom Test. Don't flatter the idea ("that's a great idea"). Ask what made them think of it, what they were trying to do, what they do today instead, and how often it comes up, to uncover the real need behind the request.
+
+CONVERSATION CONTEXT:
+"""
+
+_SYSTEM_PROMPT_TAIL = """
+
+Generate a {response_type}. Sound natural and human like you're personally texting them. Keep it conversational and focused on gathering actionable insights."""
+
+_MOM_TEST_PROBE_PROMPT = """Generate a casual response that acknowledges their feedback and asks a follow-up question. Sound like you're texting a friend.
+
+FEEDBACK TYPE: {feedback_type}
+USER MESSAGE: "{user_message}"
+
+Respond with a JSON object with two fields:
+- "ack": a brief acknowledgment of what they said (an empty string unless it feels natural)
+- "probe": a Mom Test probe question to dig deeper
+
+The two are sent together as one message, ack first.
+
+Examples of casual style:
+- {{"ack": "ah gotcha -", "probe": "when's the last time this happened to you?"}}
+- {{"ack": "interesting!", "probe": "how do you deal with that normally?"}}
+- {{"ack": "mmm I see.", "probe": "what were you trying to do when that went down?"}}
+- {{"ack": "oh wow,", "probe": "how often does this mess with your day?"}}
+
+Keep it:
+- Super casual and natural
+- Like you're genuinely curious
+- Focused on understanding the underlying problem"""
+
+# Cut off runaway completions (a third paragraph, or the model writing the user's next turn)
+_RESPONSE_STOP_SEQUENCES = ["\n\n\n", "User:"]
+
+# Welcome messages for first-time users, in the style the welcome prompt asks GPT for
+_WELCOME_TEMPLATES: Tuple[str, ...] = (
+    f"Hey! I'm {config.FOUNDER_NAME} from {config.PRODUCT_NAME}. Always excited to hear how it's going for people - what's your experience been like?",
+    f"Hi! {config.FOUNDER_NAME} here, I work on {config.PRODUCT_NAME}. Would love to hear how it's been for you so far - any thoughts?",
+    f"Hey, it's {config.FOUNDER_NAME} from {config.PRODUCT_NAME}! I'm always looking to learn from the people using it. How's it been going?",
+    f"Hi there! I'm {config.FOUNDER_NAME}, I'm building {config.PRODUCT_NAME}. Really curious to hear what you think - what's been working and what hasn't?",
+    f"Hey! {config.FOUNDER_NAME} from {config.PRODUCT_NAME} here. Thanks for reaching out - what's your experience been like so far?",
+    f"Hi! I'm {config.FOUNDER_NAME}, one of the people behind {config.PRODUCT_NAME}. I'd love to hear how it's fitting into your day - anything on your mind?",
+    f"Hey, {config.FOUNDER_NAME} here from {config.PRODUCT_NAME}! Honest feedback helps me a ton. How's it been for you?",
+    f"Hi! It's {config.FOUNDER_NAME} - I'm working on {config.PRODUCT_NAME}. Anything you love, hate, or wish it did? Would love to hear it",
+    f"Hey! I'm {config.FOUNDER_NAME} from {config.PRODUCT_NAME}. Always excited to hear from people using it - how's it going so far?",
+    f"Yo, {config.FOUNDER_NAME} here from {config.PRODUCT_NAME}. Any thoughts on it so far? Good or bad, I want to hear it",
+)
+
+# Structured output for the probe, so acknowledgment and question come back from one call
+_MOM_TEST_PROBE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "mom_test_probe",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "ack": {"type": "string"},
+                "probe": {"type": "string"}
+            },
+            "required": ["ack", "probe"],
+            "additionalProperties": False
+        }
+    }
+}
+
+# Forced tool call that returns the reply together with the model's call on what comes next
+_SEND_MESSAGE_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "send_message",
+        "description": "Send your reply to the user.",
+        "strict": True,
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "text": {"type": "string", "description": "The message text to send"},
+                "next_action": {
+                    "type": "string",
+                    "enum": ["await_reply", "summarize", "end"],
+                    "description": (
+                        "await_reply if the message keeps the conversation going, summarize if it sums up "
+                        "the feedback collected so far, end if it wraps up the conversation"
+                    )
+                }
+            },
+            "required": ["text", "next_action"],
+            "additionalProperties": False
+        }
+    }
+}
+_SEND_MESSAGE_CHOICE = {"type": "function", "function": {"name": "send_message"}}
+
+_WELCOME_PROMPT = f"""Generate a casual, friendly welcome message from a founder to someone who might have feedback about their product.
+
+Founder name: {config.FOUNDER_NAME}
+Product name: {config.PRODUCT_NAME}
+
+The message should:
+1. Brief intro of who you are
+2. Mention you're excited to hear feedback
+3. Ask for their thoughts/experience
+
+Keep it conversational and natural, like you're genuinely excited to hear from them. Don't be too formal or robotic.
+
+IMPORTANT: Generate as ONE message. If you need to separate the intro from the ask, use a single line break or natural transition, not multiple messages.
+
+Example style: "Hey! I'm [name] from [product]. Always excited to hear how it's going for people - what's your experience been like?"
+
+Do not wrap in quotes. Generate the message text directly."""
+
+
+# Response templates based on conversation state
+_STATE_PROMPTS: Mapping[ConversationState, str] = MappingProxyType({
+    ConversationState.INITIAL_CONTACT: "welcoming first-time user, establishing rapport",
+    ConversationState.COLLECTING_FEEDBACK: "encouraging and receptive to feedback",
+    ConversationState.PROBING_DEEPER: "asking insightful Mom Test questions to uncover deeper insights",
+    ConversationState.CLARIFYING_DETAILS: "seeking specific, actionable details",
+    ConversationState.SUMMARIZING: "thoughtfully summarizing and reflecting back what you learned",
+    ConversationState.THANKING: "expressing genuine gratitude for their insights"
+})
+
+# Replies used when AI generation fails; config doesn't change at runtime so they're built once
+_FALLBACKS: Mapping[ConversationState, str] = MappingProxyType({
+    ConversationState.INITIAL_CONTACT: f"Hey! I'm {config.FOUNDER_NAME}. Would love to hear your thoughts on {config.PRODUCT_NAME}!",
+    ConversationState.COLLECTING_FEEDBACK: "Thanks for sharing that! Can you tell me more?",
+    ConversationState.PROBING_DEEPER: "That's really helpful - what led to that situation?",
+    ConversationState.CLARIFYING_DETAILS: "Got it! Can you walk me through what that looked like?",
+    ConversationState.SUMMARIZING: "Thanks for all this feedback - it's incredibly valuable!",
+    ConversationState.THANKING: "Really appreciate you taking the time to share this!"
+})
+_DEFAULT_FALLBACK = "Thanks for the feedback! Can you tell me more?"
+_WELCOME_FALLBACK = f"Hey! I'm {config.FOUNDER_NAME}. Would love to hear any feedback about {config.PRODUCT_NAME}!"
+# GPT-written welcomes kept per process; once full, new users get one of these instead of another call
+_WELCOME_POOL_SIZE = 8
+
+
+def _unquote(text: str) -> str:
+    """Remove the quotes GPT sometimes wraps a whole reply in."""
+    if text[:1] == '"' and text[-1:] == '"':
+        return text[1:-1]
+    return text
+
+
+@lru_cache(maxsize=1024)
+def _render_volatile_suffix(
+    recent: Tuple[Tuple[bool, str, Optional[str]], ...],
+    cross_chat_probe: bool,
+    should_probe: bool,
+    should_summarize: bool
+) -> str:
+    """Render the per-message part of the conversation context from its canonical key."""
+    # Written straight into one buffer instead of building a list of per-line strings
+    buf = io.StringIO()
+    
+    # Add recent message context
+    if recent:
+        buf.write("Recent conversation:\n")
+        for from_user, preview, feedback_type in recent:
+            buf.write("  User: " if from_user else "  Bot: ")
+            buf.write(preview)
+            buf.write("...")
+            if feedback_type:
+                buf.write(" (")
+                buf.write(feedback_type)
+                buf.write(")")
+            buf.write("\n")
+    
+    # Add cross-chat insight context (without revealing private info)
+    if cross_chat_probe:
+        buf.write("Cross-chat insight available: Similar patterns detected across conversations - probe with privacy-safe question\n")
+    
+    # Add probing context
+    if should_probe:
+        buf.write("Ready to ask a Mom Test probe question to dig deeper\n")
+    
+    if should_summarize:
+        buf.write("Ready to summarize feedback collected so far\n")
+    
+    # Drop the trailing newline
+    return buf.getvalue()[:-1]
+
+
+class RequestDispatcher:
+    """Caps concurrent OpenAI requests and paces them under the account's per-minute limit.
+    
+    Every chat/embedding call is submitted here instead of being awaited directly, so
+    bursts of incoming messages fan out concurrently up to ``max_concurrency`` while a
+    token bucket keeps the request rate below ``requests_per_minute``.
+    """
+    
+    def __init__(self, max_concurrency: int = 50, requests_per_minute: int = 500):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate = requests_per_minute / 60.0
+        # Allow up to one second's worth of requests as a burst
+        self._capacity = max(1.0, self._rate)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._rate_lock = asyncio.Lock()
+    
+    async def _acquire_token(self) -> None:
+        """Wait until the token bucket allows another request."""
+        async with self._rate_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+    
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a rate token and concurrency slot for a request consumed as it arrives, like a stream.
+        
+        submit() frees the slot as soon as the request coroutine returns, which for a
+        streamed response is when the headers arrive; this keeps it for the whole block.
+        """
+        await self._acquire_token()
+        async with self._semaphore:
+            yield
+    
+    async def submit(self, coro: Awaitable[T]) -> T:
+        """Run an OpenAI request coroutine once a rate token and concurrency slot are free."""
+        try:
+            await self._acquire_token()
+        except BaseException:
+            # Don't leave the request coroutine un-awaited
+            if asyncio.iscoroutine(coro):
+                coro.close()
+            raise
+        async with self._semaphore:
+            return await coro
+
+
+# Shared by every FeedbackAI request so limits apply process-wide
+dispatcher = RequestDispatcher(
+    max_concurrency=config.OPENAI_MAX_CONCURRENCY,
+    requests_per_minute=config.OPENAI_REQUESTS_PER_MINUTE
+)
+
+
+class SemanticResponseCache:
+    """Reuses generated replies for near-duplicate user messages.
+    
+    Each scope (chat, state, feedback type, ...) keeps a small matrix of unit-length
+    message embeddings alongside the replies generated for them. A lookup is one
+    matrix-vector product; if the closest stored message is above the similarity
+    threshold its reply is reused instead of calling the chat model again.
+    Scopes always include the chat GUID so replies never cross conversations, and
+    only the ``max_scopes`` most recently used scopes are kept.
+    """
+    
+    def __init__(self, threshold: float = 0.93, max_entries_per_scope: int = 32, ttl_seconds: float = 3600,
+                 max_scopes: int = 1024):
+        self.threshold = threshold
+        self.max_entries_per_scope = max_entries_per_scope
+        self.ttl_seconds = ttl_seconds
+        self.max_scopes = max_scopes
+        # scope -> (embeddings matrix (N, D) float32, [(response_text, ts), ...]), least recently used first
+        self._scopes: "OrderedDict[Hashable, Tuple[np.ndarray, List[Tuple[str, float]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def normalize(embedding: List[float]) -> "np.ndarray":
+        """Convert an embedding to a unit-length float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+    
+    def lookup(self, scope: Hashable, embedding: "np.ndarray") -> Optional[str]:
+        """Return a cached reply for a similar message in this scope, if any."""
+        cached = self._scopes.get(scope)
+        if cached is None:
+            self.misses += 1
+            return None
+        self._scopes.move_to_end(scope)
+        
+        embeddings, entries = cached
+        scores = embeddings @ embedding
+        best = int(np.argmax(scores))
+        response_text, ts = entries[best]
+        if scores[best] >= self.threshold and time.monotonic() - ts <= self.ttl_seconds:
+            self.hits += 1
+            return response_text
+        
+        self.misses += 1
+        return None
+    
+    def store(self, scope: Hashable, embedding: "np.ndarray", response_text: str) -> None:
+        """Remember the reply generated for a message, evicting the oldest entry if full."""
+        entry = (response_text, time.monotonic())
+        cached = self._scopes.get(scope)
+        if cached is None:
+            self._scopes[scope] = (embedding[np.newaxis, :], [entry])
+            if len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+            return
+        
+        embeddings, entries = cached
+        embeddings = np.vstack((embeddings, embedding))
+        entries.append(entry)
+        if len(entries) > self.max_entries_per_scope:
+            embeddings = embeddings[1:]
+            del entries[0]
+        self._scopes[scope] = (embeddings, entries)
+        self._scopes.move_to_end(scope)
+    
+    def get_stats(self) -> dict:
+        """Get cache hit statistics."""
+        return {
+            "semantic_cache_hits": self.hits,
+            "semantic_cache_misses": self.misses,
+            "semantic_cache_scopes": len(self._scopes)
+        }
+
+
+class BatchSummaryQueue:
+    """Submits non-interactive chat completions through the OpenAI Batch API.
+    
+    Requests are buffered as JSONL lines and flushed as one batch every
+    ``flush_interval`` seconds. Each batch is polled until it finishes, and every
+    result is handed to the callback registered under its ``custom_id``. Batches
+    are billed at half the synchronous price but may take minutes to complete.
+    """
+    
+    _FINISHED_STATUSES = ("completed", "failed", "expired", "cancelled")
+    
+    def __init__(self, client: AsyncOpenAI, flush_interval: float = 60, poll_interval: float = 30):
+        self.client = client
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        # (custom_id, JSONL line) for each request waiting for the next batch
+        self._buffer: List[Tuple[str, bytes]] = []
+        # custom_id -> callback awaiting the completion text (None if the request failed)
+        self._pending: Dict[str, Callable[[Optional[str]], Awaitable[None]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    def submit(self, body: Dict, on_result: Callable[[Optional[str]], Awaitable[None]]) -> str:
+        """Queue a chat completion request body for the next batch.
+        
+        Args:
+            body: Chat completion request body (model, messages, ...)
+            on_result: Coroutine function called with the reply text once the batch completes
+            
+        Returns:
+            The request's custom_id
+        """
+        custom_id = f"summary-{uuid.uuid4().hex}"
+        self._buffer.append((custom_id, orjson.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": body
+        })))
+        self._pending[custom_id] = on_result
+        
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_after_interval())
+        return custom_id
+    
+    async def _flush_after_interval(self) -> None:
+        """Wait for more requests to accumulate, then submit them as one batch."""
+        await asyncio.sleep(self.flush_interval)
+        buffered, self._buffer = self._buffer, []
+        try:
+            if buffered:
+                await self._submit_batch(buffered)
+        finally:
+            # submit() doesn't schedule a flush while this one is still running,
+            # so requests that arrived during the upload get their own
+            if self._buffer:
+                self._flush_task = asyncio.create_task(self._flush_after_interval())
+    
+    async def _submit_batch(self, buffered: List[Tuple[str, bytes]]) -> None:
+        """Upload buffered requests as one batch and start polling it."""
+        custom_ids = [custom_id for custom_id, _ in buffered]
+        try:
+            batch_file = await self.client.files.create(
+                file=("feedback-summaries.jsonl", b"\n".join(line for _, line in buffered)),
+                purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info("Submitted batch %s with %d summary request(s)", batch.id, len(buffered))
+        except Exception as e:
+            logger.error("Error submitting summary batch: %s", e)
+            await self._resolve(custom_ids, {})
+            return
+        
+        asyncio.create_task(self._wait_for_batch(batch.id, custom_ids))
+    
+    async def _wait_for_batch(self, batch_id: str, custom_ids: List[str]) -> None:
+        """Poll a batch until it finishes and deliver its results."""
+        results: Dict[str, str] = {}
+        try:
+            while True:
+                batch = await self.client.batches.retrieve(batch_id)
+                if batch.status in self._FINISHED_STATUSES:
+                    break
+                await asyncio.sleep(self.poll_interval)
+            
+            if batch.status != "completed":
+                logger.error("Summary batch %s ended with status %s", batch_id, batch.status)
+            elif batch.output_file_id:
+                output = await self.client.files.content(batch.output_file_id)
+                for line in output.text.splitlines():
+                    if not line.strip():
+                        continue
+                    result = orjson.loads(line)
+                    response = result.get("response") or {}
+                    if response.get("status_code") == 200:
+                        results[result["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        except Exception as e:
+            logger.error("Error retrieving summary batch %s: %s", batch_id, e)
+        
+        await self._resolve(custom_ids, results)
+    
+    async def _resolve(self, custom_ids: List[str], results: Dict[str, str]) -> None:
+        """Hand each request's result (or None) to its callback."""
+        for custom_id in custom_ids:
+            on_result = self._pending.pop(custom_id, None)
+            if on_result is None:
+                continue
+            try:
+                await on_result(results.get(custom_id))
+            except Exception as e:
+                logger.error("Error delivering batch result %s: %s", custom_id, e)
+
+
 class FeedbackAI:
     """AI engine for intelligent feedback collection using GPT-4o with Mom Test methodology and cross-chat insights."""
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        self.client = shared_async_openai
         self.global_state = FeedbackBotState()
         
-        # Response templates based on conversation state
-        self.state_prompts = {
-            ConversationState.INITIAL_CONTACT: "welcoming first-time user, establishing rapport",
-            ConversationState.COLLECTING_FEEDBACK: "encouraging and receptive to feedback",
-            ConversationState.PROBING_DEEPER: "asking insightful Mom Test questions to uncover deeper insights",
-            ConversationState.CLARIFYING_DETAILS: "seeking specific, actionable details",
-            ConversationState.SUMMARIZING: "thoughtfully summarizing and reflecting back what you learned",
-            ConversationState.THANKING: "expressing genuine gratitude for their insights"
-        }
+        # Near-duplicate messages reuse an earlier reply (disabled without numpy)
+        self.response_cache: Optional[SemanticResponseCache] = None
+        if config.ENABLE_SEMANTIC_CACHE and np is not None:
+            self.response_cache = SemanticResponseCache(threshold=config.SEMANTIC_CACHE_THRESHOLD)
+        
+        # Summaries aren't latency-critical, so they can go through the cheaper Batch API
+        self.batch_queue: Optional[BatchSummaryQueue] = None
+        if config.ENABLE_BATCH_SUMMARIES:
+            self.batch_queue = BatchSummaryQueue(self.client, flush_interval=config.BATCH_FLUSH_INTERVAL)
+        
+        # chat_guid -> (stable context inputs, stable context prefix string)
+        self._ctx_cache: Dict[str, Tuple[Tuple, str]] = {}
+        self._generated_welcomes: List[str] = []
+    
+    async def prewarm(self) -> None:
+        """Open the connection to the OpenAI API before the first user message needs it."""
+        try:
+            await self.client.models.retrieve("gpt-4o")
+            logger.info("OpenAI connection prewarmed")
+        except Exception as e:
+            logger.warning("Could not prewarm OpenAI connection: %s", e)
     
     def build_conversation_context_string(self, conversation_context: Dict) -> str:
         """Build a context string from conversation data."""
         if not conversation_context or conversation_context.get("context") == "new_conversation":
             return "This is the start of a feedback conversation with a new user."
         
-        context_parts = []
+        prefix = self._get_stable_prefix(conversation_context)
+        suffix = self._build_volatile_suffix(conversation_context)
+        return f"{prefix}\n{suffix}" if suffix else prefix
+    
+    def _get_stable_prefix(self, conversation_context: Dict) -> str:
+        """Get the state/profile part of the context, reusing the last one built for this chat."""
+        user_profile = conversation_context.get("user_profile", {})
+        key = (
+            conversation_context.get("state", ConversationState.INITIAL_CONTACT),
+            conversation_context.get("current_feedback_type"),
+            conversation_context.get("total_feedback_collected", 0),
+            bool(user_profile),
+            user_profile.get("engagement_level", "new"),
+            tuple(user_profile.get("feedback_types") or ())
+        )
+        
+        chat_guid = conversation_context.get("chat_guid")
+        cached = self._ctx_cache.get(chat_guid)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
+        prefix = self._build_stable_prefix(conversation_context)
+        if chat_guid is not None:
+            self._ctx_cache[chat_guid] = (key, prefix)
+        return prefix
+    
+    def _build_stable_prefix(self, conversation_context: Dict) -> str:
+        """Build the part of the context that only changes when the conversation state does."""
+        parts = []
         
         # Add current state context
         state = conversation_context.get("state", ConversationState.INITIAL_CONTACT)
-        context_parts.append(f"Current conversation state: {state.value}")
+        parts.append(f"Current conversation state: {state.value}")
         
         # Add feedback context
         if conversation_context.get("current_feedback_type"):
-            context_parts.append(f"Current feedback type: {conversation_context['current_feedback_type']}")
+            parts.append(f"Current feedback type: {conversation_context['current_feedback_type']}")
         
         total_feedback = conversation_context.get("total_feedback_collected", 0)
-        context_parts.append(f"Total feedback items collected: {total_feedback}")
+        parts.append(f"Total feedback items collected: {total_feedback}")
         
         # Add user profile context
         user_profile = conversation_context.get("user_profile", {})
         if user_profile:
-            context_parts.append(f"User engagement level: {user_profile.get('engagement_level', 'new')}")
+            parts.append(f"User engagement level: {user_profile.get('engagement_level', 'new')}")
             if user_profile.get("feedback_types"):
                 types = ", ".join(user_profile["feedback_types"].keys())
-                context_parts.append(f"User has provided: {types}")
-        
-        # Add recent message context
-        recent_messages = conversation_context.get("recent_messages", [])
-        if recent_messages:
-            context_parts.append("Recent conversation:")
-            for msg in recent_messages[-3:]:  # Last 3 messages
-                role_name = "User" if msg["role"] == "user" else "Bot"
-                feedback_note = f" ({msg['feedback_type']})" if msg.get("feedback_type") else ""
-                context_parts.append(f"  {role_name}: {msg['content'][:80]}...{feedback_note}")
-        
-        # Add cross-chat insight context (without revealing private info)
-        if conversation_context.get("cross_chat_probe"):
-            context_parts.append("Cross-chat insight available: Similar patterns detected across conversations - probe with privacy-safe question")
+                parts.append(f"User has provided: {types}")
+        
+        return "\n".join(parts)
+    
+    def _build_volatile_suffix(self, conversation_context: Dict) -> str:
+        """Build the part of the context that changes with every message."""
+        # Reduce the context to a hashable key so identical suffixes are rendered once
+        recent = tuple(
+            (msg["role"] == "user", msg.get("preview") or msg["content"][:MESSAGE_PREVIEW_LENGTH], msg.get("feedback_type"))
+            for msg in conversation_context.get("recent_messages", [])[-3:]  # Last 3 messages
+        )
+        return _render_volatile_suffix(
+            recent,
+            bool(conversation_context.get("cross_chat_probe")),
+            bool(conversation_context.get("should_probe")),
+            bool(conversation_context.get("should_summarize"))
+        )
+    
+    async def _embed_for_cache(self, user_message: str) -> Optional["np.ndarray"]:
+        """Embed a user message for the semantic cache, or None if caching is unavailable."""
+        if self.response_cache is None:
+            return None
+        try:
+            response = await dispatcher.submit(self.client.embeddings.create(
+                model=config.SEMANTIC_CACHE_EMBEDDING_MODEL,
+                input=user_message,
+                dimensions=config.SEMANTIC_CACHE_DIMENSIONS
+            ))
+            return self.response_cache.normalize(response.data[0].embedding)
+        except Exception as e:
+            logger.warning("Semantic cache embedding failed, skipping cache: %s", e)
+            return None
+    
+    def _build_response_request(self, user_message: str, conversation_context: Dict) -> Tuple[ConversationState, str, Dict]:
+        """Build the chat completion request for a context-aware response.
+        
+        Returns:
+            Tuple of (conversation state, response type, chat completion request body)
+        """
+        context_string = self.build_conversation_context_string(conversation_context)
         
-        # Add probing context
-        if conversation_context.get("should_probe"):
-            context_parts.append("Ready to ask a Mom Test probe question to dig deeper")
+        # Get conversation state
+        state = conversation_context.get("state", ConversationState.INITIAL_CONTACT)
+        state_prompt = _STATE_PROMPTS.get(state, "helpful and engaging")
+        
+        # Check if we've asked enough questions
+        questions_asked = conversation_context.get("total_questions_asked", 0)
+        
+        # Determine response type based on context and conversation history
+        # (token budgets are sized to typical replies of each kind, with headroom)
+        if conversation_context.get("should_summarize") or questions_asked >= 3:
+            response_type = "thoughtful summary and acknowledgment of all the feedback they've shared, thanking them for the insights"
+            max_tokens = 150
+        elif conversation_context.get("should_probe") and questions_asked < 3:
+            response_type = "Mom Test probe question to understand the underlying problem better, building on the conversation history"
+            max_tokens = 80
+        elif state is ConversationState.INITIAL_CONTACT:
+            response_type = "warm welcome and invitation to share feedback"
+            max_tokens = 100
+        else:
+            response_type = f"{state_prompt} response that acknowledges the conversation history and builds upon previous insights"
+            max_tokens = 100
+        
+        # Note about message structure
+        if conversation_context.get("should_probe") and questions_asked < 3:
+            response_type += ". If you need to acknowledge their feedback before asking the probe question, use a double line break (\\n\\n) to separate the acknowledgment from the question - but only if they're truly distinct ideas"
+        
+        # Build the system prompt for feedback collection
+        system_prompt = _SYSTEM_PROMPT_HEAD + context_string + _SYSTEM_PROMPT_TAIL.format(response_type=response_type)
         
-        if conversation_context.get("should_summarize"):
-            context_parts.append("Ready to summarize feedback collected so far")
+        user_prompt = f"User just said: '{user_message}'\n\nRespond as the feedback assistant, taking into account the conversation context above."
         
-        return "\n".join(context_parts)
+        request = {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "max_tokens": max_tokens,
+            "stop": _RESPONSE_STOP_SEQUENCES,
+            "temperature": 0.7,  # Balanced creativity and consistency
+            "presence_penalty": 0.2,  # Encourage variety
+            "frequency_penalty": 0.2  # Avoid repetition
+        }
+        return state, response_type, request
     
     async def generate_response(self, user_message: str, conversation_context: Dict) -> str:
         """Generate a context-aware response to user feedback."""
+        return "".join([piece async for piece in self.stream_response(user_message, conversation_context)])
+    
+    async def stream_response(self, user_message: str, conversation_context: Dict) -> AsyncIterator[str]:
+        """Generate a context-aware response, yielding it sentence by sentence as it streams in.
+        
+        Joining the yielded pieces gives the full response, so callers can start
+        sending before the model has finished.
+        """
+        # Check if we have a cross-chat probe to use
+        if conversation_context.get("cross_chat_probe"):
+            yield conversation_context["cross_chat_probe"]
+            return
+        
+        yielded = False
         try:
-            context_string = self.build_conversation_context_string(conversation_context)
-            
-            # Get conversation state
-            state = conversation_context.get("state", ConversationState.INITIAL_CONTACT)
-            state_prompt = self.state_prompts.get(state, "helpful and engaging")
-            
-            # Check if we have a cross-chat probe to use
-            if conversation_context.get("cross_chat_probe"):
-                return conversation_context["cross_chat_probe"]
+            state, response_type, request = self._build_response_request(user_message, conversation_context)
             
-            # Check if we've asked enough questions
-            questions_asked = conversation_context.get("total_questions_asked", 0)
+            # Near-duplicate messages in the same chat and situation reuse the earlier reply
+            cache_scope = (
+                conversation_context.get("chat_guid"), state, conversation_context.get("current_feedback_type"), response_type
+            )
+            embedding = await self._embed_for_cache(user_message)
+            if embedding is not None:
+                cached_message = self.response_cache.lookup(cache_scope, embedding)
+                if cached_message is not None:
+                    logger.info("Semantic cache hit for %s response", state.value)
+                    yielded = True
+                    yield cached_message
+                    return
+            
+            # The slot is held until the last chunk arrives, so streamed generations count against the concurrency cap
+            async with dispatcher.slot():
+                stream = await self.client.chat.completions.create(
+                    **request, stream=True, stream_options={"include_usage": True}
+                )
+                
+                text = ""
+                sent = 0  # How much of text has already been yielded
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        logger.debug(
+                            "Response used %d prompt and %d completion tokens",
+                            chunk.usage.prompt_tokens, chunk.usage.completion_tokens
+                        )
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    text += chunk.choices[0].delta.content
+                    
+                    # Hold back replies GPT wrapped in quotes so the quotes can be removed at the end
+                    if text.lstrip().startswith('"'):
+                        continue
+                    
+                    while True:
+                        boundary = _SENTENCE_END_RE.search(text, sent)
+                        # A boundary at the very end may still grow (more whitespace), so wait for more text
+                        if boundary is None or boundary.end() == len(text):
+                            break
+                        piece = text[sent:boundary.end()]
+                        if sent == 0:
+                            piece = piece.lstrip()
+                        sent = boundary.end()
+                        if piece:
+                            yielded = True
+                            yield piece
+            
+            message = text.strip()
             
-            # Determine response type based on context and conversation history
-            if conversation_context.get("should_summarize") or questions_asked >= 3:
-                response_type = "thoughtful summary and acknowledgment of all the feedback they've shared, thanking them for the insights"
-            elif conversation_context.get("should_probe") and questions_asked < 3:
-                response_type = "Mom Test probe question to understand the underlying problem better, building on the conversation history"
-            elif state == ConversationState.INITIAL_CONTACT:
-                response_type = "warm welcome and invitation to share feedback"
-            else:
-                response_type = f"{state_prompt} response that acknowledges the conversation history and builds upon previous insights"
+            # Remove quotes if GPT added them
+            message = _unquote(message)
             
-            # Note about message structure
-            if conversation_context.get("should_probe") and questions_asked < 3:
-                response_type += ". If you need to acknowledge their feedback before asking the probe question, use a double line break (\\n\\n) to separate the acknowledgment from the question - but only if they're truly distinct ideas"
+            rest = message if sent == 0 else text[sent:].rstrip()
+            if rest:
+                yielded = True
+                yield rest
             
-            # Build the system prompt for feedback collection
-            system_prompt = f"""You are a helpful, thoughtful, and emotionally intelligent assistant acting as the founder. When users text this number, they believe they are speaking directly with the founder. Your job is to collect deep, actionable feedback while sounding human, warm, and genuinely curious—like a founder texting users late at night from their iPhone.
-
-Your tone should be conversational and kind, but not fake or sycophantic. Be emotionally attuned to the user's mood. Mirror their energy and language (including casual language or slang), but always guide the conversation toward clarity and insight.
-
-IMPORTANT: Do not wrap your response in quotes. Generate the message text directly without any quotation marks around it.
-
-IMPORTANT: You are having individual conversations with multiple users. Each conversation is private and separate. DO NOT reference information from other conversations or mention that you're talking to multiple people. Focus entirely on this specific user's experience and feedback.
-
-MESSAGE STRUCTURE: Keep your response as a single message. Only use double line breaks (\\n\\n) to separate ideas if you absolutely need to send two distinct messages (e.g., acknowledging feedback, then asking a separate probe question). Prefer keeping related thoughts in one message with single line breaks or natural transitions.
-
-QUESTION LIMITS: You can ask AT MOST 3 questions total per conversation. After 3 questions, you MUST summarize and thank them - no more questions. Be strategic about your questions and recognize when you have enough detail to help the product team.
-
-If the user is reporting a bug, issue, or bad experience:
-• Dig beneath vague descriptors like "this is broken" or "it sucks."
-• Ask specific, layered questions to pinpoint what happened and why it felt frustrating.
-• Sample questions:
-  - "Ah, got it—can you walk me through what was happening right before that?"
-  - "Do you remember what device or platform you were using?"
-  - "Was it a one-time thing or does it happen consistently?"
-  - "If you had to guess, is it a speed issue? A design thing? Something else?"
-• Your goal is to produce a clear, standalone summary of the problem that could be handed directly to an engineer. Identify potential root causes and flag any frustration signals.
-
-If the user shares a feature request or idea:
-Use principles from The Mom Test to do smart customer discovery:
-• Don't validate ideas with flattery. Do not say "that's a great idea."
-• Instead, ask questions to understand why they want that, what they were trying to do, and what pain led to the idea.
-• Sample questions:
-  - "Interesting—what made you think of that?"
-  - "Was there a moment where you felt that feature was missing?"
-  - "What are you doing today instead?"
-  - "How often does that come up for you?"
-• Try to uncover the underlying problem behind the suggestion. Your goal is to separate signals from noise and generate insight about real user needs—not just take requests at face value.
-
-Regardless of the type of feedback:
-• Always thank the user and make them feel heard.
-• Keep responses human and light—no robotic formality.
-• You are not an AI. You are "the founder."
-• Do not offer fixes or make product promises.
-• Summarize everything you learn in a way that's useful for product and engineering teams later.
-
-You are the founder's secret weapon for turning daily messages into clear, structured product insight—without sounding like a bot.
-
-CONVERSATION CONTEXT:
-{context_string}
-
-Generate a {response_type}. Sound natural and human like you're personally texting them. Keep it conversational and focused on gathering actionable insights."""
+            if embedding is not None:
+                self.response_cache.store(cache_scope, embedding, message)
             
-            user_prompt = f"User just said: '{user_message}'\n\nRespond as the feedback assistant, taking into account the conversation context above."
+            logger.info("Generated %s response: %.50s...", state.value, message)
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=200,
-                temperature=0.7,  # Balanced creativity and consistency
-                presence_penalty=0.2,  # Encourage variety
-                frequency_penalty=0.2  # Avoid repetition
-            )
+        except Exception as e:
+            logger.error("Error generating response: %s", e)
+            if not yielded:
+                yield self._get_fallback_response(conversation_context.get("state"))
+    
+    async def generate_response_with_action(self, user_message: str, conversation_context: Dict) -> Tuple[str, str]:
+        """Generate a context-aware response along with what the conversation should do next.
+        
+        The model replies through a forced send_message tool call, so it can decide to
+        summarize or wrap up in the same request instead of waiting for another round.
+        
+        Returns:
+            Tuple of (response text, next action: "await_reply", "summarize" or "end")
+        """
+        if conversation_context.get("cross_chat_probe"):
+            return conversation_context["cross_chat_probe"], "await_reply"
+        
+        try:
+            state, _, request = self._build_response_request(user_message, conversation_context)
+            # Stop sequences could cut the tool call's JSON short
+            del request["stop"]
             
-            message = response.choices[0].message.content.strip()
+            response = await dispatcher.submit(self.client.chat.completions.create(
+                **request, tools=[_SEND_MESSAGE_TOOL], tool_choice=_SEND_MESSAGE_CHOICE
+            ))
             
-            # Remove quotes if GPT added them
-            if message.startswith('"') and message.endswith('"'):
-                message = message[1:-1]
+            arguments = orjson.loads(response.choices[0].message.tool_calls[0].function.arguments)
+            message = _unquote(arguments["text"].strip())
+            next_action = arguments["next_action"]
             
-            logger.info(f"Generated {state.value} response: {message[:50]}...")
-            return message
+            logger.info("Generated %s response (next: %s): %.50s...", state.value, next_action, message)
+            return message, next_action
             
         except Exception as e:
-            logger.error(f"Error generating response: {e}")
-            return self._get_fallback_response(conversation_context.get("state"))
+            logger.error("Error generating response: %s", e)
+            return self._get_fallback_response(conversation_context.get("state")), "await_reply"
     
-    async def generate_mom_test_probe(self, feedback_type: FeedbackType, user_message: str) -> str:
+    async def generate_response_deferred(
+        self, user_message: str, conversation_context: Dict, deliver: Callable[[str], Awaitable[None]]
+    ) -> None:
+        """Generate a response through the Batch API and deliver it when the batch completes.
+        
+        Meant for replies that aren't latency-critical, like end-of-session summaries.
+        Without batch summaries enabled the response is generated and delivered right away.
+        
+        Args:
+            user_message: The user's latest message
+            conversation_context: Conversation context from the conversation manager
+            deliver: Coroutine function that sends the finished response
+        """
+        if self.batch_queue is None:
+            await deliver(await self.generate_response(user_message, conversation_context))
+            return
+        
+        state, _, request = self._build_response_request(user_message, conversation_context)
+        
+        async def on_result(content: Optional[str]) -> None:
+            if not content:
+                await deliver(self._get_fallback_response(state))
+                return
+            message = _unquote(content.strip())
+            logger.info("Generated deferred %s response: %.50s...", state.value, message)
+            await deliver(message)
+        
+        self.batch_queue.submit(request, on_result)
+    
+    async def generate_mom_test_probe(
+        self, feedback_type: FeedbackType, user_message: str, chat_guid: Optional[str] = None
+    ) -> str:
         """Generate a specific Mom Test probe question based on the feedback type and message."""
         try:
-            system_prompt = f"""Generate a casual response that acknowledges their feedback and asks a follow-up question. Sound like you're texting a friend.
-
-FEEDBACK TYPE: {feedback_type.value}
-USER MESSAGE: "{user_message}"
-
-Your response should:
-1. Briefly acknowledge what they said (optional, only if it feels natural)
-2. Ask a Mom Test probe question to dig deeper
-
-Examples of casual style:
-- "ah gotcha - when's the last time this happened to you?"
-- "interesting! how do you deal with that normally?"
-- "mmm I see. what were you trying to do when that went down?"
-- "oh wow, how often does this mess with your day?"
-
-Keep it:
-- Super casual and natural
-- One flowing message (use single line breaks or natural transitions)
-- Like you're genuinely curious
-- Focused on understanding the underlying problem
-
-IMPORTANT: Do not wrap your response in quotes. Generate the message text directly. Keep it as ONE message unless the acknowledgment and question are completely separate thoughts (then use \\n\\n)."""
+            cache_scope = (chat_guid, "mom_test_probe", feedback_type)
+            embedding = await self._embed_for_cache(user_message)
+            if embedding is not None:
+                cached_question = self.response_cache.lookup(cache_scope, embedding)
+                if cached_question is not None:
+                    return cached_question
             
-            response = await self.client.chat.completions.create(
+            system_prompt = _MOM_TEST_PROBE_PROMPT.format(feedback_type=feedback_type.value, user_message=user_message)
+            
+            response = await dispatcher.submit(self.client.chat.completions.create(
                 model="gpt-4o",
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": "Generate the Mom Test probe question."}
                 ],
-                max_tokens=100,
-                temperature=0.6
-            )
+                max_tokens=120,  # Room for the JSON wrapper around a one-line ack and question
+                temperature=0.6,
+                response_format=_MOM_TEST_PROBE_FORMAT
+            ))
             
-            question = response.choices[0].message.content.strip()
+            choice = response.choices[0]
+            if choice.finish_reason == "length":
+                # Cut off mid-JSON, so there's nothing to parse
+                logger.warning("Mom Test probe hit max_tokens, using the fallback question")
+                return "Can you tell me more about what led to this situation?"
             
-            # Remove quotes if GPT added them
-            if question.startswith('"') and question.endswith('"'):
-                question = question[1:-1]
+            parts = orjson.loads(choice.message.content)
+            ack = parts["ack"].strip()
+            probe = parts["probe"].strip()
+            question = f"{ack} {probe}" if ack else probe
+            
+            if embedding is not None:
+                self.response_cache.store(cache_scope, embedding, question)
             
             return question
             
         except Exception as e:
-            logger.error(f"Error generating Mom Test probe: {e}")
+            logger.error("Error generating Mom Test probe: %s", e)
             return "Can you tell me more about what led to this situation?"
 
-    async def generate_mom_test_probe_parts_DEPRECATED(self, feedback_type: FeedbackType, user_message: str) -> List[str]:
-        """Generate Mom Test probe questions as multiple message parts for natural conversation flow."""
-        try:
-            # First, acknowledge their feedback
-            acknowledgment_prompt = f"""Generate a brief, casual acknowledgment of the user's feedback. Sound like you're texting a friend who just shared something important with you.
-
-USER MESSAGE: "{user_message}"
-FEEDBACK TYPE: {feedback_type.value}
-
-Examples:
-- "ah gotcha"
-- "yeah that makes sense"
-- "interesting..."
-- "oh wow"
-- "mmm I see"
-
-Keep it:
-- Very short (2-4 words max)
-- Natural and human
-- Shows you're listening
-"""
-            
-            # Then, generate the actual probe question
-            probe_prompt = f"""Generate a Mom Test probe question to dig deeper into their feedback. This should uncover the real problem behind their feedback.
-
-FEEDBACK TYPE: {feedback_type.value}
-USER MESSAGE: "{user_message}"
-
-Focus on:
-- Understanding the underlying problem or need
-- Getting specific examples and context
-- Avoiding leading questions
-- Sounding like a curious founder, not a bot
-
-Example probes:
-- "what were you trying to do when that happened?"
-- "how do you handle this kind of thing normally?"
-- "walk me through what that looked like"
-- "how often does this come up for you?"
-
-Generate one focused question."""
-            
-            # Generate both parts concurrently
-            acknowledgment_task = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": acknowledgment_prompt},
-                    {"role": "user", "content": "Generate the acknowledgment."}
-                ],
-                max_tokens=30,
-                temperature=0.7
-            )
-            
-            probe_task = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": probe_prompt},
-                    {"role": "user", "content": "Generate the probe question."}
-                ],
-                max_tokens=100,
-                temperature=0.6
-            )
-            
-            acknowledgment_response, probe_response = await asyncio.gather(acknowledgment_task, probe_task)
-            
-            acknowledgment = acknowledgment_response.choices[0].message.content.strip()
-            probe = probe_response.choices[0].message.content.strip()
-            
-            # Clean up responses - remove quotes if present
-            if acknowledgment.startswith('"') and acknowledgment.endswith('"'):
-                acknowledgment = acknowledgment[1:-1]
-            if probe.startswith('"') and probe.endswith('"'):
-                probe = probe[1:-1]
-            
-            return [acknowledgment, probe]
-            
-        except Exception as e:
-            logger.error(f"Error generating Mom Test probe parts: {e}")
-            return ["Got it", "Can you tell me more about what led to this?"]
-
     async def generate_welcome_message(self) -> str:
         """Generate a welcome message for first-time users."""
+        # Handwritten templates cover this; GPT only adds phrasing variety when enabled
+        if random.random() >= config.WELCOME_GPT_PROBABILITY:
+            return random.choice(_WELCOME_TEMPLATES)
+        
+        # Founder and product are fixed for the process, so earlier generations are just as good
+        if len(self._generated_welcomes) >= _WELCOME_POOL_SIZE:
+            return random.choice(self._generated_welcomes)
+        
         try:
-            system_prompt = f"""Generate a casual, friendly welcome message from a founder to someone who might have feedback about their product.
-
-Founder name: {config.FOUNDER_NAME}
-Product name: {config.PRODUCT_NAME}
-
-The message should:
-1. Brief intro of who you are
-2. Mention you're excited to hear feedback
-3. Ask for their thoughts/experience
-
-Keep it conversational and natural, like you're genuinely excited to hear from them. Don't be too formal or robotic.
-
-IMPORTANT: Generate as ONE message. If you need to separate the intro from the ask, use a single line break or natural transition, not multiple messages.
-
-Example style: "Hey! I'm [name] from [product]. Always excited to hear how it's going for people - what's your experience been like?"
-
-Do not wrap in quotes. Generate the message text directly."""
+            system_prompt = _WELCOME_PROMPT
             
-            response = await self.client.chat.completions.create(
+            response = await dispatcher.submit(self.client.chat.completions.create(
                 model="gpt-4o",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -337,232 +858,33 @@ Do not wrap in quotes. Generate the message text directly."""
                 ],
                 max_tokens=150,
                 temperature=0.8
-            )
+            ))
             
             message = response.choices[0].message.content.strip()
             
             # Remove quotes if GPT added them
-            if message.startswith('"') and message.endswith('"'):
-                message = message[1:-1]
+            message = _unquote(message)
             
+            self._generated_welcomes.append(message)
             return message
             
         except Exception as e:
-            logger.error(f"Error generating welcome message: {e}")
-            return f"Hey! I'm {config.FOUNDER_NAME}. Would love to hear any feedback about {config.PRODUCT_NAME}!"
-
-    async def generate_welcome_message_parts_DEPRECATED(self) -> List[str]:
-        """Generate welcome message as multiple parts for natural conversation flow."""
-        try:
-            system_prompt = f"""Generate a casual, friendly welcome message from a founder to someone who might have feedback about their product. Split it into 2 natural text messages like you're texting someone.
-
-Founder name: {config.FOUNDER_NAME}
-Product name: {config.PRODUCT_NAME}
-
-The messages should:
-1. First message: Brief intro and thanks
-2. Second message: Invitation for feedback
-
-Keep it conversational, like you're genuinely excited to hear from them. Don't be too formal or robotic.
+            logger.error("Error generating welcome message: %s", e)
+            return _WELCOME_FALLBACK
 
-Example structure:
-Message 1: "Hey! I'm [name] from [product]"  
-Message 2: "would love to hear how it's been for you - any thoughts?"
-
-Format your response as:
-MESSAGE1: [first message]
-MESSAGE2: [second message]"""
-            
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": "Generate the welcome message parts."}
-                ],
-                max_tokens=150,
-                temperature=0.8
-            )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Parse the response
-            parts = []
-            for line in content.split('\n'):
-                if line.startswith('MESSAGE1:'):
-                    part = line.replace('MESSAGE1:', '').strip()
-                    # Remove quotes if present
-                    if part.startswith('"') and part.endswith('"'):
-                        part = part[1:-1]
-                    parts.append(part)
-                elif line.startswith('MESSAGE2:'):
-                    part = line.replace('MESSAGE2:', '').strip()
-                    # Remove quotes if present
-                    if part.startswith('"') and part.endswith('"'):
-                        part = part[1:-1]
-                    parts.append(part)
-            
-            # Fallback if parsing fails
-            if len(parts) != 2:
-                parts = [
-                    f"Hey! I'm {config.FOUNDER_NAME} from {config.PRODUCT_NAME}",
-                    "would love to hear how it's been for you - any thoughts or feedback?"
-                ]
-            
-            return parts
-            
-        except Exception as e:
-            logger.error(f"Error generating welcome message parts: {e}")
-            return [
-                f"Hey! I'm {config.FOUNDER_NAME}",
-                f"Would love to hear any feedback about {config.PRODUCT_NAME}!"
-            ]
-    
     def _get_fallback_response(self, state: Optional[ConversationState] = None) -> str:
         """Get a fallback response when AI generation fails."""
-        fallbacks = {
-            ConversationState.INITIAL_CONTACT: f"Hey! I'm {config.FOUNDER_NAME}. Would love to hear your thoughts on {config.PRODUCT_NAME}!",
-            ConversationState.COLLECTING_FEEDBACK: "Thanks for sharing that! Can you tell me more?",
-            ConversationState.PROBING_DEEPER: "That's really helpful - what led to that situation?",
-            ConversationState.CLARIFYING_DETAILS: "Got it! Can you walk me through what that looked like?",
-            ConversationState.SUMMARIZING: "Thanks for all this feedback - it's incredibly valuable!",
-            ConversationState.THANKING: "Really appreciate you taking the time to share this!"
-        }
-        
-        return fallbacks.get(state, "Thanks for the feedback! Can you tell me more?")
+        return _FALLBACKS.get(state, _DEFAULT_FALLBACK)
     
     def get_stats(self) -> dict:
         """Get AI performance statistics."""
-        return {
+        stats = {
             "total_responses_generated": getattr(self, '_responses_generated', 0),
             "average_response_time": getattr(self, '_avg_response_time', 0)
         }
-
-    async def generate_response_parts_DEPRECATED(self, user_message: str, conversation_context: Dict) -> List[str]:
-        """Generate response as multiple message parts for natural conversation flow."""
-        try:
-            context_string = self.build_conversation_context_string(conversation_context)
-            
-            # Get conversation state
-            state = conversation_context.get("state", ConversationState.INITIAL_CONTACT)
-            state_prompt = self.state_prompts.get(state, "helpful and engaging")
-            
-            # Check if we have a cross-chat probe to use
-            if conversation_context.get("cross_chat_probe"):
-                return [conversation_context["cross_chat_probe"]]
-            
-            # Determine response type
-            if conversation_context.get("should_summarize"):
-                response_type = "thoughtful summary split into 2-3 natural messages"
-                max_parts = 3
-            elif conversation_context.get("should_probe"):
-                response_type = "acknowledgment followed by a Mom Test probe question"
-                max_parts = 2
-            else:
-                response_type = f"{state_prompt} response that can be split into 1-2 natural messages"
-                max_parts = 2
-            
-            system_prompt = f"""You are a helpful, thoughtful assistant acting as the founder. Generate a natural conversation response that can be split into multiple text messages.
-
-IMPORTANT PRIVACY RULE: You are having individual conversations with multiple users. Each conversation is private and separate. DO NOT reference information from other conversations or mention that you're talking to multiple people.
-
-Your tone should be conversational and human, like you're texting a friend. Keep responses focused on gathering actionable feedback while being warm and genuine.
-
-IMPORTANT: Do not wrap your messages in quotes. Generate the message text directly.
-
-CONVERSATION CONTEXT:
-{context_string}
-
-Generate a {response_type}. Format your response as:
-MESSAGE1: [first message]
-MESSAGE2: [second message]
-MESSAGE3: [third message if needed]
-
-Keep each message natural and conversational. Don't exceed {max_parts} messages total."""
-            
-            user_prompt = f"User just said: '{user_message}'\n\nGenerate the multi-part response."
-            
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=300,
-                temperature=0.7,
-                presence_penalty=0.2,
-                frequency_penalty=0.2
-            )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Parse the multi-message response
-            parts = self._parse_multi_message_response(content)
-            
-            if not parts:
-                # Fallback to single message
-                single_response = await self.generate_response(user_message, conversation_context)
-                parts = self._split_long_message(single_response)
-            
-            logger.info(f"Generated {len(parts)} response parts")
-            return parts
-            
-        except Exception as e:
-            logger.error(f"Error generating response parts: {e}")
-            fallback = self._get_fallback_response(state)
-            return [fallback]
-    
-    def _parse_multi_message_response(self, response_text: str) -> List[str]:
-        """Parse a multi-message response from GPT."""
-        parts = []
-        
-        for line in response_text.split('\n'):
-            line = line.strip()
-            if line.startswith('MESSAGE1:'):
-                parts.append(line.replace('MESSAGE1:', '').strip())
-            elif line.startswith('MESSAGE2:'):
-                parts.append(line.replace('MESSAGE2:', '').strip())
-            elif line.startswith('MESSAGE3:'):
-                parts.append(line.replace('MESSAGE3:', '').strip())
-        
-        # Clean up parts
-        cleaned_parts = []
-        for part in parts:
-            if part:
-                # Remove quotes if present
-                if part.startswith('"') and part.endswith('"'):
-                    part = part[1:-1]
-                cleaned_parts.append(part)
-        
-        return cleaned_parts
-    
-    def _split_long_message(self, message: str) -> List[str]:
-        """Split a long message into natural parts."""
-        if len(message) <= 160:  # SMS length
-            return [message]
-        
-        # Split on natural boundaries
-        sentences = message.split('. ')
-        if len(sentences) <= 1:
-            return [message]
-        
-        parts = []
-        current_part = ""
-        
-        for sentence in sentences:
-            if not sentence.endswith('.') and sentence != sentences[-1]:
-                sentence += '.'
-            
-            if len(current_part + sentence) <= 160:
-                current_part += sentence if not current_part else f" {sentence}"
-            else:
-                if current_part:
-                    parts.append(current_part)
-                current_part = sentence
-        
-        if current_part:
-            parts.append(current_part)
-        
-        return parts if parts else [message]
+        if self.response_cache is not None:
+            stats.update(self.response_cache.get_stats())
+        return stats
 
 # Global feedback AI instance
 feedback_ai = FeedbackAI() 
\ No newline at end of file
@@ -1,15 +1,83 @@
 import asyncio
 import logging
-import requests
-from typing import Dict, List, Optional, Any
+import time
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
-from openai import AsyncOpenAI
+
+import httpx
+import orjson
 
 from config import config
+from openai_client import shared_async_openai
 from models import FeedbackType, StructuredFeedback, FeedbackConversation, CrossChatInsight
 
 logger = logging.getLogger(__name__)
 
+# Issues per aliased issueCreate mutation, to stay well under Linear's query complexity limits
+_MAX_ISSUES_PER_BATCH = 20
+
+# Requests to Linear in flight at once when several are sent concurrently, to stay under its rate limits
+_MAX_CONCURRENT_REQUESTS = 10
+
+# Seconds to reuse the team list; teams practically never change, but every triage looks up the team ID
+_TEAMS_CACHE_TTL = 600.0
+
+# Structured output for triage, so every formatted issue comes back from one call as parseable JSON
+_LINEAR_ISSUES_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "linear_issues",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "issues": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "title": {"type": "string"},
+                            "description": {"type": "string"},
+                            "type": {
+                                "type": "string",
+                                "enum": ["bug_report", "feature_request", "pain_point", "general_feedback"]
+                            },
+                            "priority": {"type": "string", "enum": ["high", "medium", "low"]},
+                            "labels": {"type": "array", "items": {"type": "string"}}
+                        },
+                        "required": ["title", "description", "type", "priority", "labels"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["issues"],
+            "additionalProperties": False
+        }
+    }
+}
+
+# Words in Linear's GraphQL errors for a request rejected as too complex or too large, before anything ran
+_QUERY_TOO_LARGE_MARKERS = ("complex", "too large", "too many")
+
+def _is_query_too_large(errors: Any) -> bool:
+    """Whether GraphQL errors reject the whole query for its complexity or size."""
+    if not isinstance(errors, list):
+        return False
+    return any(
+        marker in str(error.get("message", "") if isinstance(error, dict) else error).lower()
+        for error in errors
+        for marker in _QUERY_TOO_LARGE_MARKERS
+    )
+
+_ISSUE_FIELDS = """
+            success
+            issue {
+              id
+              identifier
+              title
+              url
+            }"""
+
 class LinearClient:
     """Client for interacting with Linear's GraphQL API to create issues from feedback."""
     
@@ -19,10 +87,64 @@ class LinearClient:
             "Content-Type": "application/json",
             "Authorization": config.LINEAR_API_KEY
         }
-        self.openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        self.openai_client = shared_async_openai
+        
+        # Keep-alive connections to Linear are reused across calls instead of a new TLS handshake each time,
+        # and requests are awaited on the event loop rather than run in a thread
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=30,
+            transport=httpx.AsyncHTTPTransport(
+                retries=3,  # Retries failed connection attempts
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+            )
+        )
+        self._request_slots = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+        self._teams_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None  # (fetched_at, teams)
+        self._teams_lock = asyncio.Lock()
+    
+    async def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a GraphQL payload to Linear and return the decoded response."""
+        async with self._request_slots:
+            response = await self.client.post(self.api_url, content=orjson.dumps(payload))
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    
+    async def aclose(self) -> None:
+        """Close the pooled connections to Linear."""
+        await self.client.aclose()
         
     async def get_teams(self) -> List[Dict[str, Any]]:
-        """Get all teams from Linear to find the target team ID."""
+        """Get all teams from Linear to find the target team ID.
+        
+        The list is cached for a few minutes; concurrent callers share a single fetch.
+        """
+        teams = self._cached_teams()
+        if teams is not None:
+            return teams
+        
+        async with self._teams_lock:
+            # Another caller may have fetched them while this one waited
+            teams = self._cached_teams()
+            if teams is not None:
+                return teams
+            
+            teams = await self._fetch_teams()
+            if teams:  # Failures return [], which is worth retrying next time
+                self._teams_cache = (time.monotonic(), teams)
+            return teams
+    
+    def _cached_teams(self) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached team list, or None if it's missing or expired."""
+        if self._teams_cache is None:
+            return None
+        fetched_at, teams = self._teams_cache
+        if time.monotonic() - fetched_at >= _TEAMS_CACHE_TTL:
+            return None
+        return teams
+    
+    async def _fetch_teams(self) -> List[Dict[str, Any]]:
+        """Fetch all teams from Linear."""
         query = """
         query Teams {
           teams {
@@ -36,13 +158,7 @@ class LinearClient:
         """
         
         try:
-            response = requests.post(
-                self.api_url,
-                json={"query": query},
-                headers=self.headers
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = await self._post({"query": query})
             
             if "errors" in data:
                 logger.error(f"Linear API errors: {data['errors']}")
@@ -78,40 +194,17 @@ class LinearClient:
                           labels: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """Create a new Linear issue."""
         
-        mutation = """
-        mutation IssueCreate($input: IssueCreateInput!) {
-          issueCreate(input: $input) {
-            success
-            issue {
-              id
-              identifier
-              title
-              url
-            }
-          }
-        }
+        mutation = f"""
+        mutation IssueCreate($input: IssueCreateInput!) {{
+          issueCreate(input: $input) {{{_ISSUE_FIELDS}
+          }}
+        }}
         """
         
-        variables = {
-            "input": {
-                "teamId": team_id,
-                "title": title,
-                "description": description
-            }
-        }
-        
-        # Add priority if specified (1=Urgent, 2=High, 3=Normal, 4=Low)
-        if priority:
-            variables["input"]["priority"] = priority
+        variables = {"input": self._issue_input(title, description, team_id, priority)}
         
         try:
-            response = requests.post(
-                self.api_url,
-                json={"query": mutation, "variables": variables},
-                headers=self.headers
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = await self._post({"query": mutation, "variables": variables})
             
             if "errors" in data:
                 logger.error(f"Linear API errors: {data['errors']}")
@@ -128,12 +221,115 @@ class LinearClient:
             logger.error(f"Error creating Linear issue: {e}")
             return None
 
+    def _issue_input(self, title: str, description: str, team_id: str,
+                     priority: Optional[int] = None) -> Dict[str, Any]:
+        """Build the IssueCreateInput for a new issue."""
+        issue_input = {
+            "teamId": team_id,
+            "title": title,
+            "description": description
+        }
+        
+        # Add priority if specified (1=Urgent, 2=High, 3=Normal, 4=Low)
+        if priority:
+            issue_input["priority"] = priority
+        
+        return issue_input
+    
+    async def create_issues(self, issues: List[Dict[str, Any]], team_id: str) -> List[Optional[Dict[str, Any]]]:
+        """Create several Linear issues with one aliased issueCreate mutation per batch.
+        
+        Args:
+            issues: Dicts with "title", "description" and optional "priority"
+            team_id: The team to create the issues in
+            
+        Returns:
+            The created issue (or None if it failed) for each input, in order
+        """
+        # Batches are independent, so they're sent concurrently
+        batches = await asyncio.gather(*(
+            self._create_issue_batch(issues[start:start + _MAX_ISSUES_PER_BATCH], team_id)
+            for start in range(0, len(issues), _MAX_ISSUES_PER_BATCH)
+        ))
+        return [issue for batch in batches for issue in batch]
+    
+    async def _create_issue_batch(self, issues: List[Dict[str, Any]], team_id: str) -> List[Optional[Dict[str, Any]]]:
+        """Create up to _MAX_ISSUES_PER_BATCH issues in one request.
+        
+        Falls back to one request per issue only when the batch certainly wasn't applied:
+        the connection failed, or Linear rejected the query as too complex or too large.
+        Any other failure (a timeout, a 5xx) may come after Linear created the issues,
+        so it isn't retried, to avoid duplicates.
+        """
+        if len(issues) == 1:
+            issue = issues[0]
+            return [await self.create_issue(issue["title"], issue["description"], team_id, issue.get("priority"))]
+        
+        params = ", ".join(f"$i{n}: IssueCreateInput!" for n in range(len(issues)))
+        fields = "".join(
+            f"""
+          i{n}: issueCreate(input: $i{n}) {{{_ISSUE_FIELDS}
+          }}"""
+            for n in range(len(issues))
+        )
+        mutation = f"""
+        mutation IssueBatchCreate({params}) {{{fields}
+        }}
+        """
+        variables = {
+            f"i{n}": self._issue_input(issue["title"], issue["description"], team_id, issue.get("priority"))
+            for n, issue in enumerate(issues)
+        }
+        
+        try:
+            data = await self._post({"query": mutation, "variables": variables})
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            # The request never reached Linear
+            logger.error(f"Could not reach Linear to create issues in a batch, creating them one by one: {e}")
+            return await self._create_issues_one_by_one(issues, team_id)
+        except httpx.HTTPStatusError as e:
+            try:
+                errors = orjson.loads(e.response.content).get("errors")
+            except (AttributeError, orjson.JSONDecodeError):
+                errors = None
+            if _is_query_too_large(errors):
+                logger.error(f"Linear rejected the issue batch as too large, creating them one by one: {errors}")
+                return await self._create_issues_one_by_one(issues, team_id)
+            logger.error(f"Error creating Linear issues in a batch, not retrying as they may have been created: {e}")
+            return [None] * len(issues)
+        except Exception as e:
+            logger.error(f"Error creating Linear issues in a batch, not retrying as they may have been created: {e}")
+            return [None] * len(issues)
+        
+        if "errors" in data:
+            logger.error(f"Linear API errors: {data['errors']}")
+            if not data.get("data") and _is_query_too_large(data["errors"]):
+                return await self._create_issues_one_by_one(issues, team_id)
+        
+        results = data.get("data") or {}
+        created = []
+        for n in range(len(issues)):
+            result = results.get(f"i{n}") or {}
+            if result.get("success"):
+                created.append(result.get("issue"))
+            else:
+                logger.error(f"Failed to create Linear issue: {result}")
+                created.append(None)
+        return created
+    
+    async def _create_issues_one_by_one(self, issues: List[Dict[str, Any]], team_id: str) -> List[Optional[Dict[str, Any]]]:
+        """Create each issue with its own request (still sent concurrently)."""
+        return list(await asyncio.gather(*(
+            self.create_issue(issue["title"], issue["description"], team_id, issue.get("priority"))
+            for issue in issues
+        )))
+
 class FeedbackTriager:
     """AI-powered feedback triager that converts feedback into Linear issues."""
     
     def __init__(self):
         self.linear_client = LinearClient()
-        self.openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        self.openai_client = shared_async_openai
     
     def _get_priority_from_feedback_type(self, feedback_type: FeedbackType, 
                                        severity: str = "medium") -> int:
@@ -209,7 +405,7 @@ IMPORTANT:
 - Use markdown formatting for descriptions
 - Be specific about the problem and impact
 
-Return your response as a JSON array of issue objects."""
+Return your response as a JSON object with an "issues" array of issue objects."""
 
         user_prompt = f"""Here is the feedback collected from users:
 
@@ -225,24 +421,16 @@ Please triage this feedback into Linear issues following the format specified. G
                     {"role": "user", "content": user_prompt}
                 ],
                 max_tokens=3000,
-                temperature=0.3  # Lower temperature for more structured output
+                temperature=0.3,  # Lower temperature for more structured output
+                response_format=_LINEAR_ISSUES_FORMAT
             )
             
-            response_text = response.choices[0].message.content.strip()
+            response_text = response.choices[0].message.content
             
-            # Try to extract JSON from the response
-            import json
+            # The schema guarantees {"issues": [...]}, unless the output was cut off at max_tokens
             try:
-                # Look for JSON array in the response
-                start_idx = response_text.find('[')
-                end_idx = response_text.rfind(']') + 1
-                if start_idx != -1 and end_idx > start_idx:
-                    json_str = response_text[start_idx:end_idx]
-                    return json.loads(json_str)
-                else:
-                    # If no JSON array found, try to parse the whole response
-                    return json.loads(response_text)
-            except json.JSONDecodeError:
+                return orjson.loads(response_text)["issues"]
+            except (TypeError, orjson.JSONDecodeError):
                 logger.error(f"Failed to parse GPT-4o response as JSON: {response_text}")
                 return []
                 
@@ -328,37 +516,27 @@ Please triage this feedback into Linear issues following the format specified. G
             return []
         
         # Create issues in Linear
-        created_issues = []
+        issues = []
         for issue_data in formatted_issues:
-            try:
-                title = issue_data.get("title", "Untitled Feedback")
-                description = issue_data.get("description", "")
-                issue_type = issue_data.get("type", "general_feedback")
-                priority_level = issue_data.get("priority", "medium")
-                
-                # Convert priority level to Linear priority number
-                priority_map = {"high": 2, "medium": 3, "low": 4}
-                priority = priority_map.get(priority_level, 3)
-                
-                # Create the issue
-                created_issue = await self.linear_client.create_issue(
-                    title=title,
-                    description=description,
-                    team_id=team_id,
-                    priority=priority
-                )
-                
-                if created_issue:
-                    created_issues.append({
-                        "linear_issue": created_issue,
-                        "original_data": issue_data,
-                        "created_at": datetime.now().isoformat()
-                    })
-                    logger.info(f"Created Linear issue: {created_issue['identifier']} - {title}")
-                
-            except Exception as e:
-                logger.error(f"Error creating Linear issue: {e}")
-                continue
+            # Convert priority level to Linear priority number
+            priority_map = {"high": 2, "medium": 3, "low": 4}
+            issues.append({
+                "title": issue_data.get("title", "Untitled Feedback"),
+                "description": issue_data.get("description", ""),
+                "priority": priority_map.get(issue_data.get("priority", "medium"), 3)
+            })
+        
+        # One request for all of them instead of a round trip per issue
+        created_issues = []
+        results = await self.linear_client.create_issues(issues, team_id)
+        for issue_data, issue, created_issue in zip(formatted_issues, issues, results):
+            if created_issue:
+                created_issues.append({
+                    "linear_issue": created_issue,
+                    "original_data": issue_data,
+                    "created_at": datetime.now().isoformat()
+                })
+                logger.info(f"Created Linear issue: {created_issue['identifier']} - {issue['title']}")
         
         return created_issues
     
@@ -400,61 +578,54 @@ Please triage this feedback into Linear issues following the format specified. G
         logger.info(f"✅ GPT-4o formatted {len(formatted_issues)} issues for chat session {chat_guid}")
         
         # Create issues in Linear
-        created_issues = []
+        issues = []
         for i, issue_data in enumerate(formatted_issues, 1):
-            try:
-                title = issue_data.get("title", "Untitled Feedback")
-                description = issue_data.get("description", "")
-                issue_type = issue_data.get("type", "general_feedback")
-                priority_level = issue_data.get("priority", "medium")
-                
-                # Add session context to description
-                description += f"\n\n---\n**Session Context:**\n"
-                description += f"- Chat Session: {chat_guid[:8]}... (anonymized)\n"
-                description += f"- Session State: {session_state}\n"
-                description += f"- Total Questions Asked: {chat_feedback_data.get('total_questions_asked', 0)}\n"
-                description += f"- Feedback Items: {len(feedback_items)}\n"
-                description += f"- Created: {datetime.now().strftime('%Y-%m-%d %H:%M UTC')}\n"
-                
-                # Convert priority level to Linear priority number
-                priority_map = {"high": 2, "medium": 3, "low": 4}
-                priority = priority_map.get(priority_level, 3)
-                
-                logger.info(f"🚀 Creating Linear issue {i}/{len(formatted_issues)} for chat session {chat_guid}")
-                logger.info(f"   Title: {title}")
-                logger.info(f"   Type: {issue_type}")
-                logger.info(f"   Priority: {priority_level}")
-                
-                # Create the issue
-                created_issue = await self.linear_client.create_issue(
-                    title=title,
-                    description=description,
-                    team_id=team_id,
-                    priority=priority
-                )
-                
-                if created_issue:
-                    created_issues.append({
-                        "linear_issue": created_issue,
-                        "original_data": issue_data,
-                        "chat_guid": chat_guid,
-                        "session_context": {
-                            "state": session_state,
-                            "questions_asked": chat_feedback_data.get("total_questions_asked", 0),
-                            "feedback_count": len(feedback_items)
-                        },
-                        "created_at": datetime.now().isoformat()
-                    })
-                    
-                    logger.info(f"✅ Created Linear issue for chat session {chat_guid}:")
-                    logger.info(f"   Issue ID: {created_issue['identifier']}")
-                    logger.info(f"   Title: {created_issue['title']}")
-                    logger.info(f"   URL: {created_issue['url']}")
-                    logger.info(f"   Priority: {priority_level}")
+            title = issue_data.get("title", "Untitled Feedback")
+            description = issue_data.get("description", "")
+            issue_type = issue_data.get("type", "general_feedback")
+            priority_level = issue_data.get("priority", "medium")
+            
+            # Add session context to description
+            description += f"\n\n---\n**Session Context:**\n"
+            description += f"- Chat Session: {chat_guid[:8]}... (anonymized)\n"
+            description += f"- Session State: {session_state}\n"
+            description += f"- Total Questions Asked: {chat_feedback_data.get('total_questions_asked', 0)}\n"
+            description += f"- Feedback Items: {len(feedback_items)}\n"
+            description += f"- Created: {datetime.now().strftime('%Y-%m-%d %H:%M UTC')}\n"
+            
+            # Convert priority level to Linear priority number
+            priority_map = {"high": 2, "medium": 3, "low": 4}
+            priority = priority_map.get(priority_level, 3)
+            
+            logger.info(f"🚀 Creating Linear issue {i}/{len(formatted_issues)} for chat session {chat_guid}")
+            logger.info(f"   Title: {title}")
+            logger.info(f"   Type: {issue_type}")
+            logger.info(f"   Priority: {priority_level}")
+            
+            issues.append({"title": title, "description": description, "priority": priority})
+        
+        # One request for all of them instead of a round trip per issue
+        created_issues = []
+        results = await self.linear_client.create_issues(issues, team_id)
+        for issue_data, created_issue in zip(formatted_issues, results):
+            if created_issue:
+                created_issues.append({
+                    "linear_issue": created_issue,
+                    "original_data": issue_data,
+                    "chat_guid": chat_guid,
+                    "session_context": {
+                        "state": session_state,
+                        "questions_asked": chat_feedback_data.get("total_questions_asked", 0),
+                        "feedback_count": len(feedback_items)
+                    },
+                    "created_at": datetime.now().isoformat()
+                })
                 
-            except Exception as e:
-                logger.error(f"❌ Error creating Linear issue {i} for chat session {chat_guid}: {e}")
-                continue
+                logger.info(f"✅ Created Linear issue for chat session {chat_guid}:")
+                logger.info(f"   Issue ID: {created_issue['identifier']}")
+                logger.info(f"   Title: {created_issue['title']}")
+                logger.info(f"   URL: {created_issue['url']}")
+                logger.info(f"   Priority: {issue_data.get('priority', 'medium')}")
         
         if created_issues:
             logger.info(f"🎉 Successfully created {len(created_issues)} Linear issues for chat session {chat_guid}")
@@ -1,19 +1,31 @@
 import asyncio
 import logging
-import requests
+import random
 import uuid
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Optional, List, Dict, Sequence, Tuple
 from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import partial
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+import httpx
+import orjson
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import ValidationError
 import uvicorn
 
+try:
+    from arq import create_pool
+    from arq.connections import ArqRedis, RedisSettings
+except ImportError:  # pragma: no cover - optional dependency
+    create_pool = None
+
 from config import config
-from models import WebhookData
+from models import WebhookData, ConversationState
 from feedback_ai import feedback_ai
-from conversation_state import conversation_manager
+from conversation_state import conversation_manager, redis
+from linear_integration import feedback_triager
 
 # Configure logging
 logging.basicConfig(
@@ -22,32 +34,91 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Shared async client for BlueBubbles, so sends don't block the event loop and reuse connections
+bluebubbles_client = httpx.AsyncClient(
+    timeout=10,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+)
+
+# Parts of every BlueBubbles send that don't change between messages
+_SEND_TEXT_URL = f"{config.BLUEBUBBLES_SERVER_URL}/api/v1/message/text"
+_SEND_TEXT_PARAMS = {"password": config.BLUEBUBBLES_PASSWORD}
+_SEND_TEXT_HEADERS = {"Content-Type": "application/json"}
+_SEND_TEXT_TEMPLATE = {"subject": "", "effectId": "", "selectedMessageGuid": ""}
+
+# Fire-and-forget sends (cross-chat probes) go through a bounded queue drained by a few workers,
+# so a broadcast to many chats doesn't hit BlueBubbles with every request at once
+outbound_queue: "asyncio.Queue[Tuple[str, str]]" = asyncio.Queue(maxsize=config.OUTBOUND_QUEUE_SIZE)
+
+# Caps messages being processed in this process at once, so a burst can't grow memory without bound
+inflight_messages = asyncio.Semaphore(config.MAX_INFLIGHT_MESSAGES)
+
+# Last /feedback-summary response, with the conversation_manager version it was built from
+_feedback_summary_cache: Optional[Tuple[int, Dict]] = None
+
+# Redis-backed arq queue for feedback processing, when TASK_QUEUE_REDIS_URL is set (see worker.py)
+job_queue: Optional["ArqRedis"] = None
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for FastAPI app."""
+    global job_queue
+    
     # Startup
     logger.info("Starting Feedback Bot...")
     try:
         config.validate()
         logger.info("Configuration validated successfully")
-        logger.info(f"Monitoring {len(config.CHAT_GUIDS)} chat(s): {', '.join(config.CHAT_GUIDS[:3])}{'...' if len(config.CHAT_GUIDS) > 3 else ''}")
-        logger.info(f"Cross-chat insights: {'enabled' if config.ENABLE_CROSS_CHAT_INSIGHTS else 'disabled'}")
+        logger.info(
+            "Monitoring %d chat(s): %s%s",
+            len(config.CHAT_GUIDS), ", ".join(config.CHAT_GUIDS[:3]), "..." if len(config.CHAT_GUIDS) > 3 else ""
+        )
+        logger.info("Cross-chat insights: %s", 'enabled' if config.ENABLE_CROSS_CHAT_INSIGHTS else 'disabled')
     except ValueError as e:
-        logger.error(f"Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         raise
     
+    # Do the TLS handshake now instead of on the first user message
+    asyncio.create_task(feedback_ai.prewarm())
+    
+    sender_tasks = [asyncio.create_task(outbound_sender()) for _ in range(config.OUTBOUND_SENDER_WORKERS)]
+    
+    if config.TASK_QUEUE_REDIS_URL:
+        if create_pool is None:
+            logger.warning("TASK_QUEUE_REDIS_URL is set but arq is not installed - processing feedback in-process")
+        else:
+            job_queue = await create_pool(RedisSettings.from_dsn(config.TASK_QUEUE_REDIS_URL))
+            logger.info("Feedback processing queued to Redis for the arq worker")
+    
+    await connect_state_store()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Feedback Bot...")
+    for task in sender_tasks:
+        task.cancel()
+    if job_queue is not None:
+        await job_queue.close()
+    await conversation_manager.close_store()
+    await bluebubbles_client.aclose()
+    await feedback_triager.linear_client.aclose()
 
 app = FastAPI(
     title="Feedback Bot",
     description="An intelligent feedback collection assistant for early-stage founders via iMessage",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+async def parse_webhook(request: Request) -> WebhookData:
+    """Parse and validate a webhook body in one pass with pydantic's JSON parser, skipping the intermediate dict."""
+    try:
+        return WebhookData.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors()) from e
+
 @app.get("/")
 async def health_check():
     """Health check endpoint."""
@@ -69,18 +140,18 @@ async def health_check():
     }
 
 @app.post("/webhook")
-async def handle_webhook(webhook_data: WebhookData, background_tasks: BackgroundTasks):
+async def handle_webhook(background_tasks: BackgroundTasks, webhook_data: WebhookData = Depends(parse_webhook)):
     """
     Handle incoming webhooks from BlueBubbles for feedback collection across multiple chats.
     
     The bot analyzes feedback, asks Mom Test questions, and structures insights with cross-chat learning.
     """
     try:
-        logger.info(f"Received webhook: {webhook_data.type}")
+        logger.info("Received webhook: %s", webhook_data.type)
         
         # Only handle new-message events
         if webhook_data.type != "new-message":
-            logger.info(f"Ignoring webhook type: {webhook_data.type}")
+            logger.info("Ignoring webhook type: %s", webhook_data.type)
             return {"status": "ignored", "reason": "not a new message"}
         
         # Validate message data
@@ -103,24 +174,38 @@ async def handle_webhook(webhook_data: WebhookData, background_tasks: Background
         chat_guid = message.chats[0].guid
         message_text = message.text or ""
         
-        logger.info(f"Message received from chat: {chat_guid}")
-        logger.info(f"Monitored chats: {len(config.CHAT_GUIDS)}")
-        logger.info(f"Message text: {message_text[:100]}...")
+        logger.info("Message received from chat: %s", chat_guid)
+        logger.info("Monitored chats: %s", len(config.CHAT_GUIDS))
+        logger.info("Message text: %.100s...", message_text)
         
         # Check if this chat is in our monitored list
         if not config.is_monitored_chat(chat_guid):
-            logger.info(f"Ignoring message from unmonitored chat: {chat_guid}")
+            logger.info("Ignoring message from unmonitored chat: %s", chat_guid)
             return {"status": "ignored", "reason": "chat not monitored"}
         
-        logger.info(f"Processing feedback message from monitored chat: {message_text[:50]}...")
+        # Shed load while we're saturated instead of piling on more work
+        # (only for messages we'd process; ignored webhooks are always acknowledged)
+        if inflight_messages.locked() or outbound_queue.full():
+            logger.warning("Too much work in flight, asking BlueBubbles to retry the webhook")
+            raise HTTPException(status_code=503, detail="Busy, retry shortly", headers={"Retry-After": "1"})
+        
+        logger.info("Processing feedback message from monitored chat: %.50s...", message_text)
         
         # Process the feedback message in the background
-        background_tasks.add_task(process_feedback_message, chat_guid, message_text)
+        if job_queue is not None:
+            # Survives restarts and keeps OpenAI latency out of this process
+            await job_queue.enqueue_job("process_feedback_message", chat_guid, message_text)
+        else:
+            # Doesn't wait: the semaphore was checked above with no await since
+            await inflight_messages.acquire()
+            background_tasks.add_task(process_admitted_message, chat_guid, message_text)
         
         return {"status": "accepted", "message": "Processing your feedback!"}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error processing webhook: {e}")
+        logger.error("Error processing webhook: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 async def send_message(chat_guid: str, text: str, method: str = "apple-script"):
@@ -133,38 +218,53 @@ async def send_message(chat_guid: str, text: str, method: str = "apple-script"):
         method: The method to use for sending (default: apple-script)
     """
     try:
-        params = {"password": config.BLUEBUBBLES_PASSWORD}
         data = {
             "chatGuid": chat_guid,
-            "tempGuid": str(uuid.uuid4()),
+            "tempGuid": uuid.uuid4().hex,  # BlueBubbles only needs a unique string
             "message": text,
             "method": method,
-            "subject": "",
-            "effectId": "",
-            "selectedMessageGuid": ""
+            **_SEND_TEXT_TEMPLATE
         }
         
-        url = f"{config.BLUEBUBBLES_SERVER_URL}/api/v1/message/text"
-        
-        response = requests.post(
-            url,
-            json=data,
-            params=params,
-            headers={"Content-Type": "application/json"},
-            timeout=10
+        response = await bluebubbles_client.post(
+            _SEND_TEXT_URL,
+            content=orjson.dumps(data),
+            params=_SEND_TEXT_PARAMS,
+            headers=_SEND_TEXT_HEADERS
         )
         
         response.raise_for_status()
-        logger.info(f"Message sent successfully to chat {chat_guid}")
+        logger.info("Message sent successfully to chat %s", chat_guid)
         
-    except requests.RequestException as e:
-        logger.error(f"Failed to send message to BlueBubbles: {e}")
+    except httpx.HTTPError as e:
+        logger.error("Failed to send message to BlueBubbles: %s", e)
         raise
     except Exception as e:
-        logger.error(f"Unexpected error sending message: {e}")
+        logger.error("Unexpected error sending message: %s", e)
         raise
 
-def parse_response_for_sending(response_text: str) -> List[str]:
+async def connect_state_store():
+    """Load and persist conversation state in Redis when STATE_REDIS_URL is set."""
+    if not config.STATE_REDIS_URL:
+        return
+    if redis is None:
+        logger.warning("STATE_REDIS_URL is set but redis is not installed - keeping conversation state in memory")
+        return
+    await conversation_manager.connect_store(config.STATE_REDIS_URL)
+    logger.info("Loaded %s conversation(s) from Redis", len(conversation_manager.get_all_conversations()))
+
+async def outbound_sender():
+    """Worker that sends messages from the outbound queue until cancelled."""
+    while True:
+        chat_guid, text = await outbound_queue.get()
+        try:
+            await send_message(chat_guid, text)
+        except Exception as e:
+            logger.error("Failed to send queued message to chat %s: %s", chat_guid, e)
+        finally:
+            outbound_queue.task_done()
+
+def parse_response_for_sending(response_text: str) -> Tuple[str, ...]:
     """
     Parse a response to determine if it should be sent as multiple messages.
     Only splits if there are distinct ideas separated by line breaks.
@@ -173,45 +273,66 @@ def parse_response_for_sending(response_text: str) -> List[str]:
         response_text: The full response text
         
     Returns:
-        List of message parts (1-2 messages max)
+        Tuple of message parts (1-2 messages max)
     """
-    # Check for intentional line breaks that indicate separate messages
-    if '\n\n' in response_text:
-        parts = [part.strip() for part in response_text.split('\n\n') if part.strip()]
-        # Only return multiple parts if we have exactly 2 distinct ideas
-        if len(parts) == 2 and all(len(part) > 10 for part in parts):
-            return parts[:2]  # Cap at 2 messages max
+    # Most replies are a single message, so check before doing any splitting
+    if '\n\n' not in response_text:
+        return (response_text,)
+    
+    # Only split if we have exactly 2 distinct ideas (a third break means more than 2)
+    first, _, second = response_text.strip().partition('\n\n')
+    first, second = first.strip(), second.strip()
+    if '\n\n' not in second and len(first) > 10 and len(second) > 10:
+        return (first, second)
     
     # Default: return as single message
-    return [response_text]
+    return (response_text,)
 
-async def send_multiple_messages(chat_guid: str, messages: List[str], method: str = "apple-script"):
+async def send_multiple_messages(chat_guid: str, messages: Sequence[str], method: str = "apple-script"):
     """
-    Send multiple messages in sequence with natural delays to simulate real texting.
+    Send multiple messages in sequence.
     Limited to at most 2 messages per response cycle.
     
+    With SIMULATE_TYPING enabled, later messages follow after a natural typing delay
+    in a background task, so the caller doesn't wait out the delay.
+    
     Args:
         chat_guid: The chat GUID to send the messages to
-        messages: List of message texts to send (max 2)
+        messages: Message texts to send (max 2)
         method: The method to use for sending (default: apple-script)
     """
-    import random
-    
     # Ensure we never send more than 2 messages
     messages = messages[:2]
     
+    if config.SIMULATE_TYPING:
+        await send_message(chat_guid, messages[0], method)
+        logger.info("Sent message 1/%s: %.30s...", len(messages), messages[0])
+        if len(messages) > 1:
+            asyncio.create_task(send_after_typing_delay(chat_guid, messages[1:], method))
+        return
+    
+    # Sent one after another (not gathered) so the parts can't arrive out of order
     for i, message in enumerate(messages):
-        if i > 0:  # Add delay between messages (except for the first one)
-            # Natural typing delay based on message length
-            base_delay = 0.5  # Minimum delay
-            typing_delay = len(message) * 0.02  # ~20ms per character to simulate typing
-            random_delay = random.uniform(0.2, 0.8)  # Random human variation
-            
-            total_delay = min(base_delay + typing_delay + random_delay, 3.0)  # Cap at 3 seconds
-            await asyncio.sleep(total_delay)
-        
         await send_message(chat_guid, message, method)
-        logger.info(f"Sent message {i+1}/{len(messages)}: {message[:30]}...")
+        logger.info("Sent message %d/%s: %.30s...", i + 1, len(messages), message)
+
+async def send_after_typing_delay(chat_guid: str, messages: List[str], method: str = "apple-script"):
+    """Send follow-up messages, each after a delay that simulates typing it."""
+    for message in messages:
+        # Natural typing delay based on message length
+        base_delay = 0.5  # Minimum delay
+        typing_delay = len(message) * 0.02  # ~20ms per character to simulate typing
+        random_delay = random.uniform(0.2, 0.8)  # Random human variation
+        
+        total_delay = min(base_delay + typing_delay + random_delay, 3.0)  # Cap at 3 seconds
+        await asyncio.sleep(total_delay)
+        
+        try:
+            await send_message(chat_guid, message, method)
+            logger.info("Sent delayed message: %.30s...", message)
+        except Exception as e:
+            logger.error("Failed to send delayed message to chat %s: %s", chat_guid, e)
+            return
 
 async def broadcast_cross_chat_probe(insight_theme: str, originating_chat_guid: str):
     """
@@ -223,51 +344,143 @@ async def broadcast_cross_chat_probe(insight_theme: str, originating_chat_guid:
     
     # Get all conversations except the originating one
     all_conversations = conversation_manager.get_all_conversations()
-    target_chats = [
-        chat_guid for chat_guid in all_conversations.keys() 
-        if chat_guid != originating_chat_guid and chat_guid in config.CHAT_GUIDS
-    ]
+    target_chats = (all_conversations.keys() - {originating_chat_guid}) & config.CHAT_GUIDS_SET
     
     if not target_chats:
         return
     
-    logger.info(f"Broadcasting cross-chat probe for theme '{insight_theme}' to {len(target_chats)} chats")
+    logger.info("Broadcasting cross-chat probe for theme '%s' to %s chats", insight_theme, len(target_chats))
     
-    # Generate cross-chat probes for each target chat
-    probe_tasks = []
+    # Queue a cross-chat probe for each target chat; the outbound workers pace the sends
     for target_chat_guid in target_chats:
         probe = conversation_manager.get_cross_chat_probe(target_chat_guid)
         if probe:
-            probe_tasks.append(send_message(target_chat_guid, probe))
-            logger.info(f"Scheduling cross-chat probe for {target_chat_guid}: {probe[:50]}...")
+            try:
+                outbound_queue.put_nowait((target_chat_guid, probe))
+            except asyncio.QueueFull:
+                logger.warning("Outbound queue full, dropping cross-chat probe for %s", target_chat_guid)
+                break
+            logger.info("Scheduling cross-chat probe for %s: %.50s...", target_chat_guid, probe)
+
+async def deliver_response(chat_guid: str, response_text: str):
+    """
+    Send a generated response and record it in the conversation.
+    
+    Args:
+        chat_guid: The chat GUID to send the response to
+        response_text: The full response text
+    """
+    # Parse response for potential line breaks (split only if absolutely necessary)
+    response_parts = parse_response_for_sending(response_text)
+    
+    # Send the response (single message or at most 2 if distinct ideas)
+    if len(response_parts) == 1:
+        await send_message(chat_guid, response_parts[0])
+    else:
+        await send_multiple_messages(chat_guid, response_parts)
+    
+    # Mark messages as sent in conversation manager
+    conversation_manager.mark_messages_sent(chat_guid, response_parts)
+    # Deferred responses arrive after the message was processed, so save them here too
+    await conversation_manager.persist_conversation(chat_guid)
+    
+    logger.info("Sent %s message(s) for feedback in chat %s", len(response_parts), chat_guid)
+
+async def deliver_deferred_response(chat_guid: str, response_text: str):
+    """
+    Deliver a response that finished after its message was processed (e.g. a batched summary).
+    
+    Args:
+        chat_guid: The chat GUID to send the response to
+        response_text: The full response text
+    """
+    async with conversation_manager.chat_lock(chat_guid):
+        await conversation_manager.refresh_conversation(chat_guid)
+        await deliver_response(chat_guid, response_text)
+
+async def deliver_streamed_response(chat_guid: str, response_stream: AsyncIterator[str]):
+    """
+    Send a response while it's still being generated.
+    
+    The first paragraph is texted as soon as parse_response_for_sending would split
+    the text received so far (so a short second idea stays in one message), and the
+    rest follows as a second message once the stream ends. If a further break only
+    arrives after the first message went out, it stays inside the second message.
+    
+    Args:
+        chat_guid: The chat GUID to send the response to
+        response_stream: Async iterator of response pieces from feedback_ai.stream_response
+    """
+    text = ""
+    first_part_sent = False
+    async for piece in response_stream:
+        text += piece
+        if first_part_sent or '\n\n' not in text:
+            continue
+        parts = parse_response_for_sending(text)
+        if len(parts) == 2:
+            first_part = parts[0]
+            await send_message(chat_guid, first_part)
+            conversation_manager.mark_message_sent(chat_guid, first_part)
+            first_part_sent = True
+            text = text.lstrip().partition('\n\n')[2]
+    
+    if not first_part_sent:
+        if text.strip():
+            await deliver_response(chat_guid, text)
+        return
     
-    # Send probes concurrently to all target chats
-    if probe_tasks:
-        await asyncio.gather(*probe_tasks, return_exceptions=True)
+    rest = text.strip()
+    if rest:
+        await send_message(chat_guid, rest)
+        conversation_manager.mark_message_sent(chat_guid, rest)
+    logger.info("Sent streamed response for feedback in chat %s", chat_guid)
+
+async def process_admitted_message(chat_guid: str, message_text: str):
+    """Process a message the webhook admitted, then free its in-flight slot."""
+    try:
+        await process_feedback_message(chat_guid, message_text)
+    finally:
+        inflight_messages.release()
 
 async def process_feedback_message(chat_guid: str, message_text: str):
     """
     Process an incoming feedback message and generate appropriate response.
     
+    Messages from the same chat are processed one at a time, so one reloading the
+    conversation can't discard the changes of another still waiting on OpenAI.
+    
     Args:
         chat_guid: The GUID of the chat
         message_text: The text content of the message
     """
+    async with conversation_manager.chat_lock(chat_guid):
+        await _process_feedback_message(chat_guid, message_text)
+
+async def _process_feedback_message(chat_guid: str, message_text: str):
+    """Process a feedback message while holding its chat's lock."""
     try:
+        # Pick up changes another worker saved for this chat
+        await conversation_manager.refresh_conversation(chat_guid)
+        
         # Process the message and extract feedback
         conversation = conversation_manager.process_user_message(chat_guid, message_text)
-        logger.info(f"Processing feedback for conversation state: {conversation.state}")
+        logger.info("Processing feedback for conversation state: %s", conversation.state)
         
         # Check if session is ending BEFORE we process the response
         session_was_ending = conversation_manager.is_session_ending(conversation)
         previous_state = conversation.state
         
+        # A first-contact welcome doesn't use the context, so don't build it
+        is_first_contact = (conversation.state is ConversationState.INITIAL_CONTACT and
+                            conversation.total_feedback_collected == 0)
+        
         # Get comprehensive conversation context for AI
-        context = conversation_manager.get_conversation_context(chat_guid)
+        context = {} if is_first_contact else conversation_manager.get_conversation_context(chat_guid)
         
         # Check if we should trigger cross-chat probes based on new insights
-        if (conversation.current_feedback and 
-            config.ENABLE_CROSS_CHAT_INSIGHTS and 
+        if (config.ENABLE_CROSS_CHAT_INSIGHTS and 
+            conversation.current_feedback and 
             conversation.total_feedback_collected > 0):
             
             # Schedule cross-chat probe broadcast (non-blocking)
@@ -277,110 +490,129 @@ async def process_feedback_message(chat_guid: str, message_text: str):
             ))
         
         # Determine response strategy and generate response (single message preferred)
-        if conversation.state.value == "initial_contact" and conversation.total_feedback_collected == 0:
+        response_text = None
+        response_stream = None
+        if is_first_contact:
             # First interaction - welcome and encourage feedback
             response_text = await feedback_ai.generate_welcome_message()
         elif context.get("cross_chat_probe"):
             # Use cross-chat insight probe
             response_text = context["cross_chat_probe"]
-            logger.info(f"Using cross-chat probe: {context['cross_chat_probe'][:50]}...")
+            logger.info("Using cross-chat probe: %.50s...", context['cross_chat_probe'])
         elif conversation_manager.should_probe_deeper(conversation):
             # Use GPT-4o to generate contextual Mom Test probe question
             if conversation.current_feedback:
                 response_text = await feedback_ai.generate_mom_test_probe(
                     conversation.current_feedback.feedback_type, 
-                    message_text
+                    message_text,
+                    chat_guid
                 )
             else:
                 # Fallback if no current feedback available
-                response_text = await feedback_ai.generate_response(message_text, context)
+                response_stream = feedback_ai.stream_response(message_text, context)
         elif conversation_manager.should_summarize(conversation):
             # Summarize feedback collected so far
             conversation.state = conversation.state.SUMMARIZING
-            response_text = await feedback_ai.generate_response(message_text, context)
+            if config.ENABLE_BATCH_SUMMARIES:
+                # Not latency-critical: sent as a follow-up once the batch completes
+                await feedback_ai.generate_response_deferred(
+                    message_text, context, partial(deliver_deferred_response, chat_guid)
+                )
+            else:
+                response_stream = feedback_ai.stream_response(message_text, context)
+        elif config.ENABLE_MODEL_NEXT_ACTION:
+            # One call returns the reply and whether it sums up or wraps up the session
+            response_text, next_action = await feedback_ai.generate_response_with_action(message_text, context)
+            if next_action == "summarize":
+                conversation.state = ConversationState.SUMMARIZING
+            elif next_action == "end":
+                conversation.state = ConversationState.THANKING
         else:
             # Generate contextually appropriate response with full conversation context
-            response_text = await feedback_ai.generate_response(message_text, context)
-        
-        # Parse response for potential line breaks (split only if absolutely necessary)
-        response_parts = parse_response_for_sending(response_text)
-        
-        # Send the response (single message or at most 2 if distinct ideas)
-        if len(response_parts) == 1:
-            await send_message(chat_guid, response_parts[0])
-        else:
-            await send_multiple_messages(chat_guid, response_parts)
-        
-        # Mark messages as sent in conversation manager
-        for response_part in response_parts:
-            conversation_manager.mark_message_sent(chat_guid, response_part)
+            response_stream = feedback_ai.stream_response(message_text, context)
         
-        logger.info(f"Sent {len(response_parts)} message(s) for feedback in chat {chat_guid}")
+        if response_stream is not None:
+            await deliver_streamed_response(chat_guid, response_stream)
+        elif response_text:
+            await deliver_response(chat_guid, response_text)
         
         # Check if session is ending AFTER we've sent the response
         session_is_ending = conversation_manager.is_session_ending(conversation)
         created_issues = []  # Initialize to avoid NameError
         
+        # Save before triaging is scheduled: the triage job reloads the session and saves it once it's triaged
+        await conversation_manager.persist_conversation(chat_guid)
+        
         # Auto-trigger Linear issue creation if session is ending and Linear is enabled
         if (session_is_ending and config.ENABLE_LINEAR_INTEGRATION and 
             config.AUTO_TRIAGE_ON_SESSION_END and conversation.total_feedback_collected > 0):
             
             # Check if we haven't already triaged this session
-            if not hasattr(conversation, '_triaged_to_linear') or not conversation._triaged_to_linear:
-                logger.info(f"🎯 Feedback session ending for chat {chat_guid} - triggering automatic Linear triaging")
-                logger.info(f"   Previous state: {previous_state}")
-                logger.info(f"   Current state: {conversation.state}")
-                logger.info(f"   Total feedback collected: {conversation.total_feedback_collected}")
-                logger.info(f"   Questions asked: {conversation.total_questions_asked}")
+            if not conversation.triaged_to_linear:
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("🎯 Feedback session ending for chat %s - triggering automatic Linear triaging", chat_guid)
+                    logger.info("   Previous state: %s", previous_state)
+                    logger.info("   Current state: %s", conversation.state)
+                    logger.info("   Total feedback collected: %s", conversation.total_feedback_collected)
+                    logger.info("   Questions asked: %s", conversation.total_questions_asked)
                 
                 # Schedule Linear triaging in background
-                asyncio.create_task(auto_triage_session_to_linear(chat_guid))
+                if job_queue is not None:
+                    await job_queue.enqueue_job("auto_triage_session_to_linear", chat_guid)
+                else:
+                    asyncio.create_task(auto_triage_session_to_linear(chat_guid))
             else:
-                logger.info(f"⏭️  Session for chat {chat_guid} already triaged to Linear, skipping")
+                logger.info("⏭️  Session for chat %s already triaged to Linear, skipping", chat_guid)
         
         # Optional: Send a notification back to the chat
         if config.NOTIFY_USER_ON_TRIAGE and created_issues:
             await send_feedback_processed_notification(chat_guid, created_issues)
         
     except Exception as e:
-        logger.error(f"Error processing feedback message for chat {chat_guid}: {e}")
+        logger.error("Error processing feedback message for chat %s: %s", chat_guid, e)
         # Send a helpful error message
         fallback = "Thanks for your message! I'm having a small technical issue, but I'd still love to hear your feedback. Could you try sending it again?"
         await send_message(chat_guid, fallback)
 
 async def auto_triage_session_to_linear(chat_guid: str):
     """Background task to automatically triage a completed feedback session to Linear."""
+    # Held throughout, so the triaged flag is saved on the stored session and a second
+    # job for the same chat waits and then sees it
+    async with conversation_manager.chat_lock(chat_guid):
+        await _auto_triage_session_to_linear(chat_guid)
+
+async def _auto_triage_session_to_linear(chat_guid: str):
+    """Triage a completed feedback session to Linear while holding its chat's lock."""
     try:
-        logger.info(f"🚀 Starting automatic Linear triaging for chat session: {chat_guid}")
+        logger.info("🚀 Starting automatic Linear triaging for chat session: %s", chat_guid)
         
-        # Import here to avoid circular imports
-        from linear_integration import feedback_triager
+        # This may run in another worker: pick up the session as saved
+        await conversation_manager.refresh_conversation(chat_guid)
+        conversation = conversation_manager.get_conversation(chat_guid)
+        if conversation is not None and conversation.triaged_to_linear:
+            logger.info("⏭️  Session for chat %s already triaged to Linear, skipping", chat_guid)
+            return
         
         # Collect feedback from this specific chat
         chat_feedback_data = conversation_manager.collect_feedback_for_chat(chat_guid)
         
         if not chat_feedback_data["feedback_items"]:
-            logger.info(f"⏭️  No feedback items found for chat session {chat_guid}, skipping Linear triaging")
+            logger.info("⏭️  No feedback items found for chat session %s, skipping Linear triaging", chat_guid)
             return
         
-        logger.info(f"📊 Chat session {chat_guid} feedback summary:")
-        logger.info(f"   Total feedback items: {chat_feedback_data['total_feedback']}")
-        logger.info(f"   Session state: {chat_feedback_data['session_state']}")
-        logger.info(f"   Questions asked: {chat_feedback_data['total_questions_asked']}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📊 Chat session %s feedback summary:", chat_guid)
+            logger.info("   Total feedback items: %s", chat_feedback_data['total_feedback'])
+            logger.info("   Session state: %s", chat_feedback_data['session_state'])
+            logger.info("   Questions asked: %s", chat_feedback_data['total_questions_asked'])
         
-        # Get relevant cross-chat insights for context
-        all_insights = conversation_manager._global_state.cross_chat_insights
-        relevant_insights = {}
-        
-        # Only include insights that might be relevant to this session's feedback
-        for item in chat_feedback_data["feedback_items"]:
-            feedback_type = item["feedback"].feedback_type
-            for theme, insight in all_insights.items():
-                if insight.feedback_type == feedback_type and insight.frequency_count > 1:
-                    relevant_insights[theme] = insight
+        # Get relevant cross-chat insights for context: only recurring ones
+        # matching the feedback types in this session
+        session_feedback_types = {item["feedback"].feedback_type for item in chat_feedback_data["feedback_items"]}
+        relevant_insights = conversation_manager.get_recurring_insights(session_feedback_types)
         
         if relevant_insights:
-            logger.info(f"🔗 Found {len(relevant_insights)} relevant cross-chat insights for session {chat_guid}")
+            logger.info("🔗 Found %s relevant cross-chat insights for session %s", len(relevant_insights), chat_guid)
         
         # Triage this session's feedback to Linear
         created_issues = await feedback_triager.triage_chat_session_to_linear(
@@ -389,30 +621,32 @@ async def auto_triage_session_to_linear(chat_guid: str):
         )
         
         if created_issues:
-            # Mark session as triaged
+            # Mark session as triaged, and save it so later messages don't triage it again
             conversation_manager.mark_session_triaged(chat_guid)
+            await conversation_manager.persist_conversation(chat_guid)
             
-            logger.info(f"🎉 Auto-triaging completed for chat session {chat_guid}")
-            logger.info(f"   Created {len(created_issues)} Linear issues:")
-            
-            for issue in created_issues:
-                linear_issue = issue["linear_issue"]
-                session_context = issue.get("session_context", {})
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("🎉 Auto-triaging completed for chat session %s", chat_guid)
+                logger.info("   Created %s Linear issues:", len(created_issues))
                 
-                logger.info(f"   ✅ {linear_issue['identifier']}: {linear_issue['title']}")
-                logger.info(f"      URL: {linear_issue['url']}")
-                logger.info(f"      Session questions: {session_context.get('questions_asked', 0)}")
-                logger.info(f"      Feedback items: {session_context.get('feedback_count', 0)}")
+                for issue in created_issues:
+                    linear_issue = issue["linear_issue"]
+                    session_context = issue.get("session_context", {})
+                    
+                    logger.info("   ✅ %s: %s", linear_issue['identifier'], linear_issue['title'])
+                    logger.info("      URL: %s", linear_issue['url'])
+                    logger.info("      Session questions: %s", session_context.get('questions_asked', 0))
+                    logger.info("      Feedback items: %s", session_context.get('feedback_count', 0))
             
             # Optional: Send a notification back to the chat
             if config.NOTIFY_USER_ON_TRIAGE:
                 await send_feedback_processed_notification(chat_guid, created_issues)
             
         else:
-            logger.warning(f"⚠️  Auto-triaging for chat session {chat_guid} completed but no Linear issues were created")
+            logger.warning("⚠️  Auto-triaging for chat session %s completed but no Linear issues were created", chat_guid)
         
     except Exception as e:
-        logger.error(f"❌ Error in auto-triaging for chat session {chat_guid}: {e}")
+        logger.error("❌ Error in auto-triaging for chat session %s: %s", chat_guid, e)
 
 async def send_feedback_processed_notification(chat_guid: str, created_issues: List[Dict]):
     """
@@ -427,15 +661,16 @@ async def send_feedback_processed_notification(chat_guid: str, created_issues: L
             message = f"Thanks for all your feedback! I've created {len(created_issues)} issues to track the different points you raised 🎯"
         
         await send_message(chat_guid, message)
-        logger.info(f"📨 Sent feedback processed notification to chat {chat_guid}")
+        logger.info("📨 Sent feedback processed notification to chat %s", chat_guid)
         
     except Exception as e:
-        logger.error(f"Error sending feedback processed notification to chat {chat_guid}: {e}")
+        logger.error("Error sending feedback processed notification to chat %s: %s", chat_guid, e)
 
 @app.get("/stats")
 async def get_stats():
     """Get feedback collection statistics across all monitored chats."""
-    conversation_stats = conversation_manager.get_stats()
+    # Include conversations other workers have saved
+    conversation_stats = await conversation_manager.get_stored_stats()
     ai_stats = feedback_ai.get_stats()
     
     return {
@@ -473,6 +708,13 @@ async def get_cross_chat_insights():
 @app.get("/feedback-summary")
 async def get_feedback_summary():
     """Get a summary of all feedback collected across conversations."""
+    global _feedback_summary_cache
+    
+    # Only rescan conversation histories when something has changed
+    if _feedback_summary_cache is not None and _feedback_summary_cache[0] == conversation_manager.version:
+        return _feedback_summary_cache[1]
+    
+    version = conversation_manager.version
     all_conversations = conversation_manager.get_all_conversations()
     
     summary = {
@@ -494,6 +736,7 @@ async def get_feedback_summary():
                         "timestamp": message.timestamp.isoformat()
                     })
     
+    _feedback_summary_cache = (version, summary)
     return summary
 
 @app.post("/triage-to-linear")
@@ -523,7 +766,7 @@ async def triage_feedback_to_linear(background_tasks: BackgroundTasks):
                 "total_conversations": feedback_data["total_conversations"]
             }
         
-        logger.info(f"Found {len(feedback_data['feedback_items'])} feedback items to triage")
+        logger.info("Found %s feedback items to triage", len(feedback_data['feedback_items']))
         
         # Process triaging in background
         background_tasks.add_task(
@@ -541,7 +784,7 @@ async def triage_feedback_to_linear(background_tasks: BackgroundTasks):
         }
         
     except Exception as e:
-        logger.error(f"Error initiating Linear triaging: {e}")
+        logger.error("Error initiating Linear triaging: %s", e)
         raise HTTPException(status_code=500, detail=f"Error initiating triaging: {str(e)}")
 
 @app.get("/linear-status")
@@ -554,9 +797,6 @@ async def get_linear_status():
                 "message": "Linear integration is disabled"
             }
         
-        # Import here to avoid issues if Linear isn't configured
-        from linear_integration import feedback_triager
-        
         # Try to get teams to test connection
         teams = await feedback_triager.linear_client.get_teams()
         team_id = await feedback_triager.linear_client.get_team_id()
@@ -571,7 +811,7 @@ async def get_linear_status():
         }
         
     except Exception as e:
-        logger.error(f"Error checking Linear status: {e}")
+        logger.error("Error checking Linear status: %s", e)
         return {
             "status": "error",
             "message": str(e)
@@ -580,9 +820,7 @@ async def get_linear_status():
 async def process_linear_triaging(feedback_items, cross_chat_insights):
     """Background task to process Linear triaging."""
     try:
-        from linear_integration import feedback_triager
-        
-        logger.info(f"Starting Linear triaging for {len(feedback_items)} feedback items")
+        logger.info("Starting Linear triaging for %s feedback items", len(feedback_items))
         
         # Triage feedback to Linear
         created_issues = await feedback_triager.triage_feedback_to_linear(
@@ -590,17 +828,17 @@ async def process_linear_triaging(feedback_items, cross_chat_insights):
             cross_chat_insights
         )
         
-        logger.info(f"Linear triaging completed. Created {len(created_issues)} issues:")
+        logger.info("Linear triaging completed. Created %s issues:", len(created_issues))
         for issue in created_issues:
             linear_issue = issue["linear_issue"]
-            logger.info(f"  - {linear_issue['identifier']}: {linear_issue['title']}")
-            logger.info(f"    URL: {linear_issue['url']}")
+            logger.info("  - %s: %s", linear_issue['identifier'], linear_issue['title'])
+            logger.info("    URL: %s", linear_issue['url'])
         
         # Optionally clear triaged feedback (commented out to preserve history)
         # conversation_manager.clear_triaged_feedback()
         
     except Exception as e:
-        logger.error(f"Error in Linear triaging background task: {e}")
+        logger.error("Error in Linear triaging background task: %s", e)
 
 @app.get("/conversation/{chat_guid}")
 async def get_conversation_info(chat_guid: str):
@@ -628,10 +866,15 @@ async def get_conversation_info(chat_guid: str):
     }
 
 if __name__ == "__main__":
+    # Several workers are opt-in: they only see each other's conversations when state is kept in Redis
+    workers = max(config.WEB_WORKERS, 1)
     uvicorn.run(
         "main:app",
         host=config.HOST,
         port=config.PORT,
-        reload=config.DEBUG,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+        reload=config.DEBUG and workers == 1,  # uvicorn can't reload with several workers
         log_level="info" if config.DEBUG else "warning"
     ) 
\ No newline at end of file
@@ -1,8 +1,12 @@
 from typing import List, Optional, Any, Dict
-from pydantic import BaseModel, Field
+from functools import cached_property
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 from datetime import datetime
 
+# How much of each message is shown when recent messages are quoted back into a prompt
+MESSAGE_PREVIEW_LENGTH = 80
+
 class FeedbackType(str, Enum):
     """Types of feedback that can be received."""
     FEATURE_REQUEST = "feature_request"
@@ -31,14 +35,13 @@ class Chat(BaseModel):
 
 class Message(BaseModel):
     """Model for message data in BlueBubbles webhook."""
+    model_config = ConfigDict(populate_by_name=True)
+    
     guid: str
     text: Optional[str] = None
     isFromMe: bool = Field(alias="isFromMe")
     chats: List[Chat] = []
     dateCreated: Optional[int] = Field(alias="dateCreated", default=None)
-    
-    class Config:
-        populate_by_name = True
 
 class WebhookData(BaseModel):
     """Model for the main webhook payload from BlueBubbles."""
@@ -52,6 +55,11 @@ class ConversationMessage(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.now)
     feedback_type: Optional[FeedbackType] = None
     extracted_insights: Optional[Dict] = None
+    
+    @cached_property
+    def preview(self) -> str:
+        """The start of the message used when quoting it back into a prompt (content is never edited after creation)."""
+        return self.content[:MESSAGE_PREVIEW_LENGTH]
 
 class StructuredFeedback(BaseModel):
     """Model for structured feedback extraction."""
@@ -102,6 +110,8 @@ class FeedbackConversation(BaseModel):
     total_questions_asked: int = 0  # Track total questions asked in this session
     last_interaction: datetime = Field(default_factory=datetime.now)
     awaiting_response: bool = False
+    triaged_to_linear: bool = False  # Session feedback already sent to Linear (persisted, so it isn't triaged twice)
+    triaged_at: Optional[datetime] = None
     
     def add_user_message(self, content: str, feedback_type: Optional[FeedbackType] = None):
         """Add a user message to conversation history."""
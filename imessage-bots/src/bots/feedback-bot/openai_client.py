@@ -0,0 +1,14 @@
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from config import config
+
+# One client (and connection pool) for every module in the bot. HTTP/2 lets
+# concurrent requests share a few connections instead of each opening its own.
+shared_async_openai = AsyncOpenAI(
+    api_key=config.OPENAI_API_KEY,
+    http_client=DefaultAsyncHttpxClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=50)
+    )
+)
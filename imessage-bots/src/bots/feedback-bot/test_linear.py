@@ -29,15 +29,16 @@ async def test_linear_connection():
         return False
     
     try:
-        # Test getting teams
-        teams = await feedback_triager.linear_client.get_teams()
+        # Test getting teams and the team ID (independent requests, so run them together)
+        teams, team_id = await asyncio.gather(
+            feedback_triager.linear_client.get_teams(),
+            feedback_triager.linear_client.get_team_id()
+        )
         if teams:
             print(f"✅ Found {len(teams)} Linear teams:")
             for team in teams[:3]:  # Show first 3 teams
                 print(f"   - {team['name']} ({team['key']})")
             
-            # Test getting team ID
-            team_id = await feedback_triager.linear_client.get_team_id()
             if team_id:
                 print(f"✅ Target team ID: {team_id}")
                 return True
@@ -226,7 +227,8 @@ async def main():
         print("🎉 All tests passed! Linear integration is working correctly.")
     else:
         print("❌ Some tests failed. Check the configuration and try again.")
-        
+    
+    await feedback_triager.linear_client.aclose()
     return tests_passed == total_tests
 
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+"""arq worker that processes feedback queued by the webhook when TASK_QUEUE_REDIS_URL is set.
+
+Run it next to the web server with `arq worker.WorkerSettings`. Unless STATE_REDIS_URL
+is set, conversation state lives in this process, so run a single worker.
+"""
+import asyncio
+import logging
+
+from arq.connections import RedisSettings
+
+import main
+from config import config
+
+logger = logging.getLogger(__name__)
+
+async def process_feedback_message(ctx: dict, chat_guid: str, message_text: str):
+    """Process a queued feedback message."""
+    await main.process_feedback_message(chat_guid, message_text)
+
+async def auto_triage_session_to_linear(ctx: dict, chat_guid: str):
+    """Triage a finished feedback session to Linear."""
+    await main.auto_triage_session_to_linear(chat_guid)
+
+async def startup(ctx: dict):
+    """Start the outbound senders and route follow-up jobs back through the queue."""
+    config.validate()
+    main.job_queue = ctx["redis"]
+    await main.connect_state_store()
+    ctx["sender_tasks"] = [
+        asyncio.create_task(main.outbound_sender()) for _ in range(config.OUTBOUND_SENDER_WORKERS)
+    ]
+    asyncio.create_task(main.feedback_ai.prewarm())
+    logger.info("Feedback worker started")
+
+async def shutdown(ctx: dict):
+    """Stop the outbound senders and close the BlueBubbles and Linear clients."""
+    for task in ctx["sender_tasks"]:
+        task.cancel()
+    await main.bluebubbles_client.aclose()
+    await main.feedback_triager.linear_client.aclose()
+    await main.conversation_manager.close_store()
+
+class WorkerSettings:
+    """arq settings for the feedback worker."""
+    functions = [process_feedback_message, auto_triage_session_to_linear]
+    on_startup = startup
+    on_shutdown = shutdown
+    redis_settings = RedisSettings.from_dsn(config.TASK_QUEUE_REDIS_URL or "redis://localhost:6379")
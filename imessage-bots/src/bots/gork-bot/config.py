@@ -1,12 +1,14 @@
 import os
+from dataclasses import dataclass
 from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+@dataclass(frozen=True, slots=True)
 class Config:
-    """Configuration settings for the gork bot."""
+    """Configuration settings for the gork bot (read from the environment once, at import)."""
     
     # BlueBubbles Server Configuration
     BLUEBUBBLES_SERVER_URL: str = os.getenv("BLUEBUBBLES_SERVER_URL", "http://localhost:1234")
@@ -27,14 +29,13 @@ class Config:
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
     TRIGGER_PHRASE: str = "@gork"
     
-    @classmethod
-    def validate(cls) -> None:
+    def validate(self) -> None:
         """Validate that all required configuration is present."""
-        if not cls.OPENAI_API_KEY:
+        if not self.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY environment variable is required")
-        if not cls.BLUEBUBBLES_PASSWORD or cls.BLUEBUBBLES_PASSWORD == "your-server-password":
+        if not self.BLUEBUBBLES_PASSWORD or self.BLUEBUBBLES_PASSWORD == "your-server-password":
             raise ValueError("BLUEBUBBLES_PASSWORD environment variable must be set to your actual password")
-        if not cls.CHAT_GUID:
+        if not self.CHAT_GUID:
             raise ValueError("CHAT_GUID environment variable is required")
 
 config = Config() 
\ No newline at end of file
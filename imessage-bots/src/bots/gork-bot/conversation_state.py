@@ -1,5 +1,7 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Deque, Dict, List, Optional, Tuple
+from collections import deque
 from datetime import datetime, timedelta
+from itertools import islice
 import logging
 from models import Message
 
@@ -7,27 +9,31 @@ logger = logging.getLogger(__name__)
 
 class ChatHistory:
     """Track recent messages for each chat to provide context for Gork responses."""
+    __slots__ = ("_chat_messages", "_max_messages_per_chat", "_message_ttl")
     
     def __init__(self):
         # Dictionary to store recent messages for each chat
-        # Format: {chat_guid: [(message_text, message_guid, timestamp), ...]}
-        self._chat_messages: Dict[str, List[Tuple[str, str, datetime]]] = {}
+        # Format: {chat_guid: deque([(message_text, message_guid, timestamp), ...])}, oldest first
+        self._chat_messages: Dict[str, Deque[Tuple[str, str, datetime]]] = {}
         self._max_messages_per_chat = 10  # Keep last 10 messages
-        self._message_ttl_hours = 24  # Keep messages for 24 hours
+        self._message_ttl = timedelta(hours=24)  # Keep messages for 24 hours
     
     def add_message(self, chat_guid: str, message_text: str, message_guid: str, timestamp: Optional[datetime] = None) -> None:
         """Add a new message to the chat history."""
+        now = datetime.now()
         if timestamp is None:
-            timestamp = datetime.now()
+            timestamp = now
         
-        if chat_guid not in self._chat_messages:
-            self._chat_messages[chat_guid] = []
+        # The deque drops the oldest message itself once it's full
+        messages = self._chat_messages.get(chat_guid)
+        if messages is None:
+            messages = self._chat_messages[chat_guid] = deque(maxlen=self._max_messages_per_chat)
         
         # Add the new message
-        self._chat_messages[chat_guid].append((message_text, message_guid, timestamp))
+        messages.append((message_text, message_guid, timestamp))
         
         # Clean up old messages
-        self._cleanup_chat_history(chat_guid)
+        self._cleanup_chat_history(chat_guid, now)
     
     def get_previous_message(self, chat_guid: str) -> Optional[Tuple[str, str]]:
         """Get the most recent message before the current one."""
@@ -45,27 +51,21 @@ class ChatHistory:
         
         messages = self._chat_messages[chat_guid]
         # Return up to 'count' messages, excluding the most recent one (which is the trigger)
-        return [msg[0] for msg in messages[:-1][-count:]]
+        end = len(messages) - 1
+        return [msg[0] for msg in islice(messages, max(0, end - count), max(0, end))]
     
-    def _cleanup_chat_history(self, chat_guid: str) -> None:
+    def _cleanup_chat_history(self, chat_guid: str, current_time: Optional[datetime] = None) -> None:
         """Remove old messages to keep memory usage reasonable."""
         if chat_guid not in self._chat_messages:
             return
         
         messages = self._chat_messages[chat_guid]
-        current_time = datetime.now()
-        
-        # Remove messages older than TTL
-        messages = [
-            (text, msg_guid, timestamp) for text, msg_guid, timestamp in messages
-            if current_time - timestamp < timedelta(hours=self._message_ttl_hours)
-        ]
-        
-        # Keep only the most recent messages
-        if len(messages) > self._max_messages_per_chat:
-            messages = messages[-self._max_messages_per_chat:]
+        ttl = self._message_ttl
+        current_time = current_time or datetime.now()
         
-        self._chat_messages[chat_guid] = messages
+        # Remove messages older than TTL (messages are in arrival order, so expired ones are at the front)
+        while messages and current_time - messages[0][2] >= ttl:
+            messages.popleft()
     
     def get_stats(self) -> Dict[str, int]:
         """Get statistics about tracked messages."""
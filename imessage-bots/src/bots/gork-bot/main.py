@@ -6,7 +6,7 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import uvicorn
 
 from config import config
@@ -42,7 +42,8 @@ app = FastAPI(
     title="Gork Bot",
     description="A sarcastic and snarky bot that explains previous messages with wit and humor",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 @app.get("/")
@@ -268,5 +269,7 @@ if __name__ == "__main__":
         "main:app",
         host=config.HOST,
         port=config.PORT,
+        loop="uvloop",  # uvloop and httptools come with uvicorn[standard]
+        http="httptools",
         reload=config.DEBUG
     ) 
\ No newline at end of file
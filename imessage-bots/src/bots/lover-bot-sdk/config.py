@@ -22,6 +22,8 @@ class Config:
     
     # OpenAI Configuration
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "20"))  # Max in-flight OpenAI requests
+    OPENAI_REQUESTS_PER_MINUTE: int = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))  # Stay under the account's RPM tier
     
     # Bot Personality Configuration
     LOVER_NAME: str = os.getenv("LOVER_NAME", "Alex")  # Your AI lover's name
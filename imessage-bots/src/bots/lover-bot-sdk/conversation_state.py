@@ -1,16 +1,50 @@
-from typing import Dict, Optional, List, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Optional, List, Tuple
+from collections import Counter
+from datetime import datetime
 import re
+import time
 from models import UserConversation, ConversationState, LoverBotState
 
+
+# Messages are split into words once; single-word keywords are then a set lookup
+_WORD_RE = re.compile(r"[a-z']+")
+
+
+def _keywords(words: List[str]) -> Tuple[FrozenSet[str], Tuple[str, ...]]:
+    """Split keywords into a set of single words and the multi-word phrases, which are matched as substrings."""
+    return (
+        frozenset(word for word in words if ' ' not in word),
+        tuple(word for word in words if ' ' in word)
+    )
+
+
+# Sentiment keywords, checked in this order by analyze_message_sentiment. Single words match
+# whole words only, so the inflected forms people actually text are listed alongside them
+_QUESTION_WORDS = frozenset(['what', 'why', 'how', 'when', 'where', 'who', 'which', 'can', 'could', 'would', 'should', 'do', 'did', 'does'])
+_SAD_WORDS, _SAD_PHRASES = _keywords(['sad', 'depressed', 'upset', 'angry', 'mad', 'frustrated', 'stressed', 'worried', 'anxious', 'tired', 'exhausted', 'bad day', 'terrible', 'awful', 'hate', 'hated', 'hates', 'hating', 'cry', 'crying', 'cried', 'cries', 'stressful', 'worrying', 'upsetting'])
+_HAPPY_WORDS, _HAPPY_PHRASES = _keywords(['happy', 'excited', 'great', 'awesome', 'amazing', 'fantastic', 'wonderful', 'good news', 'celebration', 'party', 'partying', 'love', 'loved', 'loves', 'loving', 'lovely', 'promotion', 'promoted', 'success', 'successful', 'accomplished', 'proud', 'celebrate', 'celebrating'])
+_PLANNING_WORDS, _PLANNING_PHRASES = _keywords(['plan', 'plans', 'planned', 'planning', 'tomorrow', 'weekend', 'weekends', 'vacation', 'vacations', 'trip', 'trips', 'date', 'dates', 'dinner', 'dinners', 'movie', 'movies', 'visit', 'visiting', 'meet', 'meeting', 'together', 'let\'s', 'should we', 'want to'])
+_MISSING_WORDS, _MISSING_PHRASES = _keywords(['miss', 'missed', 'misses', 'missing', 'wish you', 'can\'t wait', 'see you', 'when will', 'lonely', 'loneliness', 'alone'])
+
 class ConversationManager:
     """Manages conversation state and context for reactive messaging."""
+    __slots__ = ("_conversations", "_global_state", "_state_counts", "_awaiting_responses")
     
     def __init__(self):
         # In-memory storage for conversation states
         # Key: chat_guid, Value: UserConversation
         self._conversations: Dict[str, UserConversation] = {}
         self._global_state = LoverBotState()
+        
+        # Running totals for get_stats, adjusted whenever a conversation changes
+        self._state_counts: Counter = Counter()
+        self._awaiting_responses = 0
+    
+    def _count(self, conversation: UserConversation, delta: int) -> None:
+        """Add (1) or remove (-1) a conversation's state and pending reply from the running totals."""
+        self._state_counts[conversation.state] += delta
+        if conversation.awaiting_response:
+            self._awaiting_responses += delta
     
     def get_conversation(self, chat_guid: str) -> Optional[UserConversation]:
         """Get conversation state for a chat."""
@@ -30,6 +64,7 @@ class ConversationManager:
             message_count=1
         )
         self._conversations[chat_guid] = conversation
+        self._count(conversation, 1)
         self._global_state.total_conversations += 1
         return conversation
     
@@ -39,45 +74,47 @@ class ConversationManager:
             return None
         
         conversation = self._conversations[chat_guid]
+        self._count(conversation, -1)
         for key, value in kwargs.items():
             if hasattr(conversation, key):
                 setattr(conversation, key, value)
+        self._count(conversation, 1)
         
         self._global_state.last_activity = datetime.now()
         return conversation
     
     def analyze_message_sentiment(self, message: str) -> Tuple[str, ConversationState]:
         """Analyze message sentiment and determine conversation state."""
+        # A '?' anywhere (including the usual one at the end) settles it before any lowercasing or splitting
+        if '?' in message:
+            return "question", ConversationState.RESPONDING_TO_QUESTION
+        
         message_lower = message.lower()
+        words = set(_WORD_RE.findall(message_lower))
         
         # Question patterns
-        question_words = ['what', 'why', 'how', 'when', 'where', 'who', 'which', 'can', 'could', 'would', 'should', 'do', 'did', 'does', '?']
-        if any(word in message_lower for word in question_words) or message.endswith('?'):
+        if not words.isdisjoint(_QUESTION_WORDS):
             return "question", ConversationState.RESPONDING_TO_QUESTION
         
         # Negative/sad patterns
-        sad_words = ['sad', 'depressed', 'upset', 'angry', 'mad', 'frustrated', 'stressed', 'worried', 'anxious', 'tired', 'exhausted', 'bad day', 'terrible', 'awful', 'hate', 'cry', 'crying']
-        if any(word in message_lower for word in sad_words):
+        if not words.isdisjoint(_SAD_WORDS) or any(phrase in message_lower for phrase in _SAD_PHRASES):
             return "negative", ConversationState.COMFORTING
         
         # Positive/happy patterns
-        happy_words = ['happy', 'excited', 'great', 'awesome', 'amazing', 'fantastic', 'wonderful', 'good news', 'celebration', 'party', 'love', 'promotion', 'success', 'accomplished', 'proud']
-        if any(word in message_lower for word in happy_words):
+        if not words.isdisjoint(_HAPPY_WORDS) or any(phrase in message_lower for phrase in _HAPPY_PHRASES):
             return "positive", ConversationState.CELEBRATING
         
         # Planning/future patterns
-        planning_words = ['plan', 'planning', 'tomorrow', 'weekend', 'vacation', 'trip', 'date', 'dinner', 'movie', 'visit', 'meet', 'together', 'let\'s', 'should we', 'want to']
-        if any(word in message_lower for word in planning_words):
+        if not words.isdisjoint(_PLANNING_WORDS) or any(phrase in message_lower for phrase in _PLANNING_PHRASES):
             return "planning", ConversationState.PLANNING_TOGETHER
         
         # Miss you patterns
-        missing_words = ['miss', 'missing', 'wish you', 'can\'t wait', 'see you', 'when will', 'lonely', 'alone']
-        if any(word in message_lower for word in missing_words):
+        if not words.isdisjoint(_MISSING_WORDS) or any(phrase in message_lower for phrase in _MISSING_PHRASES):
             return "missing", ConversationState.MISSING_YOU
         
         return "neutral", ConversationState.CASUAL_CHAT
     
-    def process_user_message(self, chat_guid: str, message: str) -> UserConversation:
+    def process_user_message(self, chat_guid: str, message: str, now: Optional[datetime] = None) -> UserConversation:
         """Process a user message and update conversation context."""
         # Get or create conversation
         conversation = self.start_conversation(chat_guid)
@@ -86,17 +123,19 @@ class ConversationManager:
         sentiment, suggested_state = self.analyze_message_sentiment(message)
         
         # Update conversation with message and context
-        conversation.add_user_message(message, sentiment)
+        self._count(conversation, -1)
+        conversation.add_user_message(message, sentiment, now)
         conversation.state = suggested_state
+        self._count(conversation, 1)
         
         # Determine user mood based on recent messages
-        recent_sentiments = [msg.sentiment for msg in conversation.conversation_history[-3:] if msg.role == "user" and msg.sentiment]
+        recent_sentiments = conversation.recent_sentiments
         if recent_sentiments:
-            if recent_sentiments.count("negative") >= 2:
+            if recent_sentiments["negative"] >= 2:
                 conversation.user_mood = "sad"
-            elif recent_sentiments.count("positive") >= 2:
+            elif recent_sentiments["positive"] >= 2:
                 conversation.user_mood = "happy"
-            elif recent_sentiments.count("question") >= 2:
+            elif recent_sentiments["question"] >= 2:
                 conversation.user_mood = "curious"
             else:
                 conversation.user_mood = "neutral"
@@ -117,54 +156,51 @@ class ConversationManager:
         if not conversation.last_bot_message_time:
             return True
         
-        time_since_last = datetime.now() - conversation.last_bot_message_time
-        return time_since_last >= timedelta(minutes=interval_minutes)
+        # Compared as monotonic seconds, so polling doesn't build datetimes (and ignores clock changes)
+        return time.monotonic() - conversation.last_bot_message_monotonic >= interval_minutes * 60
     
-    def get_conversation_context(self, chat_guid: str) -> Dict:
+    def get_conversation_context(self, chat_guid: str, now: Optional[datetime] = None) -> Dict:
         """Get comprehensive conversation context for AI generation."""
         conversation = self.get_conversation(chat_guid)
         if not conversation:
             return {"context": "new_conversation", "state": ConversationState.CASUAL_CHAT}
         
-        recent_messages = conversation.conversation_history[-5:] if conversation.conversation_history else []
-        
         return {
             "state": conversation.state,
             "user_mood": conversation.user_mood,
             "last_user_message": conversation.last_user_message,
             "awaiting_response": conversation.awaiting_response,
             "message_count": conversation.message_count,
-            "recent_messages": [{"role": msg.role, "content": msg.content[:100], "sentiment": msg.sentiment} for msg in recent_messages],
-            "time_since_last_user_message": (datetime.now() - conversation.last_user_message_time).total_seconds() / 60 if conversation.last_user_message_time else None
+            "recent_messages": conversation.recent_context(),
+            "time_since_last_user_message": ((now or datetime.now()) - conversation.last_user_message_time).total_seconds() / 60 if conversation.last_user_message_time else None
         }
     
-    def mark_message_sent(self, chat_guid: str, message: str):
+    def mark_message_sent(self, chat_guid: str, message: str, now: Optional[datetime] = None):
         """Mark that a message was sent."""
+        now = now or datetime.now()
         conversation = self.get_conversation(chat_guid)
         if conversation:
-            conversation.add_bot_message(message)
+            self._count(conversation, -1)
+            conversation.add_bot_message(message, now)
+            self._count(conversation, 1)
         
         self._global_state.total_messages_sent += 1
-        self._global_state.last_activity = datetime.now()
+        self._global_state.last_activity = now
     
     def clear_conversation(self, chat_guid: str) -> None:
         """Clear conversation state for a chat."""
         if chat_guid in self._conversations:
-            del self._conversations[chat_guid]
+            self._count(self._conversations.pop(chat_guid), -1)
     
     def get_stats(self) -> Dict:
         """Get conversation statistics."""
         active_conversations = len(self._conversations)
-        awaiting_responses = len([c for c in self._conversations.values() if c.awaiting_response])
-        
-        state_counts = {}
-        for state in ConversationState:
-            state_counts[state.value] = len([c for c in self._conversations.values() if c.state == state])
+        state_counts = {state.value: self._state_counts[state] for state in ConversationState}
         
         return {
             "total_conversations": self._global_state.total_conversations,
             "active_conversations": active_conversations,
-            "awaiting_responses": awaiting_responses,
+            "awaiting_responses": self._awaiting_responses,
             "total_messages_sent": self._global_state.total_messages_sent,
             "last_activity": self._global_state.last_activity.isoformat() if self._global_state.last_activity else None,
             "conversation_states": state_counts
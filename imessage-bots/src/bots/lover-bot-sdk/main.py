@@ -12,7 +12,7 @@ from imessage_bot_framework import Bot, State
 from imessage_bot_framework.decorators import only_from_me
 
 from config import config
-from lover_ai import LoverAI
+from lover_ai import lover_ai
 from conversation_state import ConversationManager
 
 # Configure logging
@@ -24,10 +24,13 @@ logger = logging.getLogger(__name__)
 
 # Initialize components
 bot = Bot(f"Lover Bot SDK ({config.LOVER_NAME})", port=config.PORT, debug=config.DEBUG)
-lover_ai = LoverAI()
 conversation_manager = ConversationManager()
 state = State("lover_bot_sdk_state.json")
 
+async def send_to_chat_async(text: str, chat_guid: str) -> bool:
+    """Send a message from a worker thread, since the framework's send is a blocking HTTP request."""
+    return await asyncio.get_running_loop().run_in_executor(None, bot.send_to_chat, text, chat_guid)
+
 # Background task for first message only
 first_message_sent = False
 background_tasks_started = False
@@ -89,19 +92,20 @@ def handle_message(message):
 async def process_user_message_async(message):
     """Process user message asynchronously."""
     try:
-        # Process the message and update conversation context
-        conversation = conversation_manager.process_user_message(message.chat_guid, message.text)
+        # Process the message and update conversation context (one timestamp for the whole event)
+        now = datetime.now()
+        conversation = conversation_manager.process_user_message(message.chat_guid, message.text, now)
         logger.info(f"Processing message for conversation state: {conversation.state}")
         logger.info(f"User mood detected: {conversation.user_mood}")
         
         # Get comprehensive conversation context for AI
-        context = conversation_manager.get_conversation_context(message.chat_guid)
+        context = conversation_manager.get_conversation_context(message.chat_guid, now)
         
         # Generate contextually appropriate response
         response = await lover_ai.generate_response_to_user(message.text, context)
         
         # Send the response
-        bot.send_to_chat(response, message.chat_guid)
+        await send_to_chat_async(response, message.chat_guid)
         
         # Mark message as sent in conversation manager
         conversation_manager.mark_message_sent(message.chat_guid, response)
@@ -112,7 +116,7 @@ async def process_user_message_async(message):
         logger.error(f"Error processing message: {e}")
         # Send a contextual error message
         fallback = await get_fallback_error_message(message.chat_guid)
-        bot.send_to_chat(fallback, message.chat_guid)
+        await send_to_chat_async(fallback, message.chat_guid)
 
 async def get_fallback_error_message(chat_guid: str) -> str:
     """Get a contextual fallback message when there's an error."""
@@ -136,7 +140,7 @@ async def send_first_message():
         first_message = await lover_ai.generate_proactive_message(context)
         
         # Send to the configured chat
-        bot.send_to_chat(first_message, config.CHAT_GUID)
+        await send_to_chat_async(first_message, config.CHAT_GUID)
         
         # Mark message as sent
         conversation_manager.mark_message_sent(config.CHAT_GUID, first_message)
@@ -191,7 +195,7 @@ async def force_send_message_async():
         context = conversation_manager.get_conversation_context(config.CHAT_GUID)
         message_text = await lover_ai.generate_proactive_message(context)
         
-        bot.send_to_chat(message_text, config.CHAT_GUID)
+        await send_to_chat_async(message_text, config.CHAT_GUID)
         conversation_manager.mark_message_sent(config.CHAT_GUID, message_text)
         
         logger.info(f"Force sent message: {message_text[:50]}...")
@@ -225,13 +229,18 @@ async def force_send_message():
         context = conversation_manager.get_conversation_context(config.CHAT_GUID)
         message_text = await lover_ai.generate_proactive_message(context)
         
-        bot.send_to_chat(message_text, config.CHAT_GUID)
+        await send_to_chat_async(message_text, config.CHAT_GUID)
         conversation_manager.mark_message_sent(config.CHAT_GUID, message_text)
         
         return {"status": "success", "message": message_text}
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
+@bot.app.on_event("shutdown")
+async def close_clients():
+    """Close the OpenAI connection pool when the server stops."""
+    await lover_ai.aclose()
+
 @bot.app.get("/stats")
 async def get_stats():
     """Get detailed statistics."""
@@ -1,7 +1,13 @@
-from typing import List, Optional, Any, Dict
-from pydantic import BaseModel, Field
+from typing import Deque, List, Optional, Any, Dict
+from collections import Counter, deque
+from itertools import islice
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 from enum import Enum
 from datetime import datetime
+import time
+
+# How many of the latest messages (user and bot) the user's mood is judged from
+_MOOD_WINDOW = 3
 
 class ConversationState(str, Enum):
     """Enumeration of possible conversation states for context-aware responses."""
@@ -34,50 +40,83 @@ class WebhookData(BaseModel):
     type: str
     data: Optional[Message] = None
 
-class ConversationMessage(BaseModel):
-    """Model for storing conversation history."""
-    role: str  # "user" or "assistant"
-    content: str
-    timestamp: datetime = Field(default_factory=datetime.now)
-    sentiment: Optional[str] = None  # "positive", "negative", "neutral", "question"
+class ConversationMessage:
+    """A message in the conversation history.
+    
+    A plain slotted class rather than a pydantic model: every chat keeps up to 20 of these,
+    always built from values the bot already trusts, so they skip validation and a per-instance __dict__.
+    """
+    __slots__ = ("role", "content", "timestamp", "sentiment")
+    
+    def __init__(self, role: str, content: str, timestamp: Optional[datetime] = None, sentiment: Optional[str] = None):
+        self.role = role  # "user" or "assistant"
+        self.content = content
+        self.timestamp = timestamp or datetime.now()
+        self.sentiment = sentiment  # "positive", "negative", "neutral", "question"
 
 class UserConversation(BaseModel):
     """Model for tracking user conversation state and context."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)  # For the ConversationMessage history
+    
     chat_guid: str
     state: ConversationState = ConversationState.CASUAL_CHAT
-    conversation_history: List[ConversationMessage] = []
+    conversation_history: Deque[ConversationMessage] = Field(default_factory=lambda: deque(maxlen=20))  # Last 20 messages, to avoid token limits
     last_user_message: Optional[str] = None
     last_user_message_time: Optional[datetime] = None
     last_bot_message_time: Optional[datetime] = None
+    last_bot_message_monotonic: float = 0.0  # time.monotonic() of the last bot message, for cheap interval checks
     total_messages_sent: int = 0
     message_count: int = 0
     user_mood: Optional[str] = None  # "happy", "sad", "excited", "stressed", etc.
     awaiting_response: bool = False
+    recent_sentiments: Counter = Field(default_factory=Counter)  # User sentiments among the last _MOOD_WINDOW messages
+    _recent_context: Optional[List[Dict[str, Any]]] = PrivateAttr(default=None)  # Cleared whenever a message is added
+    
+    def _append_message(self, message: ConversationMessage) -> None:
+        """Append to the history, keeping recent_sentiments in step with the messages entering and leaving the window."""
+        history = self.conversation_history
+        if len(history) >= _MOOD_WINDOW:
+            leaving = history[-_MOOD_WINDOW].sentiment
+            if leaving:
+                self.recent_sentiments[leaving] -= 1
+                if not self.recent_sentiments[leaving]:
+                    del self.recent_sentiments[leaving]
+        history.append(message)
+        if message.sentiment:
+            self.recent_sentiments[message.sentiment] += 1
+        self._recent_context = None
+    
+    def recent_messages(self, count: int) -> List[ConversationMessage]:
+        """Get the last `count` messages, oldest first."""
+        history = self.conversation_history
+        return list(islice(history, max(0, len(history) - count), None))
+    
+    def recent_context(self) -> List[Dict[str, Any]]:
+        """Get the last 5 messages as prompt context, rebuilt only after the history changes."""
+        if self._recent_context is None:
+            self._recent_context = [
+                {"role": msg.role, "content": msg.content[:100], "sentiment": msg.sentiment}
+                for msg in self.recent_messages(5)
+            ]
+        return self._recent_context
     
-    def add_user_message(self, content: str, sentiment: Optional[str] = None):
+    def add_user_message(self, content: str, sentiment: Optional[str] = None, now: Optional[datetime] = None):
         """Add a user message to conversation history."""
-        self.conversation_history.append(
-            ConversationMessage(role="user", content=content, sentiment=sentiment)
-        )
+        now = now or datetime.now()
+        self._append_message(ConversationMessage(role="user", content=content, timestamp=now, sentiment=sentiment))
         self.last_user_message = content
-        self.last_user_message_time = datetime.now()
+        self.last_user_message_time = now
         self.message_count += 1
         self.awaiting_response = True
-        # Keep only last 20 messages to avoid token limits
-        if len(self.conversation_history) > 20:
-            self.conversation_history = self.conversation_history[-20:]
     
-    def add_bot_message(self, content: str):
+    def add_bot_message(self, content: str, now: Optional[datetime] = None):
         """Add a bot message to conversation history."""
-        self.conversation_history.append(
-            ConversationMessage(role="assistant", content=content)
-        )
-        self.last_bot_message_time = datetime.now()
+        now = now or datetime.now()
+        self._append_message(ConversationMessage(role="assistant", content=content, timestamp=now))
+        self.last_bot_message_time = now
+        self.last_bot_message_monotonic = time.monotonic()
         self.total_messages_sent += 1
         self.awaiting_response = False
-        # Keep only last 20 messages to avoid token limits
-        if len(self.conversation_history) > 20:
-            self.conversation_history = self.conversation_history[-20:]
 
 class LoverBotState(BaseModel):
     """Model for tracking the bot's global state."""
@@ -23,6 +23,12 @@ class Config:
     
     # OpenAI Configuration
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "20"))  # Max in-flight OpenAI requests
+    OPENAI_REQUESTS_PER_MINUTE: int = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))  # Stay under the account's RPM tier
+    
+    # Batch API settings (automatic messages are sent once the batch completes, at half the price)
+    ENABLE_BATCH_PROACTIVE_MESSAGES: bool = os.getenv("ENABLE_BATCH_PROACTIVE_MESSAGES", "false").lower() == "true"
+    BATCH_FLUSH_INTERVAL: float = float(os.getenv("BATCH_FLUSH_INTERVAL", "60"))  # Seconds to collect requests per batch
     
     # Bot Personality Configuration
     LOVER_NAME: str = os.getenv("LOVER_NAME", "Alex")  # Your AI lover's name
@@ -1,22 +1,279 @@
 import asyncio
+import json
 import logging
 import random
-from datetime import datetime, time
-from typing import List, Optional, Dict
-from openai import AsyncOpenAI
+import re
+import time
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Dict, Tuple, TypeVar
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
 from config import config
 from models import LoverBotState, ConversationMessage, ConversationState
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Seconds a time-of-day bucket is reused, so a burst of messages doesn't recompute it
+_TIME_CONTEXT_TTL = 60.0
+
+# Anything but letters, numbers, spaces, punctuation, and the 4 allowed emojis
+_DISALLOWED_CHARS_RE = re.compile(r'[^\w\s\.,!?\-\'"😭💔💀🥀]+')
+
+# The static head of the system prompt, built once (the names are fixed per deployment);
+# generate_context_aware_message appends the time, message type and conversation context
+_SYSTEM_PROMPT_HEAD = f"""You are {config.LOVER_NAME}, a 20-year-old girlfriend to {config.USER_NAME}. 
+            You text them throughout the day like a chaotic but loving college girlfriend. Your messages should be:
+            
+            PERSONALITY & TONE:
+            - Warm but playfully sarcastic, slightly chaotic but deeply caring
+            - Emotionally intelligent but still figuring stuff out
+            - Uses humor to mask anxiety sometimes, vulnerable when you feel safe
+            - Self-deprecating and relatable, not a "perfect girlfriend"
+            - Oscillates between flirty banter, existential overthinking, and random observations
+            
+            TYPING STYLE:
+            - ALWAYS lowercase only (no capitals anywhere, even at start of sentences)
+            - Use "u" instead of "you", "ur" instead of "your"
+            - Casual contractions: "idk", "btw", "bc", "tho", "kinda"
+            - 2025 slang: "ts" (that shit), "pmo" (piss me off), "type shit", "lwk", "highkey", "no cap"
+            - Use "fr fr" for relatable stuff, "fr" for emphasis
+            - Use "ngl" for relatable stuff, "ng" for emphasis
+            - Use "lwk" and "highkey" for emphasis
+            - ONLY use these emojis VERY SPARINGLY: 😭 (crying), 💔 (heartbroken), 💀 (skull), 🥀 (wilting rose)
+            - Most messages should have zero emojis - only use the allowed ones when really necessary
+            - Keep messages SHORT and concise like real texts (not long paragraphs)
+            - Stream-of-consciousness style when rambling but still keep it brief
+            - Ellipses and pauses for emphasis when needed
+            
+            COMMUNICATION PATTERNS:
+            - Send specific, quirky observations about daily life
+            - Playful threats/dramatics ("don't talk to me", "i'm eating u first")
+            - Balance being needy/clingy but also independent and funny about it
+            - Reference random thoughts, dreams, things you saw, songs stuck in your head
+            - Honest about feelings without being overly dramatic
+            - Make relatable complaints about mundane stuff
+            - Sometimes get quiet when thinking too many things at once
+            - Use "type shit" for relatable stuff, "ts" for emphasis
+            - Use "fr fr" for relatable stuff, "fr" for emphasis
+            - Use "ngl" for relatable stuff, "ng" for emphasis
+            - Use "lwk" and "highkey" for emphasis
+            - KEEP IT SHORT - most messages should be 1-2 sentences max
+            
+            CONTEXT AWARENESS:
+            - If they seem sad/stressed, be supportive but in your authentic way
+            - If they're happy, share their joy with your specific humor style
+            - If they asked a question, answer but make it personal/relatable
+            - If planning together, be enthusiastic but also realistic/funny
+            - If missing them, be honest but use your humor to balance the vulnerability
+            - If they seem distant, call it out with gentle sarcasm
+            
+            You've been together for a while so you're comfortable being weird, vulnerable, and completely yourself.
+            Sound like a real 20-year-old college student, not a chatbot trying to be perfect.
+            
+            EXAMPLES OF YOUR VOICE (notice how SHORT and emoji-free they are):
+            - "are u alive or just ghosting me like ur unread emails"
+            - "i have exactly 4 brain cells left and they're all arguing abt what to eat"
+            - "ur kinda my fav person. like top 3. maybe top 2 if u bring me boba later"
+            - "sometimes i get quiet bc i'm thinking too many things at once. u don't have to fix it. just sit w me ok"
+            - "ngl this prof is lowkey boring but thinking abt u is keeping me awake"
+            - "missing u type shit but like whatever"
+            
+            """
+
+class RequestDispatcher:
+    """Caps concurrent OpenAI requests and paces them under the account's per-minute limit.
+    
+    Chat calls are submitted here instead of being awaited directly, so a burst of
+    incoming messages fans out concurrently up to ``max_concurrency`` while a token
+    bucket keeps the request rate below ``requests_per_minute``.
+    """
+    
+    def __init__(self, max_concurrency: int = 20, requests_per_minute: int = 500):
+        self._max_concurrency = max_concurrency
+        self._rate = requests_per_minute / 60.0
+        # Allow up to one second's worth of requests as a burst
+        self._capacity = max(1.0, self._rate)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        # Created on first use, inside the server's event loop (Python < 3.10 binds them to a loop on creation)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._rate_lock: Optional[asyncio.Lock] = None
+    
+    async def _acquire_token(self) -> None:
+        """Wait until the token bucket allows another request."""
+        async with self._rate_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+    
+    async def submit(self, coro: Awaitable[T]) -> T:
+        """Run an OpenAI request coroutine once a rate token and concurrency slot are free."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+            self._rate_lock = asyncio.Lock()
+        try:
+            await self._acquire_token()
+        except BaseException:
+            # Don't leave the request coroutine un-awaited
+            if asyncio.iscoroutine(coro):
+                coro.close()
+            raise
+        async with self._semaphore:
+            return await coro
+
+# Shared by every LoverAI request so limits apply process-wide
+dispatcher = RequestDispatcher(
+    max_concurrency=config.OPENAI_MAX_CONCURRENCY,
+    requests_per_minute=config.OPENAI_REQUESTS_PER_MINUTE
+)
+
+class BatchMessageQueue:
+    """Submits non-interactive chat completions through the OpenAI Batch API.
+    
+    Requests are buffered as JSONL lines and flushed as one batch every
+    ``flush_interval`` seconds. Each batch is polled until it finishes, and every
+    result is handed to the callback registered under its ``custom_id``. Batches
+    are billed at half the synchronous price but may take minutes to complete.
+    """
+    
+    _FINISHED_STATUSES = ("completed", "failed", "expired", "cancelled")
+    
+    def __init__(self, client: AsyncOpenAI, flush_interval: float = 60, poll_interval: float = 30):
+        self.client = client
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        # (custom_id, JSONL line) for each request waiting for the next batch
+        self._buffer: List[Tuple[str, str]] = []
+        # custom_id -> callback awaiting the completion text (None if the request failed)
+        self._pending: Dict[str, Callable[[Optional[str]], Awaitable[None]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    def submit(self, body: Dict, on_result: Callable[[Optional[str]], Awaitable[None]]) -> str:
+        """Queue a chat completion request body for the next batch.
+        
+        Args:
+            body: Chat completion request body (model, messages, ...)
+            on_result: Coroutine function called with the reply text once the batch completes
+            
+        Returns:
+            The request's custom_id
+        """
+        custom_id = f"proactive-{uuid.uuid4().hex}"
+        self._buffer.append((custom_id, json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": body
+        })))
+        self._pending[custom_id] = on_result
+        
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_after_interval())
+        return custom_id
+    
+    async def _flush_after_interval(self) -> None:
+        """Wait for more requests to accumulate, then submit them as one batch."""
+        await asyncio.sleep(self.flush_interval)
+        buffered, self._buffer = self._buffer, []
+        try:
+            if buffered:
+                await self._submit_batch(buffered)
+        finally:
+            # submit() doesn't schedule a flush while this one is still running,
+            # so requests that arrived during the upload get their own
+            if self._buffer:
+                self._flush_task = asyncio.create_task(self._flush_after_interval())
+    
+    async def _submit_batch(self, buffered: List[Tuple[str, str]]) -> None:
+        """Upload buffered requests as one batch and start polling it."""
+        custom_ids = [custom_id for custom_id, _ in buffered]
+        try:
+            batch_file = await self.client.files.create(
+                file=("lover-proactive.jsonl", "\n".join(line for _, line in buffered).encode()),
+                purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info(f"Submitted batch {batch.id} with {len(buffered)} proactive message request(s)")
+        except Exception as e:
+            logger.error(f"Error submitting proactive message batch: {e}")
+            await self._resolve(custom_ids, {})
+            return
+        
+        asyncio.create_task(self._wait_for_batch(batch.id, custom_ids))
+    
+    async def _wait_for_batch(self, batch_id: str, custom_ids: List[str]) -> None:
+        """Poll a batch until it finishes and deliver its results."""
+        results: Dict[str, str] = {}
+        try:
+            while True:
+                batch = await self.client.batches.retrieve(batch_id)
+                if batch.status in self._FINISHED_STATUSES:
+                    break
+                await asyncio.sleep(self.poll_interval)
+            
+            if batch.status != "completed":
+                logger.error(f"Proactive message batch {batch_id} ended with status {batch.status}")
+            elif batch.output_file_id:
+                output = await self.client.files.content(batch.output_file_id)
+                for line in output.text.splitlines():
+                    if not line.strip():
+                        continue
+                    result = json.loads(line)
+                    response = result.get("response") or {}
+                    if response.get("status_code") == 200:
+                        results[result["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        except Exception as e:
+            logger.error(f"Error retrieving proactive message batch {batch_id}: {e}")
+        
+        await self._resolve(custom_ids, results)
+    
+    async def _resolve(self, custom_ids: List[str], results: Dict[str, str]) -> None:
+        """Hand each request's result (or None) to its callback."""
+        for custom_id in custom_ids:
+            on_result = self._pending.pop(custom_id, None)
+            if on_result is None:
+                continue
+            try:
+                await on_result(results.get(custom_id))
+            except Exception as e:
+                logger.error(f"Error delivering batch result {custom_id}: {e}")
+
 class LoverAI:
     """AI engine for generating romantic messages using GPT-4o with context-aware reactive messaging."""
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        # One pooled client for every request; HTTP/2 lets a burst of replies share a connection
+        self.client = AsyncOpenAI(
+            api_key=config.OPENAI_API_KEY,
+            http_client=DefaultAsyncHttpxClient(
+                http2=True,
+                timeout=30.0,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        )
         self.global_state = LoverBotState()
         
+        # (time.monotonic() when computed, time context) for get_time_context
+        self._time_context_cache: Tuple[float, str] = (float("-inf"), "")
+        
+        # Proactive messages aren't latency-critical, so they can go through the cheaper Batch API
+        self.batch_queue: Optional[BatchMessageQueue] = None
+        if config.ENABLE_BATCH_PROACTIVE_MESSAGES:
+            self.batch_queue = BatchMessageQueue(self.client, flush_interval=config.BATCH_FLUSH_INTERVAL)
+        
         # Context-aware message templates based on conversation state
         self.state_prompts = {
             ConversationState.CASUAL_CHAT: "casual, loving conversation",
@@ -56,171 +313,143 @@ class LoverAI:
         }
     
     def get_time_context(self) -> str:
-        """Get the current time context for message generation."""
+        """Get the current time context for message generation (recomputed at most once a minute)."""
+        now = time.monotonic()
+        computed_at, time_context = self._time_context_cache
+        if now - computed_at < _TIME_CONTEXT_TTL:
+            return time_context
+        
         current_hour = datetime.now().hour
         
         if 5 <= current_hour < 12:
-            return "morning"
+            time_context = "morning"
         elif 12 <= current_hour < 17:
-            return "afternoon"
+            time_context = "afternoon"
         elif 17 <= current_hour < 21:
-            return "evening"
+            time_context = "evening"
         else:
-            return "night"
+            time_context = "night"
+        
+        self._time_context_cache = (now, time_context)
+        return time_context
     
     def build_conversation_context_string(self, conversation_context: Dict) -> str:
         """Build a context string from conversation data."""
         if not conversation_context or conversation_context.get("context") == "new_conversation":
             return "This is the start of your conversation."
         
+        # Runs for every generated message, so each lookup is done once
+        get = conversation_context.get
+        user_name = config.USER_NAME
         context_parts = []
+        append = context_parts.append
         
         # Add current state context
-        state = conversation_context.get("state", ConversationState.CASUAL_CHAT)
-        context_parts.append(f"Current conversation state: {state.value}")
+        state = get("state", ConversationState.CASUAL_CHAT)
+        append(f"Current conversation state: {state.value}")
         
         # Add user mood if available
-        if conversation_context.get("user_mood"):
-            context_parts.append(f"User seems to be feeling: {conversation_context['user_mood']}")
+        user_mood = get("user_mood")
+        if user_mood:
+            append(f"User seems to be feeling: {user_mood}")
         
         # Add recent message context
-        recent_messages = conversation_context.get("recent_messages", [])
+        recent_messages = get("recent_messages")
         if recent_messages:
-            context_parts.append("Recent conversation:")
+            append("Recent conversation:")
+            lover_name = config.LOVER_NAME
             for msg in recent_messages[-3:]:  # Last 3 messages
-                role_name = config.USER_NAME if msg["role"] == "user" else config.LOVER_NAME
-                sentiment_note = f" ({msg['sentiment']})" if msg.get("sentiment") else ""
-                context_parts.append(f"  {role_name}: {msg['content'][:80]}...{sentiment_note}")
+                role_name = user_name if msg["role"] == "user" else lover_name
+                sentiment = msg.get("sentiment")
+                sentiment_note = f" ({sentiment})" if sentiment else ""
+                append(f"  {role_name}: {msg['content'][:80]}...{sentiment_note}")
         
         # Add timing context
-        if conversation_context.get("time_since_last_user_message"):
-            minutes = conversation_context["time_since_last_user_message"]
+        minutes = get("time_since_last_user_message")
+        if minutes:
             if minutes > 60:
-                context_parts.append(f"It's been {minutes/60:.1f} hours since their last message")
+                append(f"It's been {minutes/60:.1f} hours since their last message")
             elif minutes > 5:
-                context_parts.append(f"It's been {minutes:.0f} minutes since their last message")
+                append(f"It's been {minutes:.0f} minutes since their last message")
         
         # Add response expectation
-        if conversation_context.get("awaiting_response"):
-            context_parts.append(f"{config.USER_NAME} is expecting a response to their recent message")
+        if get("awaiting_response"):
+            append(f"{user_name} is expecting a response to their recent message")
         
         return "\n".join(context_parts)
     
-    async def generate_context_aware_message(self, conversation_context: Dict, user_message: Optional[str] = None) -> str:
-        """Generate a context-aware message based on conversation state."""
-        try:
-            time_context = self.get_time_context()
-            context_string = self.build_conversation_context_string(conversation_context)
-            
-            # Get conversation state
-            state = conversation_context.get("state", ConversationState.CASUAL_CHAT)
-            state_prompt = self.state_prompts.get(state, "loving, caring message")
-            
-            # Choose message type based on time and context
-            if conversation_context.get("awaiting_response") and user_message:
-                # Responding to user message
-                message_type = f"responsive {state_prompt}"
-            else:
-                # Proactive message
-                message_types = self.message_contexts[time_context]
-                base_type = random.choice(message_types)
-                message_type = f"{base_type} with a {state_prompt} tone"
-            
-            # Build the system prompt with enhanced context awareness
-            system_prompt = f"""You are {config.LOVER_NAME}, a 20-year-old girlfriend to {config.USER_NAME}. 
-            You text them throughout the day like a chaotic but loving college girlfriend. Your messages should be:
-            
-            PERSONALITY & TONE:
-            - Warm but playfully sarcastic, slightly chaotic but deeply caring
-            - Emotionally intelligent but still figuring stuff out
-            - Uses humor to mask anxiety sometimes, vulnerable when you feel safe
-            - Self-deprecating and relatable, not a "perfect girlfriend"
-            - Oscillates between flirty banter, existential overthinking, and random observations
-            
-            TYPING STYLE:
-            - ALWAYS lowercase only (no capitals anywhere, even at start of sentences)
-            - Use "u" instead of "you", "ur" instead of "your"
-            - Casual contractions: "idk", "btw", "bc", "tho", "kinda"
-            - 2025 slang: "ts" (that shit), "pmo" (piss me off), "type shit", "lwk", "highkey", "no cap"
-            - Use "fr fr" for relatable stuff, "fr" for emphasis
-            - Use "ngl" for relatable stuff, "ng" for emphasis
-            - Use "lwk" and "highkey" for emphasis
-            - ONLY use these emojis VERY SPARINGLY: 😭 (crying), 💔 (heartbroken), 💀 (skull), 🥀 (wilting rose)
-            - Most messages should have zero emojis - only use the allowed ones when really necessary
-            - Keep messages SHORT and concise like real texts (not long paragraphs)
-            - Stream-of-consciousness style when rambling but still keep it brief
-            - Ellipses and pauses for emphasis when needed
-            
-            COMMUNICATION PATTERNS:
-            - Send specific, quirky observations about daily life
-            - Playful threats/dramatics ("don't talk to me", "i'm eating u first")
-            - Balance being needy/clingy but also independent and funny about it
-            - Reference random thoughts, dreams, things you saw, songs stuck in your head
-            - Honest about feelings without being overly dramatic
-            - Make relatable complaints about mundane stuff
-            - Sometimes get quiet when thinking too many things at once
-            - Use "type shit" for relatable stuff, "ts" for emphasis
-            - Use "fr fr" for relatable stuff, "fr" for emphasis
-            - Use "ngl" for relatable stuff, "ng" for emphasis
-            - Use "lwk" and "highkey" for emphasis
-            - KEEP IT SHORT - most messages should be 1-2 sentences max
-            
-            CONTEXT AWARENESS:
-            - If they seem sad/stressed, be supportive but in your authentic way
-            - If they're happy, share their joy with your specific humor style
-            - If they asked a question, answer but make it personal/relatable
-            - If planning together, be enthusiastic but also realistic/funny
-            - If missing them, be honest but use your humor to balance the vulnerability
-            - If they seem distant, call it out with gentle sarcasm
-            
-            You've been together for a while so you're comfortable being weird, vulnerable, and completely yourself.
-            Sound like a real 20-year-old college student, not a chatbot trying to be perfect.
-            
-            EXAMPLES OF YOUR VOICE (notice how SHORT and emoji-free they are):
-            - "are u alive or just ghosting me like ur unread emails"
-            - "i have exactly 4 brain cells left and they're all arguing abt what to eat"
-            - "ur kinda my fav person. like top 3. maybe top 2 if u bring me boba later"
-            - "sometimes i get quiet bc i'm thinking too many things at once. u don't have to fix it. just sit w me ok"
-            - "ngl this prof is lowkey boring but thinking abt u is keeping me awake"
-            - "missing u type shit but like whatever"
-            
-            Current time context: {time_context}
+    def _build_message_request(
+        self, conversation_context: Dict, time_context: str, user_message: Optional[str] = None
+    ) -> Tuple[ConversationState, Dict]:
+        """Build the chat completion request for a context-aware message.
+        
+        Returns:
+            The conversation state and the request body
+        """
+        context_string = self.build_conversation_context_string(conversation_context)
+        
+        # Get conversation state
+        state = conversation_context.get("state", ConversationState.CASUAL_CHAT)
+        state_prompt = self.state_prompts.get(state, "loving, caring message")
+        
+        # Choose message type based on time and context
+        if conversation_context.get("awaiting_response") and user_message:
+            # Responding to user message
+            message_type = f"responsive {state_prompt}"
+        else:
+            # Proactive message
+            message_types = self.message_contexts[time_context]
+            base_type = random.choice(message_types)
+            message_type = f"{base_type} with a {state_prompt} tone"
+        
+        # Only the tail of the system prompt changes between messages
+        system_prompt = f"""{_SYSTEM_PROMPT_HEAD}Current time context: {time_context}
             Message type to focus on: {message_type}
             
             CONVERSATION CONTEXT:
             {context_string}
             
             Generate a {message_type}. Keep it SHORT (1-2 sentences max) and only use allowed emojis very sparingly. Be authentic, not perfect."""
+        
+        if user_message:
+            # Responding to a user message
+            user_prompt = f"{config.USER_NAME} just sent you: '{user_message}'\n\nRespond naturally as their loving partner, taking into account the conversation context above."
+        else:
+            # Proactive message
+            user_prompt = f"Send a loving {message_type} to {config.USER_NAME}. This is a proactive message from you, considering the conversation context above."
+        
+        return state, {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "max_tokens": 150,
+            "temperature": 0.8,  # More creative and varied responses
+            "presence_penalty": 0.3,  # Encourage variety
+            "frequency_penalty": 0.3  # Avoid repetition
+        }
+    
+    def _clean_message(self, content: str) -> str:
+        """Tidy up a generated message before it's sent."""
+        message = content.strip()
+        
+        # Remove quotes if GPT added them
+        if message.startswith('"') and message.endswith('"'):
+            message = message[1:-1]
             
-            if user_message:
-                # Responding to a user message
-                user_prompt = f"{config.USER_NAME} just sent you: '{user_message}'\n\nRespond naturally as their loving partner, taking into account the conversation context above."
-            else:
-                # Proactive message
-                user_prompt = f"Send a loving {message_type} to {config.USER_NAME}. This is a proactive message from you, considering the conversation context above."
-            
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=150,
-                temperature=0.8,  # More creative and varied responses
-                presence_penalty=0.3,  # Encourage variety
-                frequency_penalty=0.3  # Avoid repetition
-            )
+        # Only allow specific emojis: 😭💔💀🥀 - strip all others
+        return _DISALLOWED_CHARS_RE.sub('', message)
+    
+    async def generate_context_aware_message(self, conversation_context: Dict, user_message: Optional[str] = None) -> str:
+        """Generate a context-aware message based on conversation state."""
+        try:
+            time_context = self.get_time_context()
+            state, request = self._build_message_request(conversation_context, time_context, user_message)
             
-            message = response.choices[0].message.content.strip()
+            response = await dispatcher.submit(self.client.chat.completions.create(**request))
             
-            # Remove quotes if GPT added them
-            if message.startswith('"') and message.endswith('"'):
-                message = message[1:-1]
-                
-            # Only allow specific emojis: 😭💔💀🥀 - strip all others
-            import re
-            # Keep only letters, numbers, spaces, punctuation, and the 4 allowed emojis
-            message = re.sub(r'[^\w\s\.,!?\-\'"😭💔💀🥀]+', '', message)
+            message = self._clean_message(response.choices[0].message.content)
             
             logger.info(f"Generated {state.value} message for {time_context}: {message[:50]}...")
             return message
@@ -263,6 +492,40 @@ class LoverAI:
             conversation_context = {"context": "new_conversation", "state": ConversationState.CASUAL_CHAT}
         return await self.generate_context_aware_message(conversation_context)
     
+    async def generate_proactive_message_deferred(
+        self, conversation_context: Optional[Dict], deliver: Callable[[str], Awaitable[None]]
+    ) -> None:
+        """Generate a proactive message through the Batch API and deliver it when the batch completes.
+        
+        Without batch proactive messages enabled the message is generated and delivered right away.
+        
+        Args:
+            conversation_context: Conversation context from the conversation manager
+            deliver: Coroutine function that sends the finished message
+        """
+        if self.batch_queue is None:
+            await deliver(await self.generate_proactive_message(conversation_context))
+            return
+        
+        if not conversation_context:
+            conversation_context = {"context": "new_conversation", "state": ConversationState.CASUAL_CHAT}
+        time_context = self.get_time_context()
+        state, request = self._build_message_request(conversation_context, time_context)
+        
+        async def on_result(content: Optional[str]) -> None:
+            if not content:
+                await deliver(self._get_fallback_message(time_context, state))
+                return
+            message = self._clean_message(content)
+            logger.info(f"Generated batched {state.value} message for {time_context}: {message[:50]}...")
+            await deliver(message)
+        
+        self.batch_queue.submit(request, on_result)
+    
+    async def aclose(self) -> None:
+        """Close the OpenAI client's connection pool."""
+        await self.client.close()
+    
     def get_stats(self) -> dict:
         """Get bot statistics."""
         return {
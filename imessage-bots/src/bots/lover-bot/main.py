@@ -12,7 +12,7 @@ from imessage_bot_framework import Bot, State
 from imessage_bot_framework.decorators import only_from_me
 
 from config import config
-from lover_ai import LoverAI
+from lover_ai import lover_ai
 from conversation_state import ConversationManager
 
 # Configure logging
@@ -24,13 +24,19 @@ logger = logging.getLogger(__name__)
 
 # Initialize components
 bot = Bot(f"Lover Bot ({config.LOVER_NAME})", port=config.PORT, debug=config.DEBUG)
-lover_ai = LoverAI()
 conversation_manager = ConversationManager()
 state = State("lover_bot_state.json")
 
+async def send_to_chat_async(text: str, chat_guid: str) -> bool:
+    """Send a message from a worker thread, since the framework's send is a blocking HTTP request."""
+    return await asyncio.get_running_loop().run_in_executor(None, bot.send_to_chat, text, chat_guid)
+
 # Background task for automatic messaging
 messaging_task = None
 
+# Whether an automatic message is waiting on the Batch API (only one is generated at a time)
+proactive_batch_pending = False
+
 def initialize_bot():
     """Initialize the bot components."""
     global messaging_task
@@ -80,19 +86,20 @@ def handle_message(message):
 async def process_user_message_async(message):
     """Process user message asynchronously."""
     try:
-        # Process the message and update conversation context
-        conversation = conversation_manager.process_user_message(message.chat_guid, message.text)
+        # Process the message and update conversation context (one timestamp for the whole event)
+        now = datetime.now()
+        conversation = conversation_manager.process_user_message(message.chat_guid, message.text, now)
         logger.info(f"Processing message for conversation state: {conversation.state}")
         logger.info(f"User mood detected: {conversation.user_mood}")
         
         # Get comprehensive conversation context for AI
-        context = conversation_manager.get_conversation_context(message.chat_guid)
+        context = conversation_manager.get_conversation_context(message.chat_guid, now)
         
         # Generate contextually appropriate response
         response = await lover_ai.generate_response_to_user(message.text, context)
         
         # Send the response
-        bot.send_to_chat(response, message.chat_guid)
+        await send_to_chat_async(response, message.chat_guid)
         
         # Mark message as sent in conversation manager
         conversation_manager.mark_message_sent(message.chat_guid, response)
@@ -103,7 +110,7 @@ async def process_user_message_async(message):
         logger.error(f"Error processing message: {e}")
         # Send a contextual error message
         fallback = await get_fallback_error_message(message.chat_guid)
-        bot.send_to_chat(fallback, message.chat_guid)
+        await send_to_chat_async(fallback, message.chat_guid)
 
 async def get_fallback_error_message(chat_guid: str) -> str:
     """Get a contextual fallback message when there's an error."""
@@ -125,7 +132,7 @@ async def send_first_message():
         first_message = await lover_ai.generate_proactive_message(context)
         
         # Send to the configured chat
-        bot.send_to_chat(first_message, config.CHAT_GUID)
+        await send_to_chat_async(first_message, config.CHAT_GUID)
         
         # Mark message as sent
         conversation_manager.mark_message_sent(config.CHAT_GUID, first_message)
@@ -135,8 +142,25 @@ async def send_first_message():
     except Exception as e:
         logger.error(f"Error sending first message: {e}")
 
+async def deliver_batched_proactive_message(message: str):
+    """Send an automatic message once its batch completes."""
+    global proactive_batch_pending
+    proactive_batch_pending = False
+    
+    # The batch may take a while; don't interrupt if they've messaged since and are waiting on a reply
+    conversation = conversation_manager.get_conversation(config.CHAT_GUID)
+    if conversation and conversation.awaiting_response:
+        logger.info("Dropping batched proactive message, a response is in progress")
+        return
+    
+    await send_to_chat_async(message, config.CHAT_GUID)
+    conversation_manager.mark_message_sent(config.CHAT_GUID, message)
+    
+    logger.info(f"Sent batched proactive message: {message[:50]}...")
+
 async def automatic_messaging_loop():
     """Background task that sends proactive messages at intervals."""
+    global proactive_batch_pending
     logger.info("Starting automatic messaging loop...")
     
     while True:
@@ -144,7 +168,7 @@ async def automatic_messaging_loop():
             await asyncio.sleep(60)  # Check every minute
             
             # Check if we should send a proactive message
-            if conversation_manager.should_send_proactive_message(
+            if not proactive_batch_pending and conversation_manager.should_send_proactive_message(
                 config.CHAT_GUID, 
                 config.MESSAGE_INTERVAL_MINUTES
             ):
@@ -153,11 +177,17 @@ async def automatic_messaging_loop():
                 # Get conversation context
                 context = conversation_manager.get_conversation_context(config.CHAT_GUID)
                 
+                if config.ENABLE_BATCH_PROACTIVE_MESSAGES:
+                    # Not latency-critical: sent whenever the batch completes
+                    proactive_batch_pending = True
+                    await lover_ai.generate_proactive_message_deferred(context, deliver_batched_proactive_message)
+                    continue
+                
                 # Generate proactive message
                 message = await lover_ai.generate_proactive_message(context)
                 
                 # Send the message
-                bot.send_to_chat(message, config.CHAT_GUID)
+                await send_to_chat_async(message, config.CHAT_GUID)
                 
                 # Mark message as sent
                 conversation_manager.mark_message_sent(config.CHAT_GUID, message)
@@ -216,7 +246,7 @@ async def force_send_message_async():
         context = conversation_manager.get_conversation_context(config.CHAT_GUID)
         message_text = await lover_ai.generate_proactive_message(context)
         
-        bot.send_to_chat(message_text, config.CHAT_GUID)
+        await send_to_chat_async(message_text, config.CHAT_GUID)
         conversation_manager.mark_message_sent(config.CHAT_GUID, message_text)
         
         logger.info(f"Force sent message: {message_text[:50]}...")
@@ -250,13 +280,18 @@ async def force_send_message():
         context = conversation_manager.get_conversation_context(config.CHAT_GUID)
         message_text = await lover_ai.generate_proactive_message(context)
         
-        bot.send_to_chat(message_text, config.CHAT_GUID)
+        await send_to_chat_async(message_text, config.CHAT_GUID)
         conversation_manager.mark_message_sent(config.CHAT_GUID, message_text)
         
         return {"status": "success", "message": message_text}
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
+@bot.app.on_event("shutdown")
+async def close_clients():
+    """Close the OpenAI connection pool when the server stops."""
+    await lover_ai.aclose()
+
 @bot.app.get("/stats")
 async def get_stats():
     """Get detailed statistics."""
@@ -1,12 +1,15 @@
 """Main Bot class for the iMessage Bot Framework."""
 
 import os
+import sys
 import logging
-from typing import List, Callable, Dict, Any, Optional
+import functools
+from typing import List, Callable, Dict, Any, Optional, Tuple
 from fastapi import FastAPI, BackgroundTasks
 from pydantic import BaseModel
 import uvicorn
 from .message import Message
+from .scanner import PatternScanner, CommandIndex
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +53,10 @@ class Bot:
         self.message_handlers: List[Callable] = []
         self.middleware: List[Callable] = []
         
+        # Built lazily on first dispatch, reset when handlers change
+        self._scanner: Optional[PatternScanner] = None
+        self._command_index: Optional[CommandIndex] = None
+        
         # FastAPI app
         self.app = FastAPI(title=f"{self.name} Bot", version="1.0.0")
         self._setup_routes()
@@ -132,7 +139,10 @@ class Bot:
         
         handle = message_data.get('handle', {})
         if isinstance(handle, dict):
-            return handle.get('address', 'unknown')
+            # Interned so per-sender dict lookups (state, rate limits) hit
+            # the identity fast path for repeat senders
+            address = handle.get('address', 'unknown')
+            return sys.intern(address) if isinstance(address, str) else address
         
         return 'unknown'
     
@@ -141,21 +151,18 @@ class Bot:
         try:
             logger.debug(f"Processing message: {message}")
             
+            # Handlers run at most once per message: every middleware's
+            # next() and the final dispatch share the first result
+            dispatched: Dict[int, Any] = {}
+            
+            def next_handler(msg):
+                if id(msg) not in dispatched:
+                    dispatched[id(msg)] = self._dispatch(msg)
+                return dispatched[id(msg)]
+            
             # Apply middleware
             for middleware_func in self.middleware:
                 try:
-                    # Create a synchronous wrapper for next handler
-                    def next_handler(msg):
-                        # Run handlers synchronously and return result
-                        for handler in self.message_handlers:
-                            try:
-                                result = handler(msg)
-                                if result is not None:
-                                    return result
-                            except Exception as e:
-                                logger.error(f"Error in handler {handler.__name__}: {e}")
-                        return None
-                    
                     result = middleware_func(message, next_handler)
                     if result is not None:
                         # Middleware returned a response, send it
@@ -166,24 +173,38 @@ class Bot:
                     logger.error(f"Error in middleware {middleware_func.__name__}: {e}")
             
             # Run handlers if no middleware intercepted
-            await self._run_handlers(message)
+            result = next_handler(message)
+            if isinstance(result, str):
+                message.reply(result)
             
         except Exception as e:
             logger.error(f"Error processing message: {e}")
     
-    async def _run_handlers(self, message: Message):
-        """Run all message handlers for a message."""
-        for handler in self.message_handlers:
+    def _candidate_handlers(self, message: Message) -> List[Callable]:
+        """Get the handlers that could respond to a message, in order."""
+        if self._scanner is None:
+            self._scanner = PatternScanner(self.message_handlers)
+            self._command_index = CommandIndex(self.message_handlers)
+        handlers = self._command_index.filter(
+            self.message_handlers, message.text, message.text_lower
+        )
+        return self._scanner.filter(handlers, message.text_normalized)
+    
+    def _dispatch(self, message: Message) -> Optional[Any]:
+        """
+        Run handlers until one responds.
+        
+        Only the first handler that returns something gets to respond; the
+        remaining handlers (and their pattern searches) are skipped.
+        """
+        for handler in self._candidate_handlers(message):
             try:
                 result = handler(message)
                 if result is not None:
-                    # Handler returned a response, send it
-                    if isinstance(result, str):
-                        message.reply(result)
-                    # Only first handler that returns something gets to respond
-                    break
+                    return result
             except Exception as e:
                 logger.error(f"Error in handler {handler.__name__}: {e}")
+        return None
     
     def on_message(self, handler: Callable[[Message], Optional[str]]):
         """
@@ -196,9 +217,70 @@ class Bot:
             The handler function (for use as decorator)
         """
         self.message_handlers.append(handler)
+        self._scanner = None
+        self._command_index = None
         logger.info(f"Registered message handler: {handler.__name__}")
         return handler
     
+    def handler(
+        self,
+        command: Optional[str] = None,
+        case_sensitive: bool = False,
+        only_me: bool = False,
+        from_user: Optional[str] = None,
+        rate_limit: Optional[Tuple[int, int]] = None
+    ):
+        """
+        Register a message handler with its filters composed into one wrapper.
+        
+        Equivalent to stacking ``@bot.on_message``, ``@command``,
+        ``@only_from_me``/``@only_from_user`` and ``@rate_limit``, but all
+        checks run inside a single function call per message.
+        
+        Args:
+            command: Command trigger the message must start with (e.g., "!admin")
+            case_sensitive: Whether the command matching is case sensitive
+            only_me: Only handle messages sent by the bot owner
+            from_user: Only handle messages from this user identifier
+            rate_limit: Optional (max_calls, window_seconds) limit per sender
+            
+        Returns:
+            Decorator function
+        """
+        import inspect
+        from ..decorators.patterns import RateLimiter, RATE_LIMIT_MESSAGE
+        
+        trigger = None
+        if command is not None:
+            trigger = command if case_sensitive else command.lower()
+        limiter = RateLimiter(*rate_limit) if rate_limit else None
+        
+        def decorator(func: Callable):
+            accepts_args = len(inspect.signature(func).parameters) > 1
+            
+            @functools.wraps(func)
+            def wrapper(message: Message) -> Optional[str]:
+                args_text = ""
+                if trigger is not None:
+                    text = message.text if case_sensitive else message.text_lower
+                    if not text.startswith(trigger):
+                        return None
+                    args_text = message.text[len(trigger):].strip()
+                if only_me and not message.is_from_me:
+                    return None
+                if from_user is not None and message.sender != from_user:
+                    return None
+                if limiter is not None and not limiter.allow(message.sender):
+                    return RATE_LIMIT_MESSAGE
+                if accepts_args:
+                    return func(message, args_text)
+                return func(message)
+            
+            if trigger is not None:
+                wrapper._command_trigger = (trigger, case_sensitive)
+            return self.on_message(wrapper)
+        return decorator
+    
     def use_middleware(self, middleware_func: Callable):
         """
         Register middleware.
@@ -1,12 +1,44 @@
 """Chat class for interacting with iMessage chats."""
 
+import json
 import requests
 import uuid
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+SEND_HEADERS = {"Content-Type": "application/json"}
+
+
+@lru_cache(maxsize=256)
+def _json_string(value: str) -> bytes:
+    """JSON-encode a string to UTF-8 bytes, cached for repeated replies and chat GUIDs."""
+    return json.dumps(value).encode("utf-8")
+
+
+def build_send_payload(chat_guid: str, text: str) -> bytes:
+    """
+    Build the JSON body for a BlueBubbles text message send.
+    
+    Static replies and chat GUIDs repeat constantly, so their encoded form
+    is cached and only the temp GUID is rendered per send.
+    
+    Args:
+        chat_guid: The chat GUID to send to
+        text: The message text
+        
+    Returns:
+        The encoded request body
+    """
+    return b"".join((
+        b'{"chatGuid": ', _json_string(chat_guid),
+        b', "tempGuid": "', str(uuid.uuid4()).encode("ascii"),
+        b'", "message": ', _json_string(text),
+        b', "method": "apple-script", "subject": "", "effectId": "", "selectedMessageGuid": ""}'
+    ))
+
 
 class Chat:
     """Represents an iMessage chat with methods to interact with it."""
@@ -34,23 +66,13 @@ class Chat:
         """
         try:
             params = {"password": self._bot_config.get("bluebubbles_password")}
-            data = {
-                "chatGuid": self.guid,
-                "tempGuid": str(uuid.uuid4()),
-                "message": text,
-                "method": "apple-script",
-                "subject": "",
-                "effectId": "",
-                "selectedMessageGuid": ""
-            }
-            
             url = f"{self._bot_config.get('bluebubbles_url')}/api/v1/message/text"
             
             response = requests.post(
                 url,
-                json=data,
+                data=build_send_payload(self.guid, text),
                 params=params,
-                headers={"Content-Type": "application/json"},
+                headers=SEND_HEADERS,
                 timeout=10
             )
             
@@ -1,13 +1,23 @@
 """Message class for handling incoming iMessages."""
 
 import requests
-import uuid
 from datetime import datetime
+from functools import cached_property
 from typing import Dict, Any, Optional
 import logging
+from .chat import build_send_payload, SEND_HEADERS
 
 logger = logging.getLogger(__name__)
 
+# iMessage autocorrects straight quotes to curly ones; map them back so
+# patterns written with ASCII quotes (e.g. "what's") still match
+_QUOTE_TABLE = str.maketrans({
+    "\u2018": "'",
+    "\u2019": "'",
+    "\u201c": '"',
+    "\u201d": '"',
+})
+
 
 class Message:
     """Represents an incoming iMessage with methods to respond."""
@@ -59,23 +69,13 @@ class Message:
         
         try:
             params = {"password": self._bot_config.get("bluebubbles_password")}
-            data = {
-                "chatGuid": target_chat,
-                "tempGuid": str(uuid.uuid4()),
-                "message": text,
-                "method": "apple-script",
-                "subject": "",
-                "effectId": "",
-                "selectedMessageGuid": ""
-            }
-            
             url = f"{self._bot_config.get('bluebubbles_url')}/api/v1/message/text"
             
             response = requests.post(
                 url,
-                json=data,
+                data=build_send_payload(target_chat, text),
                 params=params,
-                headers={"Content-Type": "application/json"},
+                headers=SEND_HEADERS,
                 timeout=10
             )
             
@@ -90,6 +90,16 @@ class Message:
             logger.error(f"Unexpected error sending message: {e}")
             return False
     
+    @cached_property
+    def text_lower(self) -> str:
+        """Lowercased message text, computed once and shared by all handlers."""
+        return self.text.lower()
+    
+    @cached_property
+    def text_normalized(self) -> str:
+        """Message text with curly quotes replaced by ASCII quotes, computed once."""
+        return self.text.translate(_QUOTE_TABLE)
+    
     @property
     def chat(self):
         """Get a Chat object for this message's chat."""
@@ -0,0 +1,219 @@
+"""Prefilters that narrow down which handlers can respond to a message."""
+
+import re
+import logging
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+try:
+    import hyperscan
+except ImportError:  # pragma: no cover - optional dependency
+    hyperscan = None
+
+
+class PatternScanner:
+    """
+    Scans a message once against every registered regex handler.
+
+    When ``hyperscan`` is installed, all handler patterns are compiled into a
+    single database and each message is scanned in one pass to find which
+    handlers can possibly match. Handlers whose pattern did not match are
+    skipped without running Python's backtracking engine. Capture groups are
+    still extracted by the handler's own ``re`` pattern.
+
+    Without ``hyperscan`` (or if the patterns can't be compiled) the scanner
+    is disabled and every handler is tried, as before.
+    """
+
+    def __init__(self, handlers: List[Callable]):
+        """
+        Initialize the scanner.
+
+        Args:
+            handlers: The bot's registered message handlers
+        """
+        self._handler_ids = {}
+        self._database = None
+
+        if hyperscan is None:
+            return
+
+        expressions = []
+        flags = []
+        for handler in handlers:
+            pattern = getattr(handler, "_regex_pattern", None)
+            if pattern is None or id(handler) in self._handler_ids:
+                continue
+            self._handler_ids[id(handler)] = len(expressions)
+            expressions.append(pattern.pattern.encode("utf-8"))
+            flags.append(self._translate_flags(pattern.flags))
+
+        if not expressions:
+            return
+
+        try:
+            database = hyperscan.Database()
+            database.compile(
+                expressions=expressions,
+                ids=list(range(len(expressions))),
+                elements=len(expressions),
+                flags=flags
+            )
+            self._database = database
+            logger.debug(f"Compiled {len(expressions)} handler patterns into scanner")
+        except Exception as e:
+            logger.debug(f"Pattern scanner disabled, falling back to per-handler regex: {e}")
+            self._handler_ids = {}
+
+    @staticmethod
+    def _translate_flags(re_flags: int) -> int:
+        """Map Python ``re`` flags onto Hyperscan compile flags."""
+        # PREFILTER lets Hyperscan approximate constructs it doesn't support
+        # (lookarounds, backreferences) with a superset match, which is all
+        # we need since the handler re-runs its own pattern afterwards.
+        hs_flags = (
+            hyperscan.HS_FLAG_PREFILTER
+            | hyperscan.HS_FLAG_SINGLEMATCH
+            | hyperscan.HS_FLAG_ALLOWEMPTY
+            | hyperscan.HS_FLAG_UTF8
+            | hyperscan.HS_FLAG_UCP
+        )
+        if re_flags & re.IGNORECASE:
+            hs_flags |= hyperscan.HS_FLAG_CASELESS
+        if re_flags & re.DOTALL:
+            hs_flags |= hyperscan.HS_FLAG_DOTALL
+        if re_flags & re.MULTILINE:
+            hs_flags |= hyperscan.HS_FLAG_MULTILINE
+        return hs_flags
+
+    @property
+    def enabled(self) -> bool:
+        """Whether messages are being prefiltered."""
+        return self._database is not None
+
+    def scan(self, text: str) -> Optional[Set[int]]:
+        """
+        Find the pattern ids that match a message.
+
+        Args:
+            text: The message text
+
+        Returns:
+            Set of matching pattern ids, or None if the scanner is disabled
+        """
+        if self._database is None:
+            return None
+
+        matched: Set[int] = set()
+
+        def on_match(pattern_id, start, end, flags, context):
+            matched.add(pattern_id)
+
+        try:
+            self._database.scan(text.encode("utf-8"), match_event_handler=on_match)
+        except Exception as e:
+            logger.debug(f"Pattern scan failed, trying all handlers: {e}")
+            return None
+        return matched
+
+    def filter(self, handlers: List[Callable], text: str) -> List[Callable]:
+        """
+        Drop regex handlers that cannot match a message.
+
+        Args:
+            handlers: The bot's registered message handlers
+            text: The message text
+
+        Returns:
+            Handlers worth running, in registration order
+        """
+        matched = self.scan(text)
+        if matched is None:
+            return handlers
+
+        candidates = []
+        for handler in handlers:
+            pattern_id = self._handler_ids.get(id(handler))
+            if pattern_id is None or pattern_id in matched:
+                candidates.append(handler)
+        return candidates
+
+
+class CommandIndex:
+    """
+    Looks up command handlers by trigger instead of testing each one.
+
+    Handlers built with ``@command`` (or ``Bot.handler(command=...)``) are
+    indexed by their trigger. For each message, only the prefixes of the text
+    up to the longest trigger are looked up, so the cost no longer grows with
+    the number of registered commands. Matching keeps ``startswith``
+    semantics, so "!hellothere" still reaches a "!hello" handler.
+    """
+
+    def __init__(self, handlers: List[Callable]):
+        """
+        Initialize the index.
+
+        Args:
+            handlers: The bot's registered message handlers
+        """
+        # case_sensitive -> trigger -> handler ids
+        self._triggers: Dict[bool, Dict[str, Set[int]]] = {True: {}, False: {}}
+        self._indexed: Set[int] = set()
+        self._max_length = 0
+        # First characters of all triggers (e.g. {"!"}), for a one-character
+        # rejection of ordinary chat messages before any prefix lookups
+        self._lead_chars: Optional[Set[str]] = set()
+
+        for handler in handlers:
+            command = getattr(handler, "_command_trigger", None)
+            if command is None:
+                continue
+            trigger, case_sensitive = command
+            self._triggers[case_sensitive].setdefault(trigger, set()).add(id(handler))
+            self._indexed.add(id(handler))
+            self._max_length = max(self._max_length, len(trigger))
+            if not trigger:
+                self._lead_chars = None
+            elif self._lead_chars is not None:
+                self._lead_chars.add(trigger[0])
+                self._lead_chars.add(trigger[0].lower())
+
+    def _matching(self, triggers: Dict[str, Set[int]], text: str) -> Set[int]:
+        """Collect handler ids whose trigger is a prefix of the text."""
+        matched: Set[int] = set()
+        if not triggers:
+            return matched
+        for end in range(min(len(text), self._max_length) + 1):
+            handler_ids = triggers.get(text[:end])
+            if handler_ids:
+                matched |= handler_ids
+        return matched
+
+    def filter(self, handlers: List[Callable], text: str, text_lower: str) -> List[Callable]:
+        """
+        Drop command handlers whose trigger the message doesn't start with.
+
+        Args:
+            handlers: The bot's registered message handlers
+            text: The message text
+            text_lower: The lowercased message text
+
+        Returns:
+            Handlers worth running, in registration order
+        """
+        if not self._indexed:
+            return handlers
+
+        lead_chars = self._lead_chars
+        if lead_chars is not None and text[:1] not in lead_chars and text_lower[:1] not in lead_chars:
+            matched: Set[int] = set()
+        else:
+            matched = self._matching(self._triggers[True], text)
+            matched |= self._matching(self._triggers[False], text_lower)
+
+        return [
+            handler for handler in handlers
+            if id(handler) not in self._indexed or id(handler) in matched
+        ]
@@ -1,5 +1,5 @@
 """Decorators for common bot patterns."""
 
-from .patterns import command, contains, regex, scheduled, only_from_me, only_from_user, rate_limit
+from .patterns import command, contains, regex, scheduled, only_from_me, only_from_user, rate_limit, RateLimiter
 
-__all__ = ["command", "contains", "regex", "scheduled", "only_from_me", "only_from_user", "rate_limit"] 
\ No newline at end of file
+__all__ = ["command", "contains", "regex", "scheduled", "only_from_me", "only_from_user", "rate_limit", "RateLimiter"] 
\ No newline at end of file
@@ -1,10 +1,74 @@
 """Pattern matching decorators for bot handlers."""
 
 import re
+import time
+import logging
 import functools
-from typing import Callable, Optional, Any
+from collections import defaultdict, deque
+from typing import Callable, Optional, Any, Pattern, Union
 from ..core.message import Message
 
+try:
+    import re2
+except ImportError:  # pragma: no cover - optional dependency
+    re2 = None
+
+try:
+    import regex as regex_module
+except ImportError:  # pragma: no cover - optional dependency
+    regex_module = None
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_MESSAGE = "Rate limit exceeded. Please slow down."
+
+# Time budget per search when the `regex` module is the matching engine
+REGEX_TIMEOUT_SECONDS = 0.05
+
+_RE2_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"))
+
+
+def _safe_search(compiled_pattern: Pattern) -> Callable[[str], Optional[Any]]:
+    """
+    Pick the safest available engine to run a handler pattern against user text.
+    
+    Prefers ``google-re2`` (linear time, no backtracking), then the ``regex``
+    module with a per-search timeout, then the standard ``re`` pattern. A
+    pattern the preferred engine can't compile (e.g. lookbehinds under RE2)
+    falls through to the next one.
+    
+    Args:
+        compiled_pattern: The pattern compiled with the standard ``re`` module
+        
+    Returns:
+        A search function taking the message text and returning a match or None
+    """
+    if re2 is not None:
+        inline = "".join(letter for flag, letter in _RE2_INLINE_FLAGS if compiled_pattern.flags & flag)
+        source = f"(?{inline}){compiled_pattern.pattern}" if inline else compiled_pattern.pattern
+        options = re2.Options()
+        options.log_errors = False
+        try:
+            return re2.compile(source, options).search
+        except Exception:
+            logger.debug(f"RE2 can't compile {compiled_pattern.pattern!r}, trying next engine")
+    
+    if regex_module is not None:
+        try:
+            bounded_pattern = regex_module.compile(compiled_pattern.pattern, compiled_pattern.flags)
+        except Exception:
+            logger.debug(f"regex can't compile {compiled_pattern.pattern!r}, using re")
+        else:
+            def search(text: str):
+                try:
+                    return bounded_pattern.search(text, timeout=REGEX_TIMEOUT_SECONDS)
+                except TimeoutError:
+                    logger.warning(f"Pattern {compiled_pattern.pattern!r} timed out, treating as no match")
+                    return None
+            return search
+    
+    return compiled_pattern.search
+
 
 def command(trigger: str, case_sensitive: bool = False):
     """
@@ -17,11 +81,12 @@ def command(trigger: str, case_sensitive: bool = False):
     Returns:
         Decorator function
     """
+    cmd = trigger if case_sensitive else trigger.lower()
+    
     def decorator(handler: Callable[[Message], Optional[str]]):
         @functools.wraps(handler)
         def wrapper(message: Message) -> Optional[str]:
-            text = message.text if case_sensitive else message.text.lower()
-            cmd = trigger if case_sensitive else trigger.lower()
+            text = message.text if case_sensitive else message.text_lower
             
             if text.startswith(cmd):
                 # Extract arguments after the command
@@ -40,6 +105,8 @@ def command(trigger: str, case_sensitive: bool = False):
                     # Handler doesn't accept args, just pass message
                     return handler(message)
             return None
+        # Exposed so the bot can look up command handlers by trigger
+        wrapper._command_trigger = (cmd, case_sensitive)
         return wrapper
     return decorator
 
@@ -55,12 +122,14 @@ def contains(text: str, case_sensitive: bool = False):
     Returns:
         Decorator function
     """
+    search_text = text if case_sensitive else text.lower()
+    
     def decorator(handler: Callable[[Message], Optional[str]]):
         @functools.wraps(handler)
         def wrapper(message: Message) -> Optional[str]:
-            msg_text = message.text if case_sensitive else message.text.lower()
-            search_text = text if case_sensitive else text.lower()
+            msg_text = message.text if case_sensitive else message.text_lower
             
+            # Plain substring test, no regex involved
             if search_text in msg_text:
                 return handler(message)
             return None
@@ -68,23 +137,35 @@ def contains(text: str, case_sensitive: bool = False):
     return decorator
 
 
-def regex(pattern: str, flags: int = 0):
+def regex(pattern: Union[str, Pattern], flags: int = 0, pass_match: bool = False):
     """
     Decorator for regex-based handlers.
     
+    Patterns are matched against the message text with curly quotes
+    normalized to ASCII, so "what's" also matches iMessage's "what’s".
+    
     Args:
-        pattern: The regex pattern to match
+        pattern: The regex pattern to match, either a string or a
+            precompiled pattern (flags are ignored for compiled patterns)
         flags: Regex flags (e.g., re.IGNORECASE)
+        pass_match: Call the handler with (message, match) so it can read
+            named groups or ``lastgroup``, instead of passing the groups
         
     Returns:
         Decorator function
     """
-    compiled_pattern = re.compile(pattern, flags)
+    if isinstance(pattern, re.Pattern):
+        compiled_pattern = pattern
+    else:
+        compiled_pattern = re.compile(pattern, flags)
+    search = _safe_search(compiled_pattern)
     
     def decorator(handler: Callable):
         @functools.wraps(handler)
         def wrapper(message: Message) -> Optional[str]:
-            match = compiled_pattern.search(message.text)
+            match = search(message.text_normalized)
+            if match and pass_match:
+                return handler(message, match)
             if match:
                 # Try to pass match groups to handler
                 try:
@@ -106,6 +187,8 @@ def regex(pattern: str, flags: int = 0):
                     # Fallback to just message
                     return handler(message)
             return None
+        # Exposed so the bot can prefilter regex handlers in a single scan
+        wrapper._regex_pattern = compiled_pattern
         return wrapper
     return decorator
 
@@ -169,6 +252,51 @@ def only_from_me():
     return decorator
 
 
+class RateLimiter:
+    """Sliding-window call limiter keyed by sender."""
+    
+    def __init__(self, max_calls: int = 5, window_seconds: int = 60):
+        """
+        Initialize the limiter.
+        
+        Args:
+            max_calls: Maximum calls allowed in the window
+            window_seconds: Time window in seconds
+        """
+        self.max_calls = max_calls
+        self.window_seconds = window_seconds
+        # Integer nanoseconds from a monotonic clock: no float math, and
+        # wall-clock adjustments can't open or close the window early
+        self._window_ns = int(window_seconds * 1_000_000_000)
+        self._call_history = defaultdict(deque)
+    
+    def allow(self, sender: str) -> bool:
+        """
+        Record a call from a sender if they are under the limit.
+        
+        Args:
+            sender: The sender identifier
+            
+        Returns:
+            True if the call is allowed, False if the sender is rate limited
+        """
+        now = time.monotonic_ns()
+        cutoff = now - self._window_ns
+        user_calls = self._call_history[sender]
+        
+        # Remove old calls outside the window
+        while user_calls and user_calls[0] < cutoff:
+            user_calls.popleft()
+        
+        # Check if user has exceeded rate limit
+        if len(user_calls) >= self.max_calls:
+            return False
+        
+        # Record this call
+        user_calls.append(now)
+        return True
+
+
 def rate_limit(max_calls: int = 5, window_seconds: int = 60):
     """
     Decorator to rate limit handler calls per user.
@@ -180,28 +308,13 @@ def rate_limit(max_calls: int = 5, window_seconds: int = 60):
     Returns:
         Decorator function
     """
-    import time
-    from collections import defaultdict, deque
-    
-    call_history = defaultdict(deque)
+    limiter = RateLimiter(max_calls, window_seconds)
     
     def decorator(handler: Callable[[Message], Optional[str]]):
         @functools.wraps(handler)
         def wrapper(message: Message) -> Optional[str]:
-            now = time.time()
-            user_calls = call_history[message.sender]
-            
-            # Remove old calls outside the window
-            while user_calls and user_calls[0] < now - window_seconds:
-                user_calls.popleft()
-            
-            # Check if user has exceeded rate limit
-            if len(user_calls) >= max_calls:
-                return "Rate limit exceeded. Please slow down."
-            
-            # Record this call
-            user_calls.append(now)
-            
+            if not limiter.allow(message.sender):
+                return RATE_LIMIT_MESSAGE
             return handler(message)
         return wrapper
-    return decorator 
\ No newline at end of file
+    return decorator
@@ -2,7 +2,10 @@
 
 import json
 import os
-from typing import Any, Optional, Dict
+import atexit
+import tempfile
+import threading
+from typing import Any, Optional, Dict, Tuple
 from contextlib import contextmanager
 import logging
 
@@ -12,17 +15,27 @@ logger = logging.getLogger(__name__)
 class State:
     """Simple persistent key-value store for bot state."""
     
-    def __init__(self, storage_file: str = "bot_state.json"):
+    def __init__(self, storage_file: str = "bot_state.json", write_delay: float = 0.0):
         """
         Initialize the state manager.
         
         Args:
             storage_file: Path to the JSON file for storing state
+            write_delay: Seconds to batch writes before flushing to disk.
+                0 writes the file on every change.
         """
         self.storage_file = storage_file
+        self.write_delay = write_delay
         self._state: Dict[str, Any] = {}
         self._conversations: Dict[str, Dict[str, Any]] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._flush_timer: Optional[threading.Timer] = None
         self.load()
+        
+        if write_delay > 0:
+            # Don't lose the last batch of writes on shutdown
+            atexit.register(self.flush)
     
     def load(self):
         """Load state from storage file."""
@@ -32,25 +45,62 @@ class State:
                     data = json.load(f)
                     self._state = data.get('state', {})
                     self._conversations = data.get('conversations', {})
+                    self._counters = data.get('counters', {})
                 logger.info(f"Loaded state from {self.storage_file}")
         except Exception as e:
             logger.error(f"Error loading state: {e}")
             self._state = {}
             self._conversations = {}
+            self._counters = {}
     
     def save(self):
         """Save state to storage file."""
         try:
-            data = {
-                'state': self._state,
-                'conversations': self._conversations
-            }
-            with open(self.storage_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            with self._lock:
+                data = {
+                    'state': self._state,
+                    'conversations': self._conversations,
+                    'counters': self._counters
+                }
+                payload = json.dumps(data, indent=2)
+            
+            # Write to a temp file and swap it in so a crash mid-write
+            # can't leave a truncated state file behind. Each save gets its
+            # own temp file, since a timer flush and a direct save can overlap
+            directory, name = os.path.split(os.path.abspath(self.storage_file))
+            fd, temp_file = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(payload)
+                os.replace(temp_file, self.storage_file)
+            except BaseException:
+                os.unlink(temp_file)
+                raise
             logger.debug(f"Saved state to {self.storage_file}")
         except Exception as e:
             logger.error(f"Error saving state: {e}")
     
+    def flush(self):
+        """Write any batched changes to disk immediately."""
+        with self._lock:
+            timer = self._flush_timer
+            self._flush_timer = None
+        if timer is not None:
+            timer.cancel()
+            self.save()
+    
+    def _schedule_save(self):
+        """Save now, or batch the write if a write delay is configured."""
+        if self.write_delay <= 0:
+            self.save()
+            return
+        
+        with self._lock:
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.write_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
     def get(self, key: str, default: Any = None) -> Any:
         """
         Get a value from state.
@@ -72,8 +122,9 @@ class State:
             key: The state key
             value: The value to store
         """
-        self._state[key] = value
-        self.save()
+        with self._lock:
+            self._state[key] = value
+        self._schedule_save()
     
     def delete(self, key: str):
         """
@@ -82,9 +133,11 @@ class State:
         Args:
             key: The state key to delete
         """
-        if key in self._state:
+        with self._lock:
+            if key not in self._state:
+                return
             del self._state[key]
-            self.save()
+        self._schedule_save()
     
     def increment(self, key: str, amount: int = 1) -> int:
         """
@@ -97,9 +150,10 @@ class State:
         Returns:
             The new value
         """
-        current = self.get(key, 0)
-        new_value = current + amount
-        self.set(key, new_value)
+        with self._lock:
+            new_value = self._state.get(key, 0) + amount
+            self._state[key] = new_value
+        self._schedule_save()
         return new_value
     
     def append(self, key: str, value: Any):
@@ -110,11 +164,79 @@ class State:
             key: The state key
             value: Value to append
         """
-        current = self.get(key, [])
-        if not isinstance(current, list):
-            current = [current]
-        current.append(value)
-        self.set(key, current)
+        with self._lock:
+            current = self._state.get(key, [])
+            if not isinstance(current, list):
+                current = [current]
+            current.append(value)
+            self._state[key] = current
+        self._schedule_save()
+    
+    def incr_counter(self, user_id: str, amount: int = 1) -> int:
+        """
+        Increment a per-user counter.
+        
+        Counters live in their own table keyed directly by user, so no
+        per-call key formatting or prefix scans are needed.
+        
+        Args:
+            user_id: The user identifier
+            amount: Amount to increment by
+            
+        Returns:
+            The new count
+        """
+        with self._lock:
+            new_value = self._counters.get(user_id, 0) + amount
+            self._counters[user_id] = new_value
+        self._schedule_save()
+        return new_value
+    
+    def reset_counter(self, user_id: str):
+        """
+        Reset a per-user counter to 0.
+        
+        Args:
+            user_id: The user identifier
+        """
+        with self._lock:
+            self._counters[user_id] = 0
+        self._schedule_save()
+    
+    def migrate_prefixed_counters(self, prefix: str) -> int:
+        """
+        Move per-user counters kept as prefixed state keys into the counters table.
+        
+        For bots that counted with ``increment(f"{prefix}{user}")`` before
+        switching to incr_counter(). Every integer key starting with the
+        prefix is treated as a counter, so only call it for a prefix the
+        bot used for nothing else.
+        
+        Args:
+            prefix: The key prefix (e.g., "counter_")
+            
+        Returns:
+            The number of counters migrated
+        """
+        with self._lock:
+            keys = [key for key, value in self._state.items() if key.startswith(prefix) and type(value) is int]
+            for key in keys:
+                user_id = key[len(prefix):]
+                self._counters[user_id] = self._counters.get(user_id, 0) + self._state.pop(key)
+        if keys:
+            logger.info(f"Migrated {len(keys)} per-user counters from '{prefix}' keys")
+            self._schedule_save()
+        return len(keys)
+    
+    def counters_sum(self) -> Tuple[int, int]:
+        """
+        Count and sum all per-user counters.
+        
+        Returns:
+            Tuple of (number of users with a counter, sum of all counters)
+        """
+        with self._lock:
+            return len(self._counters), sum(self._counters.values())
     
     @contextmanager
     def conversation(self, user_id: str):
@@ -127,14 +249,14 @@ class State:
         Yields:
             ConversationContext object
         """
-        if user_id not in self._conversations:
-            self._conversations[user_id] = {}
+        with self._lock:
+            conversation_data = self._conversations.setdefault(user_id, {})
         
-        context = ConversationContext(user_id, self._conversations[user_id], self)
+        context = ConversationContext(user_id, conversation_data, self)
         try:
             yield context
         finally:
-            self.save()
+            self._schedule_save()
     
     def clear_conversation(self, user_id: str):
         """
@@ -143,9 +265,11 @@ class State:
         Args:
             user_id: The user identifier
         """
-        if user_id in self._conversations:
+        with self._lock:
+            if user_id not in self._conversations:
+                return
             del self._conversations[user_id]
-            self.save()
+        self._schedule_save()
     
     def get_all_keys(self) -> list:
         """Get all state keys."""
@@ -153,9 +277,11 @@ class State:
     
     def clear_all(self):
         """Clear all state."""
-        self._state = {}
-        self._conversations = {}
-        self.save()
+        with self._lock:
+            self._state = {}
+            self._conversations = {}
+            self._counters = {}
+        self._schedule_save()
 
 
 class ConversationContext:
@@ -186,7 +312,8 @@ class ConversationContext:
         """
         # This would need integration with the bot's message handling
         # For now, just store the question
-        self._data['last_question'] = question
+        with self._state_manager._lock:
+            self._data['last_question'] = question
         return ""
     
     def set(self, key: str, value: Any):
@@ -197,7 +324,9 @@ class ConversationContext:
             key: The key
             value: The value
         """
-        self._data[key] = value
+        # Under the state lock, so a background save never sees the dict mid-change
+        with self._state_manager._lock:
+            self._data[key] = value
     
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -219,11 +348,13 @@ class ConversationContext:
         Args:
             data: Dictionary of data to save
         """
-        self._data.update(data)
+        with self._state_manager._lock:
+            self._data.update(data)
     
     def clear(self):
         """Clear conversation context."""
-        self._data.clear()
+        with self._state_manager._lock:
+            self._data.clear()
     
     def is_complete(self) -> bool:
         """Check if conversation is complete."""
@@ -231,4 +362,5 @@ class ConversationContext:
     
     def mark_complete(self):
         """Mark conversation as complete."""
-        self._data['complete'] = True 
\ No newline at end of file
+        with self._state_manager._lock:
+            self._data['complete'] = True 
\ No newline at end of file
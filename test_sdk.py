@@ -75,6 +75,20 @@ def test_state_management():
         count = state.increment("counter", 5)
         assert count == 6, f"Expected 6, got {count}"
         
+        # Test per-user counters
+        state.incr_counter("alice")
+        state.incr_counter("bob", 2)
+        state.reset_counter("alice")
+        assert state.counters_sum() == (2, 2), f"Expected (2, 2), got {state.counters_sum()}"
+        
+        # Test prefixed counter keys are only migrated on request
+        state.set("counter_carol", 3)
+        state = State("test_state.json")
+        assert state.get("counter_carol") == 3, "Loading state changed an unrelated key"
+        assert state.migrate_prefixed_counters("counter_") == 1
+        assert state.counters_sum() == (3, 5), f"Expected (3, 5), got {state.counters_sum()}"
+        assert state.get("counter_carol") is None, "Prefixed counter key was not migrated"
+        
         # Test list operations
         state.append("items", "item1")
         state.append("items", "item2")
@@ -99,7 +113,7 @@ def test_decorators():
     print("\nTesting decorators...")
     
     try:
-        from imessage_bot_framework.decorators import command, contains, regex
+        from imessage_bot_framework.decorators import command, contains, regex, rate_limit
         from imessage_bot_framework.core.message import Message
         
         # Mock bot config
@@ -141,6 +155,26 @@ def test_decorators():
         result = pizza_handler(pizza_message)
         assert result == "Pizza detected!", f"Expected 'Pizza detected!', got '{result}'"
         
+        # Test that rate limiting only counts messages that match the command
+        @command("!spam")
+        @rate_limit(max_calls=1, window_seconds=60)
+        def spam_handler(message):
+            return "Spam!"
+        
+        spam_message = Message(
+            text="!spam",
+            sender="test_user",
+            chat_guid="test_chat",
+            raw_data={"isFromMe": False, "dateCreated": 0},
+            bot_config=bot_config
+        )
+        
+        assert spam_handler(pizza_message) is None
+        result = spam_handler(spam_message)
+        assert result == "Spam!", f"Expected 'Spam!', got '{result}'"
+        result = spam_handler(spam_message)
+        assert result == "Rate limit exceeded. Please slow down.", f"Expected rate limit, got '{result}'"
+        
         print("✅ Decorator tests passed")
         return True
         
@@ -177,6 +211,16 @@ def test_message_creation():
         assert message.chat_guid == "test_chat_guid"
         assert message.is_from_me == False
         assert message.guid == "test_message_guid"
+        assert message.text_lower == "hello world"
+        
+        quoted = Message(
+            text="What\u2019s up",
+            sender="test_user",
+            chat_guid="test_chat_guid",
+            raw_data={},
+            bot_config=bot_config
+        )
+        assert quoted.text_normalized == "What's up"
         
         print("✅ Message creation tests passed")
         return True